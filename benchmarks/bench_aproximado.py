@@ -0,0 +1,48 @@
+# benchmarks/bench_aproximado.py
+
+import argparse
+import time
+import numpy as np
+from src.cbr import BaseDeCasos, Caso
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede a revocação@k e o tempo do índice IVF aproximado contra a recuperação exata."
+    )
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--sondas', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--listas', type=int, default=None, help="Número de grupos (padrão: raiz do número de casos)")
+    parser.add_argument('--consultas', type=int, default=100)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    pesos = {attr: 1.0 for attr in ATRIBUTOS}
+    consultas = [
+        Caso('Entrada', '?', dict(zip(ATRIBUTOS, linha)))
+        for linha in gerar_consultas(args.consultas)[ATRIBUTOS].to_numpy()
+    ]
+    for n in args.tamanhos:
+        base = BaseDeCasos(gerar_base(n), ATRIBUTOS, indice='ivf', opcoes_indice={'n_listas': args.listas})
+        indice = base.indice
+        base.cache_resultados = None  # Cada consulta medida é uma recuperação completa, não um acerto do cache
+
+        # Referência: recuperar_casos_similares exato (varredura linear)
+        base.indice = None
+        inicio = time.perf_counter()
+        exatos = [{c.id for c, _ in base.recuperar_casos_similares(caso, pesos, k=args.k)} for caso in consultas]
+        t_exato = (time.perf_counter() - inicio) / len(consultas) * 1000
+        base.indice = indice
+
+        print(f"\n{n} casos, {len(indice.centroides)} listas, exato: {t_exato:.3f} ms/consulta")
+        print(f"{'Sondas':>7} {f'Revocação@{args.k}':>15} {'ms/consulta':>12} {'Ganho':>7}")
+        for sondas in args.sondas:
+            indice.n_sondas = sondas
+            inicio = time.perf_counter()
+            aproximados = [{c.id for c, _ in base.recuperar_casos_similares(caso, pesos, k=args.k)} for caso in consultas]
+            t_aprox = (time.perf_counter() - inicio) / len(consultas) * 1000
+            revocacao = np.mean([len(a & e) / len(e) for a, e in zip(aproximados, exatos)])
+            print(f"{sondas:>7} {revocacao:>15.3f} {t_aprox:>12.3f} {t_exato / t_aprox:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
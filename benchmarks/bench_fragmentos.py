@@ -0,0 +1,59 @@
+# benchmarks/bench_fragmentos.py
+
+import argparse
+import os
+import time
+from src.cbr import BaseDeCasos
+from src.indices import criar_indice
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede a vazão da varredura fragmentada entre processos em função do número de processos."
+    )
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1_000_000])
+    parser.add_argument('--processos', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--consultas', type=int, default=256, help="Consultas do lote usado na medida de vazão.")
+    parser.add_argument('--individuais', type=int, default=20, help="Consultas isoladas usadas na medida de latência.")
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    pesos = {attr: 1.0 for attr in ATRIBUTOS}
+    consultas = gerar_consultas(args.consultas)[ATRIBUTOS].to_numpy()
+    for n in args.tamanhos:
+        base = BaseDeCasos(gerar_base(n), ATRIBUTOS)
+
+        # Referência: varredura linear em um único processo (recuperar_lote não usa o cache de resultados)
+        inicio = time.perf_counter()
+        esperado = base.recuperar_lote(consultas, pesos, k=args.k)
+        t_linear = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for linha in consultas[:args.individuais]:
+            base.recuperar_lote(linha[None, :], pesos, k=args.k)
+        latencia_linear = (time.perf_counter() - inicio) / args.individuais * 1000
+
+        print(f"\n{n} casos; varredura linear: {args.consultas / t_linear:.1f} consultas/s, {latencia_linear:.2f} ms/consulta isolada")
+        print(f"{'Processos':>9} {'Preparo (s)':>12} {'Consultas/s':>12} {'ms/consulta':>12} {'Ganho':>7}")
+        for processos in args.processos:
+            base.indice = criar_indice('fragmentado', base.matriz, processos=processos)
+            inicio = time.perf_counter()
+            # Cópia para a memória compartilhada e início dos processos (uma vez por base)
+            base.indice.preparar()
+            base.recuperar_lote(consultas[:1], pesos, k=args.k)
+            preparo = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            obtido = base.recuperar_lote(consultas, pesos, k=args.k)
+            t_lote = time.perf_counter() - inicio
+            assert (obtido.indices == esperado.indices).all(), "Varredura fragmentada e linear divergiram"
+
+            inicio = time.perf_counter()
+            for linha in consultas[:args.individuais]:
+                base.recuperar_lote(linha[None, :], pesos, k=args.k)
+            latencia = (time.perf_counter() - inicio) / args.individuais * 1000
+            print(f"{processos:>9} {preparo:>12.2f} {args.consultas / t_lote:>12.1f} {latencia:>12.2f} {t_linear / t_lote:>6.1f}x")
+            base.indice.encerrar()
+        base.indice = None
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/bench_indice.py
+
+import argparse
+import time
+from src.cbr import BaseDeCasos, Caso
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+def medir(funcao, repeticoes):
+    """Executa a função repeticoes vezes e retorna o tempo médio em milissegundos."""
+    inicio = time.perf_counter()
+    for i in range(repeticoes):
+        funcao(i)
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a varredura linear com o índice KD-tree nas consultas top-k.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1_000, 10_000, 100_000, 300_000])
+    parser.add_argument('--consultas', type=int, default=50)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    pesos = {attr: 1.0 for attr in ATRIBUTOS}
+    consultas_df = gerar_consultas(args.consultas)
+    print(f"{'Casos':>10} {'Construção (s)':>15} {'Linear (ms)':>12} {'KD-tree (ms)':>13} {'Ganho':>7}")
+    for n in args.tamanhos:
+        data = gerar_base(n)
+        inicio = time.perf_counter()
+        base = BaseDeCasos(data, ATRIBUTOS, indice='kdtree')
+        construcao = time.perf_counter() - inicio
+        indice = base.indice
+        base.cache_resultados = None  # Cada consulta medida é uma recuperação completa, não um acerto do cache
+
+        consultas = [
+            Caso('Entrada', '?', dict(zip(ATRIBUTOS, linha)))
+            for linha in consultas_df[ATRIBUTOS].to_numpy()
+        ]
+
+        # Varredura linear: a mesma base com o índice desligado
+        base.indice = None
+        esperado = [[c.id for c, _ in base.recuperar_casos_similares(caso, pesos, k=args.k)] for caso in consultas[:5]]
+        t_linear = medir(lambda i: base.recuperar_casos_similares(consultas[i], pesos, k=args.k), len(consultas))
+
+        base.indice = indice
+        obtido = [[c.id for c, _ in base.recuperar_casos_similares(caso, pesos, k=args.k)] for caso in consultas[:5]]
+        assert esperado == obtido, "KD-tree e varredura linear divergiram"
+        t_indice = medir(lambda i: base.recuperar_casos_similares(consultas[i], pesos, k=args.k), len(consultas))
+        print(f"{n:>10} {construcao:>15.2f} {t_linear:>12.3f} {t_indice:>13.3f} {t_linear / t_indice:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_memoria.py
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from src.cbr import BaseDeCasos
+from benchmarks.sintetico import ATRIBUTOS, gerar_base
+
+class CasoComDicionario:
+    """Representação anterior de um caso: objeto com __dict__ e um dicionário de atributos."""
+    def __init__(self, id, diagnosis, atributos):
+        self.id = id
+        self.diagnosis = diagnosis
+        self.atributos = atributos
+
+def casos_com_dicionario(data):
+    """Constrói os casos como o BaseDeCasos original (iterrows e um dicionário por linha)."""
+    casos = []
+    for index, row in data.iterrows():
+        atributos = {attr: row[attr] for attr in ATRIBUTOS}
+        casos.append(CasoComDicionario(row['ID'], row['Diagnosis'], atributos))
+    return casos
+
+def medir_bytes(construir):
+    """Retorna o número de bytes alocados (e ainda vivos) pelo objeto construído."""
+    gc.collect()
+    tracemalloc.start()
+    objeto = construir()
+    atual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objeto
+    return atual
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os bytes por caso da representação com dicionário e da compacta.")
+    parser.add_argument('--casos', type=int, default=20_000)
+    args = parser.parse_args()
+
+    data = gerar_base(args.casos)
+    antes = medir_bytes(lambda: casos_com_dicionario(data))
+    base_bytes = medir_bytes(lambda: BaseDeCasos(data, ATRIBUTOS))
+    base = BaseDeCasos(data, ATRIBUTOS)
+    matriz_bytes = base.matriz.nbytes
+
+    print(f"Casos: {args.casos}")
+    print(f"{'Representação':<45} {'Bytes/caso':>12}")
+    print(f"{'Dicionário por caso (anterior)':<45} {antes / args.casos:>12.0f}")
+    print(f"{'BaseDeCasos (matriz; casos sob demanda)':<45} {base_bytes / args.casos:>12.0f}")
+    print(f"{'  dos quais a matriz de atributos':<45} {matriz_bytes / args.casos:>12.0f}")
+    caso = base.casos[0]
+    print(f"{'Caso materializado (Caso + AtributosDoCaso)':<45} {sys.getsizeof(caso) + sys.getsizeof(caso.atributos):>12.0f}")
+    print(f"Redução: {antes / base_bytes:.1f}x")
+
+if __name__ == "__main__":
+    main()
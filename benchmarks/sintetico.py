@@ -0,0 +1,63 @@
+# benchmarks/sintetico.py
+
+import numpy as np
+import pandas as pd
+
+# Atributos do Breast Cancer Wisconsin (Diagnostic), na mesma ordem usada pela interface
+ATRIBUTOS = [
+    f'{feature.capitalize()}_{sufixo}'
+    for sufixo in ['mean', 'se', 'worst']
+    for feature in [
+        'radius', 'texture', 'perimeter', 'area', 'smoothness',
+        'compactness', 'concavity', 'concave_points', 'symmetry', 'fractal_dimension'
+    ]
+]
+
+# Médias e coeficientes de variação aproximados de cada atributo no conjunto original (569 casos)
+MEDIAS = [
+    14.13, 19.29, 91.97, 654.9, 0.0964, 0.104, 0.0888, 0.0489, 0.181, 0.0628,
+    0.405, 1.217, 2.866, 40.34, 0.00704, 0.0255, 0.0319, 0.0118, 0.0205, 0.00379,
+    16.27, 25.68, 107.3, 880.6, 0.132, 0.254, 0.272, 0.115, 0.290, 0.0839,
+]
+COEFICIENTES_VARIACAO = [
+    0.25, 0.22, 0.26, 0.54, 0.15, 0.51, 0.90, 0.79, 0.15, 0.11,
+    0.68, 0.45, 0.71, 1.13, 0.43, 0.70, 0.95, 0.52, 0.40, 0.70,
+    0.30, 0.24, 0.31, 0.65, 0.17, 0.62, 0.77, 0.57, 0.21, 0.22,
+]
+
+def gerar_base(n_casos, semente=0, fatores=4):
+    """
+    Gera um DataFrame sintético com o mesmo esquema de load_data (ID, Diagnosis e 30 atributos).
+    
+    Os atributos são derivados de poucos fatores latentes, como no conjunto real, em que
+    raio, perímetro e área são fortemente correlacionados. O primeiro fator desloca os
+    casos malignos, que correspondem a cerca de 37% da base.
+    
+    :param n_casos: Número de casos a gerar.
+    :param semente: Semente do gerador aleatório.
+    :param fatores: Número de fatores latentes.
+    :return: DataFrame com as colunas ID, Diagnosis e ATRIBUTOS.
+    """
+    rng = np.random.default_rng(semente)
+    maligno = rng.random(n_casos) < 0.37
+    latentes = rng.standard_normal((n_casos, fatores))
+    latentes[:, 0] += np.where(maligno, 1.5, -0.9)
+    cargas = np.random.default_rng(12345).standard_normal((fatores, len(ATRIBUTOS))) / np.sqrt(fatores)
+    ruido = 0.3 * rng.standard_normal((n_casos, len(ATRIBUTOS)))
+    # Distribuição log-normal: mantém os valores positivos e assimétricos como no conjunto real
+    valores = np.asarray(MEDIAS) * np.exp(np.asarray(COEFICIENTES_VARIACAO) * 0.6 * (latentes @ cargas + ruido))
+
+    data = pd.DataFrame(valores, columns=ATRIBUTOS)
+    data.insert(0, 'Diagnosis', np.where(maligno, 'M', 'B'))
+    data.insert(0, 'ID', np.arange(1, n_casos + 1))
+    return data
+
+def gerar_consultas(n_consultas, semente=1):
+    """
+    Gera casos de entrada com a mesma distribuição da base sintética.
+    
+    :param n_consultas: Número de consultas.
+    :param semente: Semente do gerador aleatório (diferente da base para evitar consultas idênticas).
+    :return: DataFrame com as colunas ID, Diagnosis e ATRIBUTOS.
+    """
+    return gerar_base(n_consultas, semente=semente)
@@ -0,0 +1,193 @@
+# benchmarks/suite.py
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.cbr import BaseDeCasos, Caso
+from src.utils import limpar_normalizadores, normalize_data, zscore_normalize
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+# Versão do formato do arquivo de resultados
+VERSAO_FORMATO = 1
+
+# Variação (fração) a partir da qual a comparação aponta uma medida como regressão ou melhora
+TOLERANCIA_COMPARACAO = 0.10
+
+def cronometrar(funcao, repeticoes):
+    """
+    Executa a função repetidas vezes (recebendo o número da repetição) e mede cada execução.
+    
+    :return: Dicionário com a mediana, o mínimo e o percentil 95 em milissegundos.
+    """
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'mediana_ms': float(np.median(tempos)),
+        'minimo_ms': float(np.min(tempos)),
+        'p95_ms': float(np.percentile(tempos, 95)),
+        'repeticoes': repeticoes,
+    }
+
+def medir_memoria(construir):
+    """Bytes alocados (e ainda vivos) pelo objeto construído, e o pico durante a construção."""
+    gc.collect()
+    tracemalloc.start()
+    objeto = construir()
+    atual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objeto
+    gc.collect()
+    return atual, pico
+
+def medir_tamanho(n, args):
+    """
+    Executa todas as medidas para uma base sintética de n casos.
+    
+    :return: Dicionário nome da medida -> resultado (ver cronometrar).
+    """
+    medidas = {}
+    pesos = {attr: 1.0 for attr in ATRIBUTOS}
+    inicio = time.perf_counter()
+    data = gerar_base(n)
+    medidas['geracao'] = {'mediana_ms': (time.perf_counter() - inicio) * 1000, 'repeticoes': 1}
+    consultas_df = gerar_consultas(max(args.consultas, args.lote))
+    consultas = consultas_df[ATRIBUTOS].to_numpy()
+    entradas = [dict(zip(ATRIBUTOS, linha)) for linha in consultas[:args.consultas]]
+    repeticoes_construcao = max(1, args.repeticoes if n <= 1_000_000 else 1)
+
+    # Construção da base (a normalizada inclui o ajuste do normalizador e a matriz normalizada)
+    medidas['construcao'] = cronometrar(lambda i: BaseDeCasos(data, ATRIBUTOS), repeticoes_construcao)
+    medidas['construcao_normalizada'] = cronometrar(lambda i: BaseDeCasos(data, ATRIBUTOS, normalizar=True), repeticoes_construcao)
+    if not args.sem_memoria:
+        atual, pico = medir_memoria(lambda: BaseDeCasos(data, ATRIBUTOS))
+        medidas['memoria'] = {'bytes': atual, 'bytes_por_caso': atual / n, 'pico_bytes': pico}
+
+    base = BaseDeCasos(data, ATRIBUTOS)
+    casos = [Caso('Entrada', '?', entrada) for entrada in entradas]
+    # Consultas distintas e cache esvaziado: cada consulta é uma recuperação completa
+    base.cache_resultados.esvaziar()
+    medidas['consulta_top_k'] = cronometrar(
+        lambda i: base.recuperar_casos_similares(casos[i], pesos, k=args.k), len(casos))
+    base.cache_resultados.esvaziar()
+    medidas['consulta_todos'] = cronometrar(
+        lambda i: base.recuperar(casos[i], pesos), min(len(casos), args.repeticoes))
+    base.cache_resultados.esvaziar()
+    medidas['consulta_em_cache'] = cronometrar(
+        lambda i: base.recuperar_casos_similares(casos[0], pesos, k=args.k), len(casos))
+    lote = consultas[:args.lote]
+    medidas['lote'] = cronometrar(lambda i: base.recuperar_lote(lote, pesos, k=args.k), args.repeticoes)
+    medidas['lote']['consultas_por_s'] = len(lote) / (medidas['lote']['mediana_ms'] / 1000)
+
+    # Normalização de uma entrada: a primeira chamada ajusta o normalizador, as seguintes o reutilizam
+    for nome, funcao in (('normalize_data', normalize_data), ('zscore_normalize', zscore_normalize)):
+        limpar_normalizadores(data)
+        medidas[f'{nome}_ajuste'] = cronometrar(lambda i: funcao(data, entradas[0]), 1)
+        medidas[nome] = cronometrar(lambda i: funcao(data, entradas[i]), len(entradas))
+    normalizada = base.com_normalizacao(True)
+    medidas['normalizar_lote'] = cronometrar(lambda i: normalizada.normalizador.transformar_matriz(lote), args.repeticoes)
+
+    # Ingestão incremental: inserção e remoção de casos em uma base já construída
+    novos = [Caso(n + 1 + i, 'M', entrada) for i, entrada in enumerate(entradas)]
+    medidas['insercao'] = cronometrar(lambda i: base.adicionar_caso(novos[i]), len(novos))
+    medidas['remocao'] = cronometrar(lambda i: base.remover_caso(novos[i].id), len(novos))
+    return medidas
+
+def ambiente():
+    """Informações da máquina e das versões, gravadas junto com os resultados."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+    }
+
+def comparar(atual, anterior, tolerancia=TOLERANCIA_COMPARACAO):
+    """
+    Compara as medianas de dois arquivos de resultados, por tamanho de base e medida.
+    
+    :param atual: Resultados desta execução (dicionário no formato gravado por main).
+    :param anterior: Resultados de uma execução anterior.
+    :param tolerancia: Variação relativa abaixo da qual a medida é considerada estável.
+    :return: Lista de tuplas (casos, medida, anterior_ms, atual_ms, razão, situação).
+    """
+    anteriores = {item['casos']: item['medidas'] for item in anterior.get('resultados', [])}
+    linhas = []
+    for item in atual['resultados']:
+        medidas_anteriores = anteriores.get(item['casos'], {})
+        for nome, medida in item['medidas'].items():
+            if nome == 'geracao' or 'mediana_ms' not in medida or 'mediana_ms' not in medidas_anteriores.get(nome, {}):
+                continue
+            antes, agora = medidas_anteriores[nome]['mediana_ms'], medida['mediana_ms']
+            razao = agora / antes if antes > 0 else float('inf')
+            situacao = 'regressão' if razao > 1 + tolerancia else 'melhora' if razao < 1 - tolerancia else ''
+            linhas.append((item['casos'], nome, antes, agora, razao, situacao))
+    return linhas
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede construção, recuperação, normalização, ingestão e memória em bases sintéticas com o esquema do WDBC."
+    )
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="Números de casos das bases (ex.: 1000 ... 10000000).")
+    parser.add_argument('--consultas', type=int, default=50, help="Consultas individuais (e inserções) por tamanho.")
+    parser.add_argument('--lote', type=int, default=1_000, help="Consultas do lote de recuperar_lote.")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Repetições das medidas de lote e de construção.")
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--sem-memoria', action='store_true', help="Não mede a memória (evita uma construção extra).")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de resultados (padrão: benchmarks/resultados/suite-<data>.json).")
+    parser.add_argument('--comparar', default=None, metavar='ARQUIVO', help="Resultados anteriores a comparar com esta execução.")
+    args = parser.parse_args()
+
+    resultados = {
+        'versao_formato': VERSAO_FORMATO,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': ambiente(),
+        'parametros': vars(args),
+        'resultados': [],
+    }
+    for n in args.tamanhos:
+        print(f"\n{n} casos")
+        medidas = medir_tamanho(n, args)
+        resultados['resultados'].append({'casos': n, 'medidas': medidas})
+        for nome, medida in medidas.items():
+            if 'mediana_ms' in medida:
+                extra = f" ({medida['consultas_por_s']:,.0f} consultas/s)" if 'consultas_por_s' in medida else ""
+                print(f"  {nome:<24} {medida['mediana_ms']:>12.3f} ms{extra}")
+            else:
+                print(f"  {nome:<24} {medida['bytes_por_caso']:>12.0f} bytes/caso (pico {medida['pico_bytes'] / 2**20:,.1f} MiB)")
+
+    saida = args.saida or os.path.join('benchmarks', 'resultados', f"suite-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultados, arquivo, indent=2)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            anterior = json.load(arquivo)
+        print(f"\nComparação com {args.comparar} ({anterior.get('data')}, commit {anterior.get('ambiente', {}).get('commit')})")
+        print(f"{'Casos':>10} {'Medida':<24} {'Anterior (ms)':>14} {'Atual (ms)':>12} {'Razão':>7}")
+        for casos, nome, antes, agora, razao, situacao in comparar(resultados, anterior):
+            print(f"{casos:>10} {nome:<24} {antes:>14.3f} {agora:>12.3f} {razao:>6.2f}x {situacao}")
+
+if __name__ == "__main__":
+    main()
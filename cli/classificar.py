@@ -0,0 +1,221 @@
+# cli/classificar.py
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from src.aprendizado_pesos import carregar_pesos
+from src.cbr import BaseDeCasos
+from src.utils import load_data
+
+# Número padrão de linhas lidas, classificadas e gravadas de cada vez
+LINHAS_POR_BLOCO = 10_000
+
+def formato_do_arquivo(caminho):
+    """Formato ('csv' ou 'parquet') deduzido da extensão do arquivo ('-' é CSV na entrada/saída padrão)."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in ('.parquet', '.pq'):
+        return 'parquet'
+    if caminho == '-' or extensao in ('.csv', '.txt', '.gz', '.bz2', '.zip', '.xz'):
+        return 'csv'
+    raise ValueError(f"Formato não suportado: {caminho} (use .csv ou .parquet).")
+
+def importar_pyarrow():
+    """Importa pyarrow, necessário apenas para arquivos Parquet."""
+    try:
+        import pyarrow  # Importado aqui para que arquivos CSV não dependam do pacote
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Arquivos Parquet requerem o pacote pyarrow (pip install pyarrow).")
+    return pyarrow
+
+def ler_em_blocos(caminho, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """
+    Lê um arquivo CSV ou Parquet em blocos de linhas, sem carregá-lo inteiro.
+    
+    :param caminho: Caminho do arquivo ('-' para CSV na entrada padrão).
+    :param linhas_por_bloco: Número de linhas de cada bloco.
+    :return: Tupla (total de linhas ou None se desconhecido, iterador de DataFrames).
+    """
+    if formato_do_arquivo(caminho) == 'parquet':
+        arquivo = importar_pyarrow().parquet.ParquetFile(caminho)
+        blocos = (lote.to_pandas() for lote in arquivo.iter_batches(batch_size=linhas_por_bloco))
+        return arquivo.metadata.num_rows, blocos
+    return None, pd.read_csv(sys.stdin if caminho == '-' else caminho, chunksize=linhas_por_bloco)
+
+class EscritorDeResultados:
+    """Grava os blocos de resultados à medida que ficam prontos (CSV ou Parquet)."""
+    def __init__(self, caminho):
+        """
+        :param caminho: Arquivo de saída ('-' para CSV na saída padrão).
+        """
+        self.caminho = caminho
+        self.formato = formato_do_arquivo(caminho)
+        self.arquivo = None
+        self.escritor_parquet = None
+        self.cabecalho_escrito = False
+        if self.formato == 'parquet':
+            self.pyarrow = importar_pyarrow()
+        else:
+            self.arquivo = sys.stdout if caminho == '-' else open(caminho, 'w', newline='', encoding='utf-8')
+
+    def escrever(self, resultados):
+        """
+        Acrescenta um bloco de resultados ao arquivo.
+        
+        :param resultados: DataFrame com as colunas de classificar_bloco.
+        """
+        if self.formato == 'csv':
+            resultados.to_csv(self.arquivo, header=not self.cabecalho_escrito, index=False)
+            self.cabecalho_escrito = True
+            return
+        tabela = self.pyarrow.Table.from_pandas(resultados, preserve_index=False)
+        if self.escritor_parquet is None:
+            self.escritor_parquet = self.pyarrow.parquet.ParquetWriter(self.caminho, tabela.schema)
+        self.escritor_parquet.write_table(tabela)
+
+    def fechar(self):
+        """Conclui a gravação."""
+        if self.escritor_parquet is not None:
+            self.escritor_parquet.close()
+        if self.arquivo is sys.stdout:
+            self.arquivo.flush()
+        elif self.arquivo is not None:
+            self.arquivo.close()
+
+def classificar_bloco(base, bloco, pesos, k=5, voto='maioria', coluna_id='ID', vizinhos=False):
+    """
+    Classifica um bloco de casos novos pelo voto entre os k casos mais similares da base.
+    
+    Os valores dos atributos estão na escala original; em bases normalizadas, são
+    normalizados aqui. Linhas com algum atributo ausente ou não numérico não são
+    classificadas (diagnóstico vazio).
+    
+    :param base: BaseDeCasos usada na classificação.
+    :param bloco: DataFrame com as colunas de base.atributos_relevantes.
+    :param pesos: Dicionário de pesos para cada atributo.
+    :param k: Número de vizinhos.
+    :param voto: 'maioria' ou 'ponderado' (ver votar_diagnostico).
+    :param coluna_id: Coluna do bloco copiada para o resultado, se existir.
+    :param vizinhos: Se True, inclui os IDs dos vizinhos (separados por ';').
+    :return: DataFrame com as colunas [coluna_id,] Diagnostico, Confianca (fração dos vizinhos
+             com o diagnóstico escolhido), Similaridade (do caso mais similar) [e Vizinhos].
+    """
+    ausentes = [attr for attr in base.atributos_relevantes if attr not in bloco.columns]
+    if ausentes:
+        raise ValueError(f"Atributos ausentes no arquivo de entrada: {', '.join(ausentes)}")
+    consultas = bloco[base.atributos_relevantes].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    validas = np.isfinite(consultas).all(axis=1)
+    if base.normalizador is not None:
+        consultas = base.normalizador.transformar_matriz(consultas)
+
+    n = len(bloco)
+    diagnosticos = np.full(n, '', dtype=object)
+    confiancas = np.full(n, np.nan)
+    similaridades = np.full(n, np.nan)
+    ids_vizinhos = np.full(n, '', dtype=object)
+    if validas.any():
+        resultado = base.recuperar_lote(consultas[validas], pesos, k=k, voto=voto)
+        diagnosticos[validas] = resultado.diagnosticos
+        confiancas[validas] = np.mean(resultado.diagnosticos_vizinhos == resultado.diagnosticos[:, None], axis=1)
+        similaridades[validas] = resultado.similaridades[:, 0]
+        if vizinhos:
+            ids_vizinhos[validas] = [';'.join(map(str, linha)) for linha in resultado.ids]
+
+    saida = {}
+    if coluna_id in bloco.columns:
+        saida[coluna_id] = bloco[coluna_id].to_numpy()
+    saida.update(Diagnostico=diagnosticos, Confianca=confiancas, Similaridade=similaridades)
+    if vizinhos:
+        saida['Vizinhos'] = ids_vizinhos
+    return pd.DataFrame(saida)
+
+def classificar_arquivo(base, entrada, saida, pesos, k=5, voto='maioria', linhas_por_bloco=LINHAS_POR_BLOCO,
+                        coluna_id='ID', vizinhos=False, progresso=sys.stderr):
+    """
+    Classifica um arquivo bloco a bloco, gravando cada bloco antes de ler o seguinte, de
+    modo que a memória usada não depende do tamanho do arquivo.
+    
+    :param entrada: Arquivo CSV ou Parquet de entrada ('-' para a entrada padrão).
+    :param saida: Arquivo CSV ou Parquet de saída ('-' para a saída padrão).
+    :param progresso: Fluxo onde o progresso é exibido (None para não exibir).
+    :return: Tupla (linhas classificadas, linhas sem classificação, tempo em segundos).
+    """
+    # Verificado antes de abrir a saída: sem casos na base não há vizinhos para votar
+    if not len(base.matriz):
+        raise ValueError("A base de casos está vazia.")
+    total, blocos = ler_em_blocos(entrada, linhas_por_bloco)
+    escritor = EscritorDeResultados(saida)
+    inicio = time.perf_counter()
+    linhas = invalidas = 0
+    try:
+        for bloco in blocos:
+            resultados = classificar_bloco(base, bloco, pesos, k, voto, coluna_id, vizinhos)
+            escritor.escrever(resultados)
+            linhas += len(resultados)
+            invalidas += int(np.sum(resultados['Diagnostico'] == ''))
+            if progresso is not None:
+                decorrido = time.perf_counter() - inicio
+                feito = f"{linhas}/{total} ({linhas / total:.0%})" if total else f"{linhas}"
+                progresso.write(f"\rLinhas: {feito}, {linhas / max(decorrido, 1e-9):,.0f} linhas/s")
+                progresso.flush()
+    finally:
+        escritor.fechar()
+    if progresso is not None:
+        progresso.write("\n")
+    return linhas - invalidas, invalidas, time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description="Classifica casos novos de um arquivo CSV ou Parquet pelo voto entre os casos mais similares.")
+    parser.add_argument('entrada', help="Arquivo .csv ou .parquet com as colunas dos atributos ('-' para CSV na entrada padrão).")
+    parser.add_argument('-o', '--saida', default='-', help="Arquivo .csv ou .parquet de saída (padrão: CSV na saída padrão).")
+    parser.add_argument('--base', default=None, help="Diretório de uma base salva por BaseDeCasos.salvar (padrão: dados da UCI).")
+    parser.add_argument('--dados', default=None, help="Arquivo local (.csv, .parquet, .xlsx) com a base de casos, em vez do cache/UCI.")
+    parser.add_argument('--pesos', default=None, help="Arquivo JSON de pesos (src.aprendizado_pesos); define também a normalização e a métrica.")
+    parser.add_argument('-k', type=int, default=5, help="Número de vizinhos no voto.")
+    parser.add_argument('--voto', choices=['maioria', 'ponderado'], default='maioria')
+    parser.add_argument('--normalizar', action='store_true', help="Usa a base normalizada (Min-Max); a entrada continua na escala original.")
+    parser.add_argument('--metrica', default=None, help="Métrica de similaridade (padrão: euclidiana).")
+    parser.add_argument('--indice', default=None, help="Índice espacial (ex.: kdtree ou fragmentado).")
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO)
+    parser.add_argument('--coluna-id', default='ID', help="Coluna da entrada copiada para a saída.")
+    parser.add_argument('--vizinhos', action='store_true', help="Inclui os IDs dos k vizinhos na saída.")
+    parser.add_argument('--silencioso', action='store_true', help="Não exibe o progresso.")
+    args = parser.parse_args()
+    if args.k < 1:
+        parser.error("-k deve ser pelo menos 1.")
+
+    pesos, normalizar, metrica = None, args.normalizar, args.metrica
+    if args.pesos:
+        conteudo = carregar_pesos(args.pesos)
+        pesos = conteudo['pesos']
+        normalizar = normalizar or bool(conteudo['normalizar'])
+        metrica = metrica or conteudo['metrica']
+    metrica = metrica or 'euclidiana'
+
+    if args.base:
+        base = BaseDeCasos.carregar(args.base, indice=args.indice, metrica=metrica)
+    else:
+        data = load_data(args.dados)
+        atributos = [coluna for coluna in data.columns if coluna not in ('ID', 'Diagnosis')]
+        base = BaseDeCasos(data, atributos, indice=args.indice, metrica=metrica)
+    base = base.com_normalizacao(normalizar)
+    if pesos is None:
+        pesos = {attr: 1.0 for attr in base.atributos_relevantes}
+    if not len(base.matriz):
+        parser.error("a base de casos está vazia; não há casos para comparar com a entrada.")
+
+    classificadas, invalidas, tempo = classificar_arquivo(
+        base, args.entrada, args.saida, pesos, args.k, args.voto, args.linhas_por_bloco,
+        args.coluna_id, args.vizinhos, None if args.silencioso else sys.stderr,
+    )
+    if not args.silencioso:
+        mensagem = f"{classificadas} linhas classificadas em {tempo:.2f} s"
+        if invalidas:
+            mensagem += f"; {invalidas} linhas com atributos ausentes ou inválidos ficaram sem diagnóstico"
+        print(mensagem, file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,111 @@
 # gui/interface.py
 
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import numpy as np
+from src.aprendizado_pesos import carregar_pesos
 from src.cbr import BaseDeCasos, Caso
-from src.utils import load_data, normalize_data, zscore_normalize  # Importando as funções de normalização
+from src.instrumentacao import ativa, ativar, desativar, medir, registrar, relatorio, zerar
+from src.metricas import METRICAS
+from src.utils import load_data
+from gui.lista_virtual import ListaVirtual
+
+# Intervalo (ms) entre as verificações da fila de resultados da busca em segundo plano
+INTERVALO_VERIFICACAO = 50
+
+class TarefaDeBusca:
+    """
+    Executa a recuperação de casos em uma thread separada, para que a janela continue respondendo.
+    
+    A thread nunca acessa widgets do Tkinter: ela coloca mensagens em uma fila, que a thread
+    principal consome periodicamente (root.after). O resultado chega como arrays por coluna,
+    prontos para a ListaVirtual.
+    """
+    def __init__(self, base_de_casos, caso_entrada, pesos, k=None, metrica=None):
+        """
+        :param base_de_casos: BaseDeCasos usada na busca (a referência é fixada no início).
+        :param caso_entrada: Caso de entrada (já normalizado, se for o caso).
+        :param pesos: Dicionário de pesos por atributo.
+        :param k: Número de casos mais similares a recuperar (None para todos).
+        :param metrica: Nome da métrica a usar (None para manter a da base).
+        """
+        self.base_de_casos = base_de_casos
+        self.caso_entrada = caso_entrada
+        self.pesos = pesos
+        self.k = k
+        self.metrica = metrica
+        self.fila = queue.Queue()
+        self.cancelada = threading.Event()
+        self.thread = threading.Thread(target=self.executar, daemon=True)
+        self.inicio = None  # Instante do início (time.perf_counter), para medir o tempo até a exibição
+
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        self.thread.start()
+
+    def cancelar(self):
+        """Pede a interrupção da busca; o resultado, se chegar, é descartado."""
+        self.cancelada.set()
+
+    def executar(self):
+        """
+        Corpo da thread. Mensagens colocadas na fila: ('total', n), ('explicacao', ResultadoBusca)
+        e por fim ('fim', colunas) ou ('erro', exceção).
+        """
+        base = self.base_de_casos
+        try:
+            # A métrica é trocada aqui, sob a trava da base, e não na thread principal: uma busca
+            # cancelada que ainda esteja em andamento termina antes, com a métrica com que começou
+            with base.trava:
+                if self.cancelada.is_set():
+                    return
+                if self.metrica is not None and base.nome_metrica != self.metrica:
+                    base.definir_metrica(self.metrica)
+                with medir('recuperacao'):
+                    resultado = base.recuperar(self.caso_entrada, self.pesos, k=self.k, explicar=LIMITE_EXPLICACAO)
+            if self.cancelada.is_set():
+                return
+            self.fila.put(('total', len(resultado)))
+            self.fila.put(('explicacao', resultado))
+            # Colunas da lista de resultados, direto dos arrays da recuperação (sem recalcular distâncias)
+            self.fila.put(('fim', {
+                'posicao': np.arange(1, len(resultado) + 1),
+                'id': resultado.ids,
+                'diagnosis': resultado.diagnosticos,
+                'similaridade': resultado.similaridades,
+                'score': resultado.similaridades,
+                'distancia': resultado.distancias,
+            }))
+        except Exception as erro:
+            self.fila.put(('erro', erro))
+
+def formatar_numero(casas, fator=1.0):
+    """
+    Retorna uma função que formata um número com as casas decimais indicadas (NaN vira texto vazio).
+    
+    :param casas: Número de casas decimais.
+    :param fator: Fator aplicado ao valor antes da formatação (ex.: 100 para porcentagem).
+    """
+    return lambda valor: '' if np.isnan(valor) else f"{valor * fator:.{casas}f}"
+
+# Colunas da lista de resultados: (chave, título, largura, formatar)
+COLUNAS_RESULTADO = [
+    ('posicao', '#', 70, str),
+    ('id', 'ID', 90, str),
+    ('diagnosis', 'Diagnosis', 90, str),
+    ('similaridade', 'Similaridade (%)', 140, formatar_numero(2, 100)),
+    ('score', 'Similarity Score', 140, formatar_numero(4)),
+    ('distancia', 'Distance Metrics', 140, formatar_numero(4)),
+]
+
+# Número de casos mais similares cuja contribuição por atributo é calculada em cada busca
+LIMITE_EXPLICACAO = 1000
+
+# Opções do controle "Mostrar" (quantidade de casos mais similares exibidos)
+OPCOES_TOP_N = ['10', '50', '100', '1000', 'Todos']
 
 class CBRApp:
     def __init__(self, root):
@@ -24,11 +126,14 @@ class CBRApp:
             'Compactness_worst', 'Concavity_worst', 'Concave_points_worst',
             'Symmetry_worst', 'Fractal_dimension_worst',
         ]
-        self.base_de_casos = BaseDeCasos(self.data.copy(), atributos_relevantes, normalizar=False)  # Passar uma cópia
+        self.base_de_casos = BaseDeCasos(self.data, atributos_relevantes, normalizar=False)  # A base não altera o DataFrame
 
         # Definir pesos iniciais
         self.pesos = {attr:1 for attr in atributos_relevantes}
 
+        # Busca em andamento (TarefaDeBusca) ou None
+        self.tarefa = None
+
         # Calcular valores medianos e médias para pré-preencher as entradas
         self.calcular_valores_referencia()
 
@@ -150,6 +255,10 @@ class CBRApp:
         atribuir_mediana_b_btn = ttk.Button(atribuir_frame, text="Atribuir Mediana B", command=self.atribuir_mediana_b)
         atribuir_mediana_b_btn.pack(fill='x', pady=2)
 
+        # Pesos aprendidos (python -m src.aprendizado_pesos)
+        carregar_pesos_btn = ttk.Button(atribuir_frame, text="Carregar Pesos...", command=self.carregar_pesos)
+        carregar_pesos_btn.pack(fill='x', pady=(12, 2))
+
         # Frame para opções adicionais
         opcoes_frame = ttk.Frame(entrada_frame)
         opcoes_frame.grid(row=1, column=0, columnspan=6, pady=10)
@@ -161,12 +270,36 @@ class CBRApp:
         normalizar_cb = ttk.Checkbutton(opcoes_frame, text="Normalizar Dados", variable=self.normalizar_var, command=self.atualizar_normalizacao)
         normalizar_cb.pack(side='left', padx=5)
 
+        # Quantidade de casos mais similares a exibir
+        ttk.Label(opcoes_frame, text="Mostrar:").pack(side='left', padx=(15, 2))
+        self.top_n_var = tk.StringVar(value='Todos')
+        top_n_cb = ttk.Combobox(opcoes_frame, textvariable=self.top_n_var, values=OPCOES_TOP_N, width=8)
+        top_n_cb.pack(side='left', padx=2)
+        ttk.Label(opcoes_frame, text="casos mais similares").pack(side='left', padx=2)
+
+        # Métrica de similaridade (src.metricas), escolhida pelo título
+        ttk.Label(opcoes_frame, text="Métrica:").pack(side='left', padx=(15, 2))
+        self.metricas_por_titulo = {classe.titulo: nome for nome, classe in METRICAS.items()}
+        self.metrica_var = tk.StringVar(value=METRICAS['euclidiana'].titulo)
+        metrica_cb = ttk.Combobox(opcoes_frame, textvariable=self.metrica_var, values=list(self.metricas_por_titulo),
+                                  state='readonly', width=22)
+        metrica_cb.pack(side='left', padx=2)
+
+        # Medição das etapas da busca (src.instrumentacao), exibida pelo botão "Desempenho"
+        self.instrumentacao_var = tk.BooleanVar(value=ativa())
+        instrumentacao_cb = ttk.Checkbutton(opcoes_frame, text="Medir Desempenho", variable=self.instrumentacao_var,
+                                            command=self.alternar_instrumentacao)
+        instrumentacao_cb.pack(side='left', padx=(15, 5))
+
         # Botões de Busca, Limpar e Sobre
         botoes_frame = ttk.Frame(frame)
         botoes_frame.pack(side='top', fill='x', padx=10, pady=5)
 
-        buscar_btn = ttk.Button(botoes_frame, text="Buscar Casos Similares", command=self.buscar)
-        buscar_btn.pack(side='left', padx=5)
+        self.buscar_btn = ttk.Button(botoes_frame, text="Buscar Casos Similares", command=self.buscar)
+        self.buscar_btn.pack(side='left', padx=5)
+
+        self.cancelar_btn = ttk.Button(botoes_frame, text="Cancelar Busca", command=self.cancelar_busca, state='disabled')
+        self.cancelar_btn.pack(side='left', padx=5)
 
         limpar_btn = ttk.Button(botoes_frame, text="Limpar Resultados", command=self.limpar)
         limpar_btn.pack(side='left', padx=5)
@@ -174,27 +307,36 @@ class CBRApp:
         sobre_btn = ttk.Button(botoes_frame, text="Sobre", command=self.sobre)
         sobre_btn.pack(side='left', padx=5)
 
-        # Frame para resultados com scrollbar
-        resultados_frame = ttk.Frame(frame)
-        resultados_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        desempenho_btn = ttk.Button(botoes_frame, text="Desempenho", command=self.desempenho)
+        desempenho_btn.pack(side='left', padx=5)
 
-        # Canvas para permitir rolagem
-        canvas = tk.Canvas(resultados_frame)
-        canvas.pack(side='left', fill='both', expand=True)
+        # Progresso da busca em segundo plano
+        self.status_var = tk.StringVar(value="")
+        status_label = ttk.Label(botoes_frame, textvariable=self.status_var)
+        status_label.pack(side='right', padx=5)
 
-        scrollbar = ttk.Scrollbar(resultados_frame, orient='vertical', command=canvas.yview)
-        scrollbar.pack(side='right', fill='y')
+        self.progresso = ttk.Progressbar(botoes_frame, length=200, mode='determinate')
+        self.progresso.pack(side='right', padx=5)
+
+        # Caso de entrada usado na última busca
+        self.entrada_text = tk.Text(frame, height=4, wrap='word', font=("Courier", 10))
+        self.entrada_text.pack(side='top', fill='x', padx=10, pady=(10, 0))
+        self.entrada_text.config(state='disabled')
 
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        resultados_frame = ttk.Frame(frame)
+        resultados_frame.pack(fill='both', expand=True, padx=10, pady=10)
 
-        # Frame dentro do canvas
-        self.result_frame = ttk.Frame(canvas)
-        canvas.create_window((0, 0), window=self.result_frame, anchor='nw')
+        # Lista de resultados virtualizada: só as linhas visíveis existem no Treeview
+        self.lista_resultados = ListaVirtual(resultados_frame, COLUNAS_RESULTADO, ao_selecionar=self.explicar_caso)
+        self.lista_resultados.frame.pack(side='left', fill='both', expand=True)
 
-        # Área de texto para resultados
-        self.result_text = tk.Text(self.result_frame, width=180, height=35, font=("Courier", 10))
-        self.result_text.pack(side='top', fill='both', expand=True)
+        # Contribuição de cada atributo para a distância do caso selecionado
+        explicacao_frame = ttk.LabelFrame(resultados_frame, text="Por que este caso é similar?", padding="5")
+        explicacao_frame.pack(side='right', fill='y', padx=(10, 0))
+        self.explicacao_text = tk.Text(explicacao_frame, width=48, wrap='none', font=("Courier", 10))
+        self.explicacao_text.pack(fill='both', expand=True)
+        self.explicacao_text.config(state='disabled')
+        self.resultado = None
 
     # Funções para Atribuição dos Valores Padrão
     def atribuir_media_m(self):
@@ -225,24 +367,41 @@ class CBRApp:
             entry.delete(0, tk.END)
             entry.insert(0, f"{valor:.2f}")
 
+    def carregar_pesos(self):
+        """
+        Preenche os pesos com os de um arquivo JSON gerado por src.aprendizado_pesos.
+        
+        A normalização e a métrica para as quais os pesos foram ajustados também são selecionadas.
+        """
+        caminho = filedialog.askopenfilename(title="Carregar Pesos", filetypes=[("JSON", "*.json"), ("Todos os arquivos", "*")])
+        if not caminho:
+            return
+        try:
+            conteudo = carregar_pesos(caminho)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro ao Carregar Pesos", str(e))
+            return
+        ausentes = [attr for attr in self.weight_vars if attr not in conteudo['pesos']]
+        if ausentes:
+            messagebox.showerror("Erro ao Carregar Pesos", f"Pesos ausentes no arquivo: {', '.join(ausentes)}")
+            return
+
+        for attr, var in self.weight_vars.items():
+            var.set(conteudo['pesos'][attr])
+        if conteudo['metrica'] in METRICAS:
+            self.metrica_var.set(METRICAS[conteudo['metrica']].titulo)
+        # As entradas estão na escala da visão atual: trocar a normalização também as redefine
+        if bool(conteudo['normalizar']) != self.normalizar_var.get():
+            self.normalizar_var.set(bool(conteudo['normalizar']))
+            self.atualizar_normalizacao()
+
     def atualizar_normalizacao(self):
         """
         Atualiza a base de casos aplicando ou removendo a normalização conforme a checkbox.
         """
-        # Recarregar a base de casos com ou sem normalização
-        atributos_relevantes = [
-            'Radius_mean', 'Texture_mean', 'Perimeter_mean',
-            'Area_mean', 'Smoothness_mean', 'Compactness_mean', 'Concavity_mean',
-            'Concave_points_mean', 'Symmetry_mean', 'Fractal_dimension_mean',
-            'Radius_se', 'Texture_se', 'Perimeter_se', 'Area_se', 'Smoothness_se',
-            'Compactness_se', 'Concavity_se', 'Concave_points_se', 'Symmetry_se',
-            'Fractal_dimension_se', 'Radius_worst', 'Texture_worst',
-            'Perimeter_worst', 'Area_worst', 'Smoothness_worst',
-            'Compactness_worst', 'Concavity_worst', 'Concave_points_worst',
-            'Symmetry_worst', 'Fractal_dimension_worst',
-        ]
+        # Alternar entre as visões normalizada e original da mesma base (cada uma é construída uma única vez)
         normalizar = self.normalizar_var.get()
-        self.base_de_casos = BaseDeCasos(self.data.copy(), atributos_relevantes, normalizar=normalizar)  # Passar uma cópia
+        self.base_de_casos = self.base_de_casos.com_normalizacao(normalizar)
 
         # Recalcular as medianas e médias com base nos dados normalizados ou não
         self.calcular_valores_referencia()
@@ -263,8 +422,8 @@ class CBRApp:
 
         # Verificar se a normalização está ativada
         if self.normalizar_var.get():
-            # Normalizar os dados de entrada usando Min-Max Scaling
-            atributos_normalizados = normalize_data(self.data, atributos_entrada)
+            # Normalizar os dados de entrada usando Min-Max Scaling com as estatísticas já ajustadas pela base
+            atributos_normalizados = self.base_de_casos.normalizador.transformar(atributos_entrada)
             
             caso_entrada = Caso("Entrada", "?", atributos_normalizados)
         else:
@@ -276,43 +435,123 @@ class CBRApp:
         for attr, var in self.weight_vars.items():
             pesos[attr] = var.get()
 
-        # Recuperar casos similares
-        similaridades = self.base_de_casos.recuperar_casos_similares(caso_entrada, pesos)
-
-        # Exibir resultados
-        self.result_text.delete(1.0, tk.END)
-        self.result_text.insert(tk.END, "Caso de Entrada (Valores Normalizados):\n" if self.normalizar_var.get() else "Caso de Entrada:\n")
-        for attr, val in (atributos_normalizados.items() if self.normalizar_var.get() else atributos_entrada.items()):
-            self.result_text.insert(tk.END, f"  {attr}: {val:.2f}\n")
-        self.result_text.insert(tk.END, "\nCasos da Base Ordenados por Similaridade:\n\n")
-
-        # Cabeçalho dos resultados
-        cabecalho = f"{'ID':<5} {'Diagnosis':<10} {'Similaridade (%)':<20} {'Similarity Score':<20} {'Distance Metrics':<25}\n"
-        self.result_text.insert(tk.END, cabecalho)
-        self.result_text.insert(tk.END, "-"*80 + "\n")
-
-        # Iterar sobre todos os casos similares
-        for i, (caso, sim) in enumerate(similaridades, 1):
-            if i <= 10:
-                # Similarity Score é o valor de similaridade
-                similarity_score = sim  # Similaridade já está calculada
-
-                # Calcular métricas de distância
-                distance_metrics = self.base_de_casos.calcular_distancia(caso_entrada, caso, pesos)
-
-                # Formatação com largura fixa
-                linha = f"{caso.id:<5} {caso.diagnosis:<10} {sim*100:<20.2f} {similarity_score:<20.4f} {distance_metrics:<25.4f}\n"
-                self.result_text.insert(tk.END, linha)
-            else:
-                # Exibir apenas ID, Diagnosis e Similaridade (%)
-                linha = f"{caso.id:<5} {caso.diagnosis:<10} {sim*100:<20.2f}\n"
-                self.result_text.insert(tk.END, linha)
+        # Quantidade de casos a recuperar
+        top_n = self.top_n_var.get().strip()
+        if top_n == 'Todos':
+            k = None
+        elif top_n.isdigit() and int(top_n) > 0:
+            k = int(top_n)
+        else:
+            messagebox.showerror("Erro de Entrada", "Informe um número inteiro positivo de casos ou 'Todos'.")
+            return
 
-        self.result_text.insert(tk.END, "\n")
+        # Exibir o caso de entrada
+        valores_exibidos = atributos_normalizados if self.normalizar_var.get() else atributos_entrada
+        titulo = "Caso de Entrada (Valores Normalizados): " if self.normalizar_var.get() else "Caso de Entrada: "
+        self.entrada_text.config(state='normal')
+        self.entrada_text.delete(1.0, tk.END)
+        self.entrada_text.insert(tk.END, titulo + " | ".join(f"{attr}: {val:.2f}" for attr, val in valores_exibidos.items()))
+        self.entrada_text.config(state='disabled')
+        self.lista_resultados.limpar()
+
+        # Recuperar casos similares em segundo plano; os resultados chegam por acompanhar_busca
+        metrica = self.metricas_por_titulo[self.metrica_var.get()]
+        self.tarefa = TarefaDeBusca(self.base_de_casos, caso_entrada, pesos, k=k, metrica=metrica)
+        self.total = 0
+        self.buscar_btn.config(state='disabled')
+        self.cancelar_btn.config(state='normal')
+        self.progresso.config(mode='indeterminate')
+        self.progresso.start()
+        self.status_var.set("Buscando casos similares...")
+        self.tarefa.iniciar()
+        self.root.after(INTERVALO_VERIFICACAO, self.acompanhar_busca, self.tarefa)
+
+    def acompanhar_busca(self, tarefa):
+        """
+        Consome as mensagens da busca em segundo plano (executado na thread principal via root.after).
+        
+        :param tarefa: TarefaDeBusca acompanhada; mensagens de buscas já substituídas ou canceladas são descartadas.
+        """
+        if tarefa is not self.tarefa or tarefa.cancelada.is_set():
+            return
+        try:
+            while True:
+                tipo, conteudo = tarefa.fila.get_nowait()
+                if tipo == 'total':
+                    self.total = conteudo
+                    self.status_var.set(f"Exibindo {conteudo} casos...")
+                elif tipo == 'explicacao':
+                    self.resultado = conteudo
+                elif tipo == 'fim':
+                    with medir('renderizacao'):
+                        self.lista_resultados.definir_dados(conteudo)
+                    # Do clique em "Buscar" à lista preenchida, incluindo a espera na fila
+                    registrar('busca_total', time.perf_counter() - tarefa.inicio)
+                    self.finalizar_busca(f"{self.total} casos encontrados.")
+                    return
+                else:
+                    self.finalizar_busca("Erro na busca.")
+                    messagebox.showerror("Erro na Busca", str(conteudo))
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(INTERVALO_VERIFICACAO, self.acompanhar_busca, tarefa)
+
+    def explicar_caso(self, i):
+        """
+        Exibe a contribuição de cada atributo para a distância do i-ésimo caso mais similar.
+        
+        :param i: Posição do caso no resultado da última busca (0 para o mais similar).
+        """
+        if self.resultado is None:
+            return
+        metrica = self.base_de_casos.metrica
+        if self.resultado.contribuicoes is None:
+            linhas = [f"A métrica {metrica.titulo} não se decompõe em contribuições por atributo.\n"]
+        elif i < len(self.resultado.contribuicoes):
+            linhas = [
+                f"Caso {self.resultado.ids[i]} ({self.resultado.diagnosticos[i]}), distância {self.resultado.distancias[i]:.4f}\n",
+                f"Contribuição de cada atributo:\n{metrica.contribuicao}\n\n",
+                f"{'Atributo':<26} {'Contrib.':>10} {'%':>7}\n",
+            ]
+            for attr, contribuicao, fracao in self.resultado.explicacao(i):
+                linhas.append(f"{attr:<26} {contribuicao:>10.4f} {fracao*100:>7.2f}\n")
+        else:
+            linhas = [f"Explicação disponível apenas para os {LIMITE_EXPLICACAO} casos mais similares.\n"]
+        self.explicacao_text.config(state='normal')
+        self.explicacao_text.delete(1.0, tk.END)
+        self.explicacao_text.insert(tk.END, ''.join(linhas))
+        self.explicacao_text.config(state='disabled')
+
+    def cancelar_busca(self):
+        """Interrompe a busca em andamento."""
+        if self.tarefa is not None:
+            self.tarefa.cancelar()
+            self.finalizar_busca("Busca cancelada.")
+
+    def finalizar_busca(self, mensagem):
+        """
+        Restaura os botões e o indicador de progresso ao fim de uma busca.
+        
+        :param mensagem: Texto exibido na barra de status.
+        """
+        self.tarefa = None
+        self.progresso.stop()
+        self.progresso.config(mode='determinate', value=0)
+        self.buscar_btn.config(state='normal')
+        self.cancelar_btn.config(state='disabled')
+        self.status_var.set(mensagem)
 
     def limpar(self):
-        # Limpar resultados
-        self.result_text.delete(1.0, tk.END)
+        # Interromper uma busca em andamento e limpar resultados
+        self.cancelar_busca()
+        self.status_var.set("")
+        self.lista_resultados.limpar()
+        self.resultado = None
+        for texto in (self.entrada_text, self.explicacao_text):
+            texto.config(state='normal')
+            texto.delete(1.0, tk.END)
+            texto.config(state='disabled')
         # Resetar entradas para valores medianos ou médios apropriados
         for attr, entry in self.entries.items():
             if self.normalizar_var.get():
@@ -326,12 +565,48 @@ class CBRApp:
                 entry.insert(0, f"{self.valores_medianos_m.get(attr, 0):.2f}")
         messagebox.showinfo("Limpar", "Resultados e entradas foram limpos.")
 
+    def alternar_instrumentacao(self):
+        """Liga ou desliga a medição das etapas da busca conforme a caixa "Medir Desempenho"."""
+        if self.instrumentacao_var.get():
+            ativar()
+        else:
+            desativar()
+
+    def desempenho(self):
+        """Exibe a latência de cada etapa medida (carga, normalização, distâncias, ordenação, exibição)."""
+        desempenho_win = tk.Toplevel(self.root)
+        desempenho_win.title("Desempenho")
+        desempenho_win.geometry("860x420")
+
+        text_widget = tk.Text(desempenho_win, wrap='none', padx=10, pady=10, font=("Courier", 10))
+
+        def atualizar():
+            text_widget.config(state='normal')
+            text_widget.delete(1.0, tk.END)
+            text_widget.insert(tk.END, relatorio())
+            text_widget.config(state='disabled')
+
+        def zerar_medidas():
+            zerar()
+            atualizar()
+
+        botoes = ttk.Frame(desempenho_win)
+        botoes.pack(side='bottom', fill='x', padx=10, pady=5)
+        ttk.Button(botoes, text="Atualizar", command=atualizar).pack(side='left', padx=5)
+        ttk.Button(botoes, text="Zerar Medidas", command=zerar_medidas).pack(side='left', padx=5)
+        text_widget.pack(side='top', expand=True, fill='both')
+        atualizar()
+
     def sobre(self):
         # Criar uma nova janela
         sobre_win = tk.Toplevel(self.root)
         sobre_win.title("Sobre o Sistema RBC")
         sobre_win.geometry("700x600")
 
+        # Métrica selecionada na interface
+        metrica = METRICAS[self.metricas_por_titulo[self.metrica_var.get()]]
+        outras = [classe.titulo for classe in METRICAS.values() if classe is not metrica]
+
         # Texto informativo com formatação
         texto = (
             "Sistema RBC - Diagnóstico de Câncer de Mama\n\n"
@@ -340,12 +615,13 @@ class CBRApp:
             "**Créditos:**\n"
             "Base de dados fornecida pela [UCI Machine Learning Repository](https://archive.ics.uci.edu/ml/datasets/Breast+Cancer+Wisconsin+(Diagnostic)).\n\n"
             "**Cálculo da Similaridade:**\n"
-            "A similaridade entre casos é calculada utilizando a seguinte fórmula:\n\n"
-            "**Similaridade = Σ (peso_i * |entrada_i - caso_i|) / Σ peso_i**\n\n"
+            f"A similaridade entre casos é calculada com a métrica selecionada ({metrica.titulo}):\n\n"
+            f"{metrica.formula}\n\n"
             "Onde:\n"
             "- **peso_i**: Peso atribuído ao atributo i.\n"
             "- **entrada_i**: Valor do atributo i no caso de entrada.\n"
             "- **caso_i**: Valor do atributo i no caso da base.\n\n"
+            f"Outras métricas disponíveis no campo \"Métrica\": {', '.join(outras)}.\n\n"
             "**Influência dos Pesos:**\n"
             "Os pesos determinam a importância relativa de cada atributo no cálculo da similaridade. Aumentar o peso de um atributo faz com que diferenças nesse atributo tenham maior impacto na similaridade final.\n\n"
             "**Direitos da Base de Dados:**\n"
@@ -356,13 +632,11 @@ class CBRApp:
         text_widget = tk.Text(sobre_win, wrap='word', padx=10, pady=10)
         text_widget.insert(tk.END, texto)
         text_widget.tag_configure("bold", font=("TkDefaultFont", 10, "bold"))
-        # Aplicar negrito às seções específicas
-        text_widget.tag_add("bold", "1.0", "1.end")  # Título
-        text_widget.tag_add("bold", "3.0", "3.end")  # Metodologia
-        text_widget.tag_add("bold", "6.0", "6.end")  # Créditos
-        text_widget.tag_add("bold", "9.0", "9.end")  # Cálculo da Similaridade
-        text_widget.tag_add("bold", "14.0", "14.end")  # Influência dos Pesos
-        text_widget.tag_add("bold", "19.0", "19.end")  # Direitos da Base de Dados
+        # Aplicar negrito ao título e aos títulos das seções (linhas "**...:**")
+        text_widget.tag_add("bold", "1.0", "1.end")
+        for numero, linha in enumerate(texto.split("\n"), 1):
+            if linha.startswith("**") and linha.endswith(":**"):
+                text_widget.tag_add("bold", f"{numero}.0", f"{numero}.end")
         text_widget.config(state='disabled')  # Tornar somente leitura
         text_widget.pack(expand=True, fill='both')
 
@@ -0,0 +1,156 @@
+# gui/lista_virtual.py
+
+import math
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+
+class ListaVirtual:
+    """
+    Lista de resultados virtualizada sobre um ttk.Treeview.
+    
+    O Treeview contém apenas as linhas visíveis na janela; ao rolar, essas linhas são
+    preenchidas novamente a partir dos arrays de resultado. Assim o custo de exibição não
+    depende do número de casos (centenas de milhares de linhas custam o mesmo que dez).
+    As colunas são ordenadas clicando no cabeçalho (um segundo clique inverte a ordem).
+    """
+    def __init__(self, master, colunas, altura_linha=20, ao_selecionar=None):
+        """
+        :param master: Widget pai.
+        :param colunas: Lista de tuplas (chave, título, largura, formatar), em que formatar
+                        converte um valor da coluna em texto.
+        :param altura_linha: Altura de cada linha em pixels.
+        :param ao_selecionar: Função chamada com o índice da linha nos arrays de dados
+                              quando o usuário seleciona uma linha (ou None).
+        """
+        self.colunas = colunas
+        self.altura_linha = altura_linha
+        self.ao_selecionar = ao_selecionar
+        self.dados = {}
+        self.total = 0
+        self.ordem = np.empty(0, dtype=np.intp)  # Permutação das linhas conforme a ordenação atual
+        self.inicio = 0  # Primeira linha exibida
+        self.visiveis = 1
+        self.ordenacao = None  # Tupla (chave, decrescente) ou None
+
+        self.frame = ttk.Frame(master)
+        estilo = ttk.Style(master)
+        estilo.configure('Resultados.Treeview', rowheight=altura_linha)
+        self.tree = ttk.Treeview(
+            self.frame, columns=[chave for chave, *_ in colunas], show='headings',
+            style='Resultados.Treeview', selectmode='browse',
+        )
+        for chave, titulo, largura, _ in colunas:
+            self.tree.heading(chave, text=titulo, command=lambda chave=chave: self.ordenar(chave))
+            self.tree.column(chave, width=largura, anchor=tk.W, stretch=False)
+        self.tree.pack(side='left', fill='both', expand=True)
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient='vertical', command=self.rolar)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.tree.bind('<Configure>', self.redimensionar)
+        self.tree.bind('<<TreeviewSelect>>', self.selecionar)
+        # A rolagem do próprio Treeview é substituída pela rolagem sobre os arrays
+        self.tree.bind('<MouseWheel>', lambda e: self.rolar('scroll', -int(math.copysign(3, e.delta)), 'units'))
+        self.tree.bind('<Button-4>', lambda e: self.rolar('scroll', -3, 'units'))
+        self.tree.bind('<Button-5>', lambda e: self.rolar('scroll', 3, 'units'))
+        self.tree.bind('<Prior>', lambda e: self.rolar('scroll', -1, 'pages'))
+        self.tree.bind('<Next>', lambda e: self.rolar('scroll', 1, 'pages'))
+
+    def definir_dados(self, dados):
+        """
+        Substitui o conteúdo da lista.
+        
+        :param dados: Dicionário chave da coluna -> array com um valor por linha (todos do mesmo tamanho).
+        """
+        self.dados = {chave: np.asarray(valores) for chave, valores in dados.items()}
+        self.total = len(next(iter(self.dados.values()))) if self.dados else 0
+        self.ordem = np.arange(self.total)
+        self.ordenacao = None
+        self.inicio = 0
+        self.atualizar_cabecalhos()
+        self.atualizar()
+
+    def limpar(self):
+        """Remove todas as linhas."""
+        self.definir_dados({})
+
+    def ordenar(self, chave):
+        """
+        Ordena as linhas pela coluna indicada (ordenação estável; valores ausentes ficam no fim).
+        
+        :param chave: Chave da coluna.
+        """
+        if self.total == 0:
+            return
+        decrescente = self.ordenacao == (chave, False)
+        valores = self.dados[chave]
+        if valores.dtype.kind == 'f':
+            # NaN fica no fim nos dois sentidos
+            self.ordem = np.argsort(-valores if decrescente else valores, kind='stable')
+        else:
+            self.ordem = np.argsort(valores, kind='stable')
+            if decrescente:
+                self.ordem = self.ordem[::-1]
+        self.ordenacao = (chave, decrescente)
+        self.inicio = 0
+        self.atualizar_cabecalhos()
+        self.atualizar()
+
+    def atualizar_cabecalhos(self):
+        """Indica no título da coluna ordenada o sentido da ordenação."""
+        for chave, titulo, *_ in self.colunas:
+            if self.ordenacao is not None and self.ordenacao[0] == chave:
+                titulo += ' ▼' if self.ordenacao[1] else ' ▲'
+            self.tree.heading(chave, text=titulo)
+
+    def rolar(self, acao, quantidade, unidade=None):
+        """
+        Trata os comandos da barra de rolagem ('moveto', fração) e ('scroll', n, 'units' | 'pages').
+        """
+        if acao == 'moveto':
+            inicio = int(float(quantidade) * self.total)
+        else:
+            passo = self.visiveis if unidade == 'pages' else 1
+            inicio = self.inicio + int(quantidade) * passo
+        self.inicio = max(0, min(inicio, self.total - self.visiveis))
+        self.atualizar()
+        return 'break'
+
+    def redimensionar(self, evento):
+        """Recalcula quantas linhas cabem no Treeview quando ele muda de tamanho."""
+        # Descontar o cabeçalho (aproximadamente uma linha)
+        visiveis = max(1, evento.height // self.altura_linha - 1)
+        if visiveis != self.visiveis:
+            self.visiveis = visiveis
+            self.inicio = max(0, min(self.inicio, self.total - self.visiveis))
+            self.atualizar()
+
+    def selecionar(self, evento):
+        """Repassa a ao_selecionar o índice, nos arrays de dados, da linha selecionada."""
+        selecao = self.tree.selection()
+        if self.ao_selecionar is None or not selecao:
+            return
+        self.ao_selecionar(int(self.ordem[self.inicio + self.tree.index(selecao[0])]))
+
+    def atualizar(self):
+        """Preenche o Treeview com as linhas da janela visível."""
+        linhas = self.ordem[self.inicio:self.inicio + self.visiveis]
+        itens = self.tree.get_children()
+        # Os itens são reaproveitados para outras linhas, então a seleção deixa de valer
+        if self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        # Reaproveitar os itens existentes e criar/remover apenas a diferença
+        if len(itens) > len(linhas):
+            self.tree.delete(*itens[len(linhas):])
+            itens = itens[:len(linhas)]
+        for j, linha in enumerate(linhas):
+            valores = [formatar(self.dados[chave][linha]) for chave, _, _, formatar in self.colunas]
+            if j < len(itens):
+                self.tree.item(itens[j], values=valores)
+            else:
+                self.tree.insert('', tk.END, values=valores)
+        if self.total:
+            self.scrollbar.set(self.inicio / self.total, min(1.0, (self.inicio + self.visiveis) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
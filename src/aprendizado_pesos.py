@@ -0,0 +1,235 @@
+# src/aprendizado_pesos.py
+
+import argparse
+import json
+import time
+import numpy as np
+from src.avaliacao import avaliar_loo
+from src.cbr import BaseDeCasos, votar_diagnostico
+from src.metricas import Metrica, criar_metrica
+from src.utils import NormalizadorMinMax, load_data
+
+# Limite de elementos (pares x atributos) dos termos pré-calculados (2**25 float64 = 256 MiB)
+MAX_ELEMENTOS_TERMOS = 1 << 25
+
+# Fatores aplicados ao peso atual de cada atributo na busca por coordenadas
+FATORES_PADRAO = (0.0, 0.25, 0.5, 2.0, 4.0)
+
+class TermosPareados:
+    """
+    Termos por atributo de todos os pares de casos da base, calculados uma única vez.
+    
+    Em métricas aditivas a distância entre dois casos é uma função crescente de
+    Σ peso_i · termo_i; guardando os termos de todos os pares, a soma ponderada de
+    qualquer vetor de pesos é um único produto, e mudar o peso de um atributo custa
+    apenas somar uma matriz (casos x casos) às distâncias atuais.
+    
+    Como em avaliar_loo, métricas com estatísticas ajustadas à base (as amplitudes da
+    local-global) e a normalização Min-Max são ajustadas, para os termos de cada caso, só
+    com os demais casos.
+    """
+    def __init__(self, base):
+        """
+        :param base: BaseDeCasos com métrica aditiva (usa sua matriz original e, se normalizada, normaliza por caso).
+        """
+        metrica = criar_metrica(base.nome_metrica, atributos=base.atributos_relevantes, **(base.opcoes_metrica or {}))
+        if not metrica.aditiva:
+            raise ValueError(f"O aprendizado de pesos requer uma métrica aditiva; '{base.nome_metrica}' não é.")
+        original = base.matriz_original
+        n, d = original.shape
+        if n * n * d > MAX_ELEMENTOS_TERMOS:
+            raise ValueError(f"Base grande demais para pré-calcular os termos de todos os pares ({n} casos x {d} atributos).")
+        self.atributos = list(base.atributos_relevantes)
+        self.diagnosticos = np.asarray(base.diagnosticos, dtype=object)
+        self.metrica = metrica  # Combina os termos em distâncias e similaridades (ver avaliar_somas)
+        normalizador = None
+        matriz = original
+        if base.normalizador is not None:
+            normalizador = NormalizadorMinMax.a_partir_de_estatisticas(
+                self.atributos, np.nanmin(original, axis=0), np.nanmax(original, axis=0))
+            matriz = normalizador.transformar_matriz(original)
+        por_caso = type(metrica).ajustar is not Metrica.ajustar
+        if not por_caso:
+            metrica.ajustar(matriz)
+        # Um atributo por bloco contíguo: termos[j] é a matriz (casos x casos) do atributo j
+        self.termos = np.empty((d, n, n))
+        for i in range(n):
+            matriz_caso = matriz
+            if normalizador is not None:
+                demais = np.delete(original, i, axis=0)
+                minimos, maximos = np.nanmin(demais, axis=0), np.nanmax(demais, axis=0)
+                # Só os casos que são o único extremo de algum atributo mudam a normalização
+                if not (np.array_equal(minimos, normalizador.minimos) and np.array_equal(maximos, normalizador.maximos)):
+                    matriz_caso = NormalizadorMinMax.a_partir_de_estatisticas(self.atributos, minimos, maximos).transformar_matriz(original)
+            if por_caso:
+                metrica.ajustar(np.delete(matriz_caso, i, axis=0))
+            self.termos[:, i, :] = metrica.termos(matriz_caso, matriz_caso[i]).T
+
+    def somar(self, vetor_pesos):
+        """
+        Soma ponderada dos termos de todos os pares.
+        
+        :param vetor_pesos: Vetor de pesos alinhado com os atributos.
+        :return: Matriz (casos x casos).
+        """
+        # Soma par a par (sem BLAS): pares de casos repetidos têm somas idênticas
+        return np.einsum('j,jik->ik', vetor_pesos, self.termos)
+
+def avaliar_somas(somas, termos, vetor_pesos, k):
+    """
+    Desempenho leave-one-out do voto por maioria a partir das somas ponderadas de todos os pares.
+    
+    Os vizinhos e o voto seguem as regras de avaliar_loo: empates na distância são resolvidos
+    pela posição na base (como em selecionar_mais_similares) e empates no voto, por
+    votar_diagnostico (soma das similaridades), de modo que os acertos são os que avaliar_loo
+    reporta para os mesmos pesos.
+    
+    :param somas: Matriz (casos x casos) de somas ponderadas (ver TermosPareados.somar).
+    :param termos: TermosPareados de onde vieram as somas.
+    :param vetor_pesos: Vetor de pesos que gerou as somas.
+    :param k: Número de vizinhos.
+    :return: Tupla (acertos, fração média dos vizinhos com o diagnóstico do próprio caso); a
+             segunda posição desempata candidatos com o mesmo número de acertos.
+    """
+    n = len(somas)
+    k = min(k, n - 1)
+    somas = somas.copy()
+    np.fill_diagonal(somas, np.inf)  # Cada caso é classificado pelos demais
+    # Os k menores de cada linha; entre os empatados com o k-ésimo, os de menor posição
+    corte = np.partition(somas, k - 1, axis=1)[:, k - 1:k]
+    selecionados = somas <= corte
+    # Só as linhas com mais empatados que vagas precisam descartar os de maior posição
+    for i in np.flatnonzero(np.sum(selecionados, axis=1) > k):
+        empatados = np.flatnonzero(somas[i] == corte[i])
+        selecionados[i, empatados[k - np.sum(somas[i] < corte[i]):]] = False
+    rotulos, codigos = np.unique(termos.diagnosticos, return_inverse=True)
+    votos = np.stack([np.sum(selecionados[:, codigos == c], axis=1) for c in range(len(rotulos))], axis=1)
+    previstos = np.argmax(votos, axis=1)
+    # Empate no número de votos: decidido por votar_diagnostico com as similaridades dos vizinhos
+    for i in np.flatnonzero(np.sum(votos == votos.max(axis=1, keepdims=True), axis=1) > 1):
+        vizinhos = np.flatnonzero(selecionados[i])
+        vizinhos = vizinhos[np.lexsort((vizinhos, somas[i, vizinhos]))]
+        distancias = termos.metrica.combinar(termos.termos[:, i, vizinhos].T, vetor_pesos)
+        diagnostico = votar_diagnostico(termos.diagnosticos[vizinhos], termos.metrica.similaridades(distancias))
+        previstos[i] = np.searchsorted(rotulos, diagnostico)
+    acertos = int(np.sum(previstos == codigos))
+    concordancia = float(np.mean(votos[np.arange(n), codigos])) / k
+    return acertos, concordancia
+
+class ResultadoAprendizado:
+    def __init__(self, pesos, acertos, n_casos, avaliacoes, rodadas, tempo):
+        self.pesos = pesos  # Dicionário atributo -> peso aprendido
+        self.acertos = acertos  # Acertos leave-one-out com os pesos aprendidos (ver avaliar_somas)
+        self.n_casos = n_casos
+        self.avaliacoes = avaliacoes  # Número de vetores de pesos avaliados
+        self.rodadas = rodadas  # Rodadas completas da busca por coordenadas
+        self.tempo = tempo  # Tempo total (s)
+
+    @property
+    def acuracia(self):
+        return self.acertos / self.n_casos if self.n_casos else 0.0
+
+def aprender_pesos(base, pesos_iniciais=None, k=5, fatores=FATORES_PADRAO, max_rodadas=10, termos=None):
+    """
+    Ajusta os pesos dos atributos por busca por coordenadas sobre a acurácia leave-one-out.
+    
+    A cada rodada, o peso de cada atributo é multiplicado por cada um dos fatores (um peso
+    zero é testado também com o valor 1) e a mudança é mantida quando melhora o desempenho
+    (ver avaliar_somas). A busca termina quando uma rodada inteira não melhora nada.
+    
+    :param base: BaseDeCasos com métrica aditiva.
+    :param pesos_iniciais: Dicionário de pesos iniciais (None para 1 em todos os atributos).
+    :param k: Número de vizinhos no voto.
+    :param fatores: Fatores testados para o peso de cada atributo.
+    :param max_rodadas: Número máximo de rodadas.
+    :param termos: TermosPareados já calculados para a base (None para calcular).
+    :return: Objeto ResultadoAprendizado.
+    """
+    inicio = time.perf_counter()
+    termos = termos or TermosPareados(base)
+    pesos_iniciais = pesos_iniciais or {}
+    vetor_pesos = np.array([float(pesos_iniciais.get(attr, 1.0)) for attr in termos.atributos])
+    somas = termos.somar(vetor_pesos)
+    melhor = avaliar_somas(somas, termos, vetor_pesos, k)
+    avaliacoes = 1
+
+    rodadas = 0
+    while rodadas < max_rodadas:
+        rodadas += 1
+        melhorou = False
+        for j in range(len(vetor_pesos)):
+            atual = vetor_pesos[j]
+            candidatos = {atual * fator for fator in fatores} if atual > 0 else {1.0}
+            candidatos.discard(atual)
+            escolhido = None
+            for valor in sorted(candidatos):
+                candidato = vetor_pesos.copy()
+                candidato[j] = valor
+                desempenho = avaliar_somas(somas + (valor - atual) * termos.termos[j], termos, candidato, k)
+                avaliacoes += 1
+                if desempenho > melhor:
+                    melhor, escolhido = desempenho, valor
+            if escolhido is not None:
+                somas += (escolhido - atual) * termos.termos[j]
+                vetor_pesos[j] = escolhido
+                melhorou = True
+        if not melhorou:
+            break
+
+    pesos = {attr: float(peso) for attr, peso in zip(termos.atributos, vetor_pesos)}
+    return ResultadoAprendizado(pesos, melhor[0], len(somas), avaliacoes, rodadas, time.perf_counter() - inicio)
+
+def salvar_pesos(caminho, pesos, normalizar, metrica, **informacoes):
+    """
+    Salva pesos em JSON, com a visão da base e a métrica para as quais foram ajustados.
+    
+    :param caminho: Caminho do arquivo.
+    :param pesos: Dicionário atributo -> peso.
+    :param normalizar: Se os pesos foram ajustados sobre a base normalizada.
+    :param metrica: Nome da métrica.
+    :param informacoes: Dados adicionais gravados no arquivo (ex.: acurácia).
+    """
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump({'pesos': pesos, 'normalizar': normalizar, 'metrica': metrica, **informacoes}, arquivo, indent=2)
+
+def carregar_pesos(caminho):
+    """
+    Lê um arquivo gravado por salvar_pesos.
+    
+    :param caminho: Caminho do arquivo.
+    :return: Dicionário com as chaves 'pesos', 'normalizar' e 'metrica' (e as informações adicionais).
+    """
+    with open(caminho, encoding='utf-8') as arquivo:
+        conteudo = json.load(arquivo)
+    if not isinstance(conteudo, dict) or not isinstance(conteudo.get('pesos'), dict):
+        raise ValueError(f"Arquivo de pesos inválido: {caminho}")
+    conteudo['pesos'] = {attr: float(peso) for attr, peso in conteudo['pesos'].items()}
+    conteudo.setdefault('normalizar', False)
+    conteudo.setdefault('metrica', 'euclidiana')
+    return conteudo
+
+def main():
+    parser = argparse.ArgumentParser(description="Aprende os pesos dos atributos pela acurácia leave-one-out.")
+    parser.add_argument('--saida', default='pesos.json', help="Arquivo JSON de saída (carregável na interface).")
+    parser.add_argument('-k', type=int, default=5, help="Número de vizinhos no voto.")
+    parser.add_argument('--normalizar', action='store_true', help="Ajusta os pesos sobre a base normalizada (Min-Max).")
+    parser.add_argument('--metrica', default='euclidiana', help="Métrica aditiva (euclidiana, manhattan ou local_global).")
+    parser.add_argument('--rodadas', type=int, default=10, help="Número máximo de rodadas da busca.")
+    args = parser.parse_args()
+
+    data = load_data()
+    atributos = [coluna for coluna in data.columns if coluna not in ('ID', 'Diagnosis')]
+    base = BaseDeCasos(data, atributos, normalizar=args.normalizar, metrica=args.metrica)
+    pesos_uniformes = {attr: 1.0 for attr in atributos}
+    antes = avaliar_loo(base, pesos_uniformes, args.k)
+    resultado = aprender_pesos(base, pesos_uniformes, args.k, max_rodadas=args.rodadas)
+    depois = avaliar_loo(base, resultado.pesos, args.k)
+    print(f"Busca: {resultado.rodadas} rodadas, {resultado.avaliacoes} avaliações em {resultado.tempo:.2f} s")
+    print(f"Acurácia leave-one-out: {antes.acuracia:.4f} (pesos iguais) -> {depois.acuracia:.4f} (pesos aprendidos)")
+    for attr, peso in resultado.pesos.items():
+        print(f"  {attr:<25} {peso:g}")
+    salvar_pesos(args.saida, resultado.pesos, args.normalizar, args.metrica, k=args.k, acuracia=depois.acuracia)
+    print(f"Pesos salvos em {args.saida}")
+
+if __name__ == "__main__":
+    main()
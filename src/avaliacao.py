@@ -0,0 +1,250 @@
+# src/avaliacao.py
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.cbr import BaseDeCasos, ELEMENTOS_POR_BLOCO, selecionar_mais_similares, votar_diagnostico
+from src.metricas import Metrica, criar_metrica
+from src.utils import NormalizadorMinMax, load_data
+
+# Diagnóstico tratado como positivo no cálculo de sensibilidade e especificidade
+POSITIVO = 'M'
+
+class ResultadoAvaliacao:
+    def __init__(self, metodo, k, reais, previstos, tempo, n_grupos):
+        self.metodo = metodo  # 'loo' ou 'kfold'
+        self.k = k  # Número de vizinhos usados no voto
+        self.reais = reais  # Vetor com o diagnóstico real de cada caso
+        self.previstos = previstos  # Vetor com o diagnóstico previsto para cada caso
+        self.tempo = tempo  # Tempo total (s, relógio de parede)
+        self.n_grupos = n_grupos  # Número de grupos (folds); na leave-one-out, o número de casos
+
+        positivos = reais == POSITIVO
+        acertos = reais == previstos
+        self.verdadeiros_positivos = int(np.sum(positivos & acertos))
+        self.falsos_negativos = int(np.sum(positivos & ~acertos))
+        self.verdadeiros_negativos = int(np.sum(~positivos & acertos))
+        self.falsos_positivos = int(np.sum(~positivos & ~acertos))
+
+    @property
+    def acuracia(self):
+        return float(np.mean(self.reais == self.previstos)) if len(self.reais) else 0.0
+
+    @property
+    def sensibilidade(self):
+        """Fração dos casos malignos (M) classificados como malignos."""
+        positivos = self.verdadeiros_positivos + self.falsos_negativos
+        return self.verdadeiros_positivos / positivos if positivos else 0.0
+
+    @property
+    def especificidade(self):
+        """Fração dos casos benignos (B) classificados como benignos."""
+        negativos = self.verdadeiros_negativos + self.falsos_positivos
+        return self.verdadeiros_negativos / negativos if negativos else 0.0
+
+    def resumo(self):
+        """Texto com as métricas da avaliação."""
+        metodo = 'Leave-one-out' if self.metodo == 'loo' else f'{self.n_grupos}-fold'
+        return (
+            f"{metodo}, k = {self.k}, {len(self.reais)} casos\n"
+            f"  Acurácia:       {self.acuracia:.4f}\n"
+            f"  Sensibilidade:  {self.sensibilidade:.4f} (M)\n"
+            f"  Especificidade: {self.especificidade:.4f} (B)\n"
+            f"  Matriz de confusão (real x previsto): "
+            f"M->M {self.verdadeiros_positivos}, M->B {self.falsos_negativos}, "
+            f"B->B {self.verdadeiros_negativos}, B->M {self.falsos_positivos}\n"
+            f"  Tempo: {self.tempo:.2f} s"
+        )
+
+def classificar_linhas(matriz, diagnosticos, grupos, linhas, nucleo, similaridades, k, voto, tamanho_bloco):
+    """
+    Classifica os casos indicados votando entre os k mais similares de outros grupos.
+    
+    As distâncias entre cada bloco de consultas e todos os casos vêm de uma vez do núcleo
+    em lote da métrica (um bloco da matriz de distâncias par a par); os casos do mesmo
+    grupo da consulta, incluindo ela própria, são excluídos antes da seleção.
+    
+    :param matriz: Matriz (casos x atributos) da base.
+    :param diagnosticos: Vetor com o diagnóstico de cada caso.
+    :param grupos: Vetor com o grupo (fold) de cada caso.
+    :param linhas: Posições dos casos a classificar.
+    :param nucleo: Núcleo em lote da métrica (ver Metrica.nucleo).
+    :param similaridades: Função que converte distâncias em similaridades.
+    :param k: Número de vizinhos.
+    :param voto: 'maioria' ou 'ponderado' (ver votar_diagnostico).
+    :param tamanho_bloco: Número de consultas por bloco.
+    :return: Vetor com o diagnóstico previsto para cada linha.
+    """
+    previstos = np.empty(len(linhas), dtype=object)
+    for inicio in range(0, len(linhas), tamanho_bloco):
+        bloco = linhas[inicio:inicio + tamanho_bloco]
+        sims_bloco = similaridades(nucleo(matriz[bloco]))
+        sims_bloco[grupos[bloco][:, None] == grupos[None, :]] = -np.inf
+        for i, sims in enumerate(sims_bloco, inicio):
+            vizinhos = selecionar_mais_similares(sims, k)
+            previstos[i] = votar_diagnostico(diagnosticos[vizinhos], sims[vizinhos], voto)
+    return previstos
+
+# Estado de cada processo do pool, preenchido uma única vez por iniciar_processo
+_estado_processo = {}
+
+def iniciar_processo(matriz, normalizar, diagnosticos, grupos, vetor_pesos, metrica, opcoes_metrica, atributos, k, voto, tamanho_bloco):
+    """
+    Recebe os dados da base (uma vez por processo) e prepara o núcleo da métrica.
+    
+    Métricas com estatísticas ajustadas à base (covariância, amplitudes) não têm núcleo
+    compartilhado: são reajustadas em cada grupo só com os casos dos demais grupos (ver
+    classificar_no_processo), para que os casos avaliados não influenciem a métrica. Com
+    normalizar, matriz é a matriz original e a normalização Min-Max também é ajustada por
+    grupo; o núcleo compartilhado, sobre a base normalizada por inteiro, serve aos grupos
+    cujos casos de treino têm os mesmos mínimos e máximos.
+    """
+    instancia = criar_metrica(metrica, atributos=atributos, **(opcoes_metrica or {}))
+    normalizador = None
+    matriz_normalizada = matriz
+    if normalizar:
+        normalizador = NormalizadorMinMax.a_partir_de_estatisticas(atributos, np.nanmin(matriz, axis=0), np.nanmax(matriz, axis=0))
+        matriz_normalizada = normalizador.transformar_matriz(matriz)
+    nucleo = None
+    if type(instancia).ajustar is Metrica.ajustar:
+        instancia.preparar(matriz_normalizada, 0)
+        nucleo = instancia.nucleo(matriz_normalizada, vetor_pesos)
+    _estado_processo.update(
+        matriz=matriz, normalizador=normalizador, matriz_normalizada=matriz_normalizada, atributos=atributos,
+        diagnosticos=diagnosticos, grupos=grupos, k=k, voto=voto, tamanho_bloco=tamanho_bloco,
+        metrica=instancia, vetor_pesos=vetor_pesos, nucleo=nucleo, similaridades=instancia.similaridades,
+    )
+
+def classificar_no_processo(linhas):
+    """Tarefa do pool: classifica as linhas indicadas com o estado do processo."""
+    estado = _estado_processo
+    grupos, normalizador = estado['grupos'], estado['normalizador']
+    argumentos = (estado['similaridades'], estado['k'], estado['voto'], estado['tamanho_bloco'])
+    if estado['nucleo'] is not None and normalizador is None:
+        return linhas, classificar_linhas(estado['matriz'], estado['diagnosticos'], grupos, linhas, estado['nucleo'], *argumentos)
+
+    # Métrica ou normalização ajustada por grupo: o núcleo cobre a base inteira (as posições
+    # continuam valendo para a exclusão do grupo), mas as estatísticas vêm só dos casos de treino
+    previstos = np.empty(len(linhas), dtype=object)
+    grupos_linhas = grupos[linhas]
+    for grupo in np.unique(grupos_linhas):
+        selecao = grupos_linhas == grupo
+        treino = grupos != grupo
+        matriz, nucleo = estado['matriz_normalizada'], estado['nucleo']
+        if normalizador is not None:
+            minimos = np.nanmin(estado['matriz'][treino], axis=0)
+            maximos = np.nanmax(estado['matriz'][treino], axis=0)
+            # Na leave-one-out, só os casos que são o único extremo de algum atributo mudam a normalização
+            if not (np.array_equal(minimos, normalizador.minimos) and np.array_equal(maximos, normalizador.maximos)):
+                matriz = NormalizadorMinMax.a_partir_de_estatisticas(estado['atributos'], minimos, maximos).transformar_matriz(estado['matriz'])
+                nucleo = None
+        if nucleo is None:
+            estado['metrica'].ajustar(matriz[treino])
+            nucleo = estado['metrica'].nucleo(matriz, estado['vetor_pesos'])
+        previstos[selecao] = classificar_linhas(matriz, estado['diagnosticos'], grupos, linhas[selecao], nucleo, *argumentos)
+    return linhas, previstos
+
+def avaliar(base, pesos, grupos, k=5, voto='maioria', processos=None, metodo='kfold'):
+    """
+    Classifica cada caso da base pelos casos dos outros grupos e mede o desempenho.
+    
+    Cada grupo é uma tarefa de um pool de processos; os dados da base são enviados uma
+    única vez a cada processo. As métricas com estatísticas da base (Mahalanobis,
+    local-global) são ajustadas a cada grupo só com os casos de treino, o que na
+    leave-one-out custa um ajuste e um núcleo por caso. Se a base for normalizada, o
+    mesmo vale para os mínimos e máximos da normalização Min-Max.
+    
+    :param base: BaseDeCasos avaliada (usa sua métrica e, se normalizada, normaliza a matriz original por grupo).
+    :param pesos: Dicionário de pesos para cada atributo.
+    :param grupos: Vetor com o grupo (fold) de cada caso.
+    :param k: Número de vizinhos.
+    :param voto: 'maioria' ou 'ponderado' (ver votar_diagnostico).
+    :param processos: Número de processos (None para um por CPU; 1 para executar no processo atual).
+    :param metodo: Nome do método, registrado no resultado.
+    :return: Objeto ResultadoAvaliacao.
+    """
+    inicio = time.perf_counter()
+    normalizar = base.normalizador is not None
+    matriz = np.ascontiguousarray(base.matriz_original if normalizar else base.matriz)
+    diagnosticos = np.asarray(base.diagnosticos, dtype=object)
+    grupos = np.asarray(grupos)
+    vetor_pesos = np.array([pesos.get(attr, 1) for attr in base.atributos_relevantes], dtype=np.float64)
+    tamanho_bloco = max(1, ELEMENTOS_POR_BLOCO // max(len(matriz), 1))
+    processos = processos or os.cpu_count() or 1
+
+    rotulos = np.unique(grupos)
+    if len(rotulos) > 4 * processos:
+        # Muitos grupos (ex.: leave-one-out): as tarefas reúnem grupos inteiros em lotes
+        tarefas = np.array_split(np.argsort(grupos, kind='stable'), 4 * processos)
+    else:
+        tarefas = [np.flatnonzero(grupos == rotulo) for rotulo in rotulos]
+    tarefas = [linhas for linhas in tarefas if len(linhas)]
+
+    parametros = (matriz, normalizar, diagnosticos, grupos, vetor_pesos, base.nome_metrica, base.opcoes_metrica,
+                  base.atributos_relevantes, k, voto, tamanho_bloco)
+    previstos = np.empty(len(matriz), dtype=object)
+    if processos == 1:
+        iniciar_processo(*parametros)
+        resultados = map(classificar_no_processo, tarefas)
+        for linhas, previstos_tarefa in resultados:
+            previstos[linhas] = previstos_tarefa
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(tarefas)), initializer=iniciar_processo, initargs=parametros) as pool:
+            for linhas, previstos_tarefa in pool.map(classificar_no_processo, tarefas):
+                previstos[linhas] = previstos_tarefa
+    return ResultadoAvaliacao(metodo, k, diagnosticos, previstos, time.perf_counter() - inicio, len(rotulos))
+
+def avaliar_loo(base, pesos, k=5, voto='maioria', processos=None):
+    """
+    Validação leave-one-out: cada caso é classificado por todos os demais.
+    
+    :return: Objeto ResultadoAvaliacao (ver avaliar).
+    """
+    return avaliar(base, pesos, np.arange(len(base.matriz)), k, voto, processos, metodo='loo')
+
+def avaliar_kfold(base, pesos, n_grupos=10, k=5, voto='maioria', processos=None, semente=0):
+    """
+    Validação cruzada k-fold estratificada: os casos de cada diagnóstico são embaralhados e
+    distribuídos igualmente entre os grupos; cada grupo é classificado pelos demais.
+    
+    :param n_grupos: Número de grupos (folds).
+    :param semente: Semente do embaralhamento.
+    :return: Objeto ResultadoAvaliacao (ver avaliar).
+    """
+    rng = np.random.default_rng(semente)
+    diagnosticos = np.asarray(base.diagnosticos, dtype=object)
+    grupos = np.empty(len(diagnosticos), dtype=np.intp)
+    deslocamento = 0
+    for diagnostico in sorted(set(diagnosticos)):
+        linhas = rng.permutation(np.flatnonzero(diagnosticos == diagnostico))
+        # O deslocamento faz cada diagnóstico começar no grupo seguinte ao último usado pelo anterior
+        grupos[linhas] = (np.arange(len(linhas)) + deslocamento) % n_grupos
+        deslocamento += len(linhas)
+    return avaliar(base, pesos, grupos, k, voto, processos, metodo='kfold')
+
+def main():
+    parser = argparse.ArgumentParser(description="Avalia a acurácia diagnóstica da base de casos por validação cruzada.")
+    parser.add_argument('--metodo', choices=['loo', 'kfold'], default='kfold')
+    parser.add_argument('--grupos', type=int, default=10, help="Número de grupos da validação k-fold.")
+    parser.add_argument('-k', type=int, default=5, help="Número de vizinhos no voto.")
+    parser.add_argument('--voto', choices=['maioria', 'ponderado'], default='maioria')
+    parser.add_argument('--normalizar', action='store_true', help="Usa a base normalizada (Min-Max).")
+    parser.add_argument('--metrica', default='euclidiana')
+    parser.add_argument('--processos', type=int, default=None, help="Número de processos (padrão: um por CPU).")
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    data = load_data()
+    atributos = [coluna for coluna in data.columns if coluna not in ('ID', 'Diagnosis')]
+    base = BaseDeCasos(data, atributos, normalizar=args.normalizar, metrica=args.metrica)
+    pesos = {attr: 1.0 for attr in atributos}
+    if args.metodo == 'loo':
+        resultado = avaliar_loo(base, pesos, args.k, args.voto, args.processos)
+    else:
+        resultado = avaliar_kfold(base, pesos, args.grupos, args.k, args.voto, args.processos, args.semente)
+    print(resultado.resumo())
+
+if __name__ == "__main__":
+    main()
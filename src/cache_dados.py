@@ -0,0 +1,259 @@
+# src/cache_dados.py
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+# Identificador do Breast Cancer Wisconsin (Diagnostic) na UCI Machine Learning Repository
+ID_UCI = 17
+
+# Diretório do cache (pode ser alterado pela variável de ambiente SISTEMA_RBC_CACHE)
+DIRETORIO_CACHE = os.environ.get(
+    'SISTEMA_RBC_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'sistema-rbc')
+)
+
+# Arquivo local usado no lugar do cache e da rede (variável de ambiente SISTEMA_RBC_ARQUIVO)
+ARQUIVO_LOCAL = os.environ.get('SISTEMA_RBC_ARQUIVO')
+
+def preparar_dados(X, y):
+    """
+    Combina features e targets da UCI em um único DataFrame com ID sequencial e colunas renomeadas.
+    
+    :param X: DataFrame com as features (colunas radius1, texture1, ...).
+    :param y: DataFrame com a coluna Diagnosis.
+    :return: DataFrame com colunas ID, Diagnosis e os 30 atributos (Radius_mean, ...).
+    """
+    # Combinar features e targets em um único DataFrame
+    data = X.copy()
+    data['Diagnosis'] = y['Diagnosis']
+    data['ID'] = range(1, len(data) + 1)  # Criar um ID sequencial
+
+    # Reorganizar as colunas para ter ID e Diagnosis primeiro
+    cols = ['ID', 'Diagnosis'] + [col for col in data.columns if col not in ['ID', 'Diagnosis']]
+    data = data[cols]
+
+    # Renomear as colunas para corresponder aos nomes esperados
+    base_features = [
+        'radius', 'texture', 'perimeter', 'area', 'smoothness',
+        'compactness', 'concavity', 'concave_points', 'symmetry', 'fractal_dimension'
+    ]
+    suffixes = {1: 'mean', 2: 'se', 3: 'worst'}
+    new_columns = {}
+
+    for feature in base_features:
+        for i in [1, 2, 3]:
+            old_name = f'{feature}{i}'
+            new_name = f'{feature.capitalize()}_{suffixes[i]}'
+            new_columns[old_name] = new_name
+
+    return data.rename(columns=new_columns)
+
+def caminho_manifesto():
+    """Caminho do manifesto do cache."""
+    return os.path.join(DIRETORIO_CACHE, 'manifesto.json')
+
+def caminho_objeto(soma):
+    """Caminho do arquivo cujo conteúdo tem o hash SHA-256 indicado."""
+    return os.path.join(DIRETORIO_CACHE, 'objetos', f'{soma}.npz')
+
+def ler_manifesto():
+    """
+    Lê o manifesto do cache, que associa cada conjunto de dados ao hash SHA-256 do arquivo com seu conteúdo.
+    
+    :return: Dicionário do manifesto (vazio se o cache ainda não existe).
+    """
+    try:
+        with open(caminho_manifesto(), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {}
+
+def escrever_atomicamente(caminho, conteudo):
+    """Grava bytes em um arquivo temporário e o renomeia, para que leitores nunca vejam um arquivo pela metade."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho))
+    with os.fdopen(descritor, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+def serializar(data):
+    """
+    Serializa o DataFrame em formato colunar (um array NumPy por coluna, sem pickle).
+    
+    :param data: DataFrame a serializar.
+    :return: Bytes do arquivo .npz.
+    """
+    colunas = {}
+    for i, coluna in enumerate(data.columns):
+        valores = data[coluna].to_numpy()
+        if valores.dtype == object:
+            valores = valores.astype(str)
+        colunas[f'{i:03d}_{coluna}'] = valores
+    buffer = io.BytesIO()
+    np.savez(buffer, **colunas)
+    return buffer.getvalue()
+
+def desserializar(conteudo):
+    """
+    Reconstrói o DataFrame a partir dos bytes gerados por serializar.
+    
+    :param conteudo: Bytes do arquivo .npz.
+    :return: DataFrame.
+    """
+    with np.load(io.BytesIO(conteudo), allow_pickle=False) as arquivo:
+        colunas = {}
+        for chave in sorted(arquivo.files):
+            valores = arquivo[chave]
+            if valores.dtype.kind == 'U':
+                valores = valores.astype(object)
+            colunas[chave.split('_', 1)[1]] = valores
+    return pd.DataFrame(colunas)
+
+def armazenar(data, metadados, nome=f'uci-{ID_UCI}'):
+    """
+    Grava o DataFrame no cache endereçado por conteúdo e atualiza o manifesto.
+    
+    :param data: DataFrame preparado (ver preparar_dados).
+    :param metadados: Objeto com as propriedades variables e metadata.additional_info.variable_info.
+    :param nome: Nome da entrada no manifesto.
+    :return: Hash SHA-256 do conteúdo gravado.
+    """
+    conteudo = serializar(data)
+    soma = hashlib.sha256(conteudo).hexdigest()
+    if not os.path.exists(caminho_objeto(soma)):
+        escrever_atomicamente(caminho_objeto(soma), conteudo)
+
+    additional_info = getattr(metadados.metadata, 'additional_info', None)
+    manifesto = ler_manifesto()
+    manifesto[nome] = {
+        'sha256': soma,
+        'linhas': len(data),
+        'gravado_em': datetime.now().isoformat(timespec='seconds'),
+        'variaveis': json.loads(metadados.variables.to_json(orient='records')),
+        'variable_info': getattr(additional_info, 'variable_info', None) if additional_info else None,
+    }
+    escrever_atomicamente(caminho_manifesto(), json.dumps(manifesto, ensure_ascii=False, indent=2).encode('utf-8'))
+    return soma
+
+def metadados_minimos(data):
+    """
+    Monta metadados no mesmo formato de fetch_ucirepo apenas com os nomes das colunas,
+    para dados que não vieram da UCI (arquivos locais).
+    
+    :param data: DataFrame preparado.
+    :return: Objeto com as propriedades variables e metadata.additional_info.variable_info.
+    """
+    return SimpleNamespace(
+        variables=pd.DataFrame({'name': list(data.columns)}),
+        metadata=SimpleNamespace(additional_info=SimpleNamespace(variable_info='')),
+    )
+
+def ler_do_cache(nome=f'uci-{ID_UCI}'):
+    """
+    Lê um conjunto de dados do cache, conferindo o hash do arquivo.
+    
+    :param nome: Nome da entrada no manifesto.
+    :return: Tupla (metadados, DataFrame) ou None se a entrada não existe ou está corrompida.
+    """
+    entrada = ler_manifesto().get(nome)
+    if entrada is None:
+        return None
+    try:
+        with open(caminho_objeto(entrada['sha256']), 'rb') as arquivo:
+            conteudo = arquivo.read()
+    except FileNotFoundError:
+        return None
+    if hashlib.sha256(conteudo).hexdigest() != entrada['sha256']:
+        return None  # Arquivo corrompido: tratado como ausente para ser baixado novamente
+    metadados = SimpleNamespace(
+        variables=pd.DataFrame.from_records(entrada['variaveis']),
+        metadata=SimpleNamespace(additional_info=SimpleNamespace(variable_info=entrada['variable_info'])),
+    )
+    return metadados, desserializar(conteudo)
+
+def baixar_dataset():
+    """
+    Busca o conjunto de dados na UCI Machine Learning Repository (requer rede e o pacote ucimlrepo).
+    
+    :return: Tupla (dataset retornado por fetch_ucirepo, DataFrame preparado).
+    """
+    from ucimlrepo import fetch_ucirepo  # Importado aqui para que o cache funcione sem o pacote instalado
+
+    dataset = fetch_ucirepo(id=ID_UCI)
+    return dataset, preparar_dados(dataset.data.features, dataset.data.targets)
+
+def ler_arquivo_local(caminho):
+    """
+    Lê um arquivo local (.csv, .parquet, .xlsx ou .npz gerado por este módulo).
+    
+    Arquivos com as colunas originais da UCI (radius1, ..., Diagnosis) são preparados
+    com preparar_dados; arquivos já com ID e Diagnosis são usados como estão.
+    
+    :param caminho: Caminho do arquivo.
+    :return: DataFrame preparado.
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.parquet':
+        data = pd.read_parquet(caminho)
+    elif extensao in ('.xlsx', '.xls'):
+        data = pd.read_excel(caminho)
+    elif extensao == '.npz':
+        with open(caminho, 'rb') as arquivo:
+            data = desserializar(arquivo.read())
+    else:
+        data = pd.read_csv(caminho)
+    if 'ID' not in data.columns:
+        data = preparar_dados(data.drop(columns=['Diagnosis']), data[['Diagnosis']])
+    return data
+
+def carregar_dataset(caminho=None, atualizar=False):
+    """
+    Carrega o conjunto de dados priorizando fontes locais: arquivo indicado, cache e, por último, a rede.
+    
+    :param caminho: Arquivo local a usar (None para ARQUIVO_LOCAL, se definido).
+    :param atualizar: Se True, ignora o cache e baixa novamente da UCI.
+    :return: Tupla (metadados, DataFrame).
+    """
+    caminho = caminho or ARQUIVO_LOCAL
+    if caminho:
+        data = ler_arquivo_local(caminho)
+        return metadados_minimos(data), data
+    if not atualizar:
+        em_cache = ler_do_cache()
+        if em_cache is not None:
+            return em_cache
+    dataset, data = baixar_dataset()
+    armazenar(data, dataset)
+    return dataset, data
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerencia o cache local do conjunto de dados Breast Cancer Wisconsin (Diagnostic).")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument('--atualizar', action='store_true', help="Baixa novamente o conjunto de dados da UCI e atualiza o cache.")
+    grupo.add_argument('--importar', metavar='ARQUIVO', help="Importa um arquivo local (.csv, .parquet, .xlsx) para o cache, sem acesso à rede.")
+    grupo.add_argument('--info', action='store_true', help="Mostra o conteúdo do manifesto.")
+    args = parser.parse_args()
+
+    if args.atualizar:
+        metadados, data = carregar_dataset(atualizar=True)
+        print(f"Cache atualizado: {len(data)} linhas ({ler_manifesto()[f'uci-{ID_UCI}']['sha256']})")
+    elif args.importar:
+        data = ler_arquivo_local(args.importar)
+        anterior = ler_do_cache()
+        # Preserva as descrições das variáveis já em cache, se houver
+        metadados = anterior[0] if anterior else metadados_minimos(data)
+        soma = armazenar(data, metadados)
+        print(f"Arquivo importado para o cache: {len(data)} linhas ({soma})")
+    else:
+        for nome, entrada in ler_manifesto().items():
+            print(f"{nome}: {entrada['linhas']} linhas, sha256 {entrada['sha256']}, gravado em {entrada['gravado_em']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,85 +1,967 @@
 # src/cbr.py
 
-import math
-from src.utils import normalize_data  # Importando a função de normalização
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+import numpy as np
+import pandas as pd
+from src.utils import NormalizadorMinMax
+from src.indices import criar_indice
+from src.instrumentacao import contar, medir
+from src.metricas import MEMORIA_NUCLEOS, criar_metrica
 
 class Caso:
+    __slots__ = ('id', 'diagnosis', 'atributos')
+
     def __init__(self, id, diagnosis, atributos):
         self.id = id
         self.diagnosis = diagnosis
-        self.atributos = atributos  # Dicionário de atributos e seus valores
+        self.atributos = atributos  # Dicionário (ou AtributosDoCaso) de atributos e seus valores
+
+class AtributosDoCaso(Mapping):
+    """
+    Visão somente leitura de uma linha da matriz da base, com acesso por nome de atributo
+    como um dicionário (caso.atributos['Radius_mean']).
+    
+    Guarda apenas a referência à matriz, o número da linha e o mapa de posições
+    compartilhado pela base, em vez de um dicionário com 30 floats por caso.
+    """
+    __slots__ = ('matriz', 'linha', 'posicoes')
+
+    def __init__(self, matriz, linha, posicoes):
+        self.matriz = matriz
+        self.linha = linha
+        self.posicoes = posicoes  # Dicionário atributo -> coluna, compartilhado por todos os casos
+
+    def __getitem__(self, atributo):
+        return float(self.matriz[self.linha, self.posicoes[atributo]])
+
+    def __iter__(self):
+        return iter(self.posicoes)
+
+    def __len__(self):
+        return len(self.posicoes)
+
+class CasosDaBase(Sequence):
+    """
+    Sequência de casos criados sob demanda a partir das linhas da matriz da base.
+    
+    Nenhum objeto é criado na construção da base: cada Caso (uma visão da sua linha)
+    só existe quando é acessado, por exemplo ao montar o resultado de uma consulta.
+    """
+    def __init__(self, base):
+        self.base = base
+
+    def __len__(self):
+        return len(self.base.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        base = self.base
+        if i < 0:
+            i += len(self)
+        caso_id = base.ids[i]
+        if isinstance(caso_id, np.generic):
+            caso_id = caso_id.item()
+        return Caso(caso_id, str(base.diagnosticos[i]), AtributosDoCaso(base.matriz, i, base.posicoes))
+
+def selecionar_mais_similares(similaridades, k=None, limiar=None):
+    """
+    Seleciona os índices dos casos mais similares em ordem decrescente de similaridade.
+    
+    Os empates são resolvidos pela posição na base, como na ordenação estável completa,
+    de modo que o resultado com k é sempre um prefixo do resultado sem k.
+    
+    :param similaridades: Vetor de similaridades de todos os casos.
+    :param k: Número máximo de índices a retornar (None para todos).
+    :param limiar: Similaridade mínima (None para não filtrar).
+    :return: Vetor de índices ordenados.
+    """
+    candidatos = np.arange(len(similaridades))
+    if limiar is not None:
+        candidatos = np.flatnonzero(similaridades >= limiar)
+    valores = similaridades[candidatos]
+
+    if k is not None and k < len(candidatos):
+        if k <= 0:
+            return candidatos[:0]
+        # Seleção parcial: o k-ésimo maior valor separa os candidatos em O(n)
+        corte = valores[np.argpartition(-valores, k - 1)[k - 1]]
+        maiores = np.flatnonzero(valores > corte)
+        empatados = np.flatnonzero(valores == corte)[:k - len(maiores)]
+        selecionados = np.concatenate([maiores, empatados])
+        candidatos = candidatos[selecionados]
+        valores = valores[selecionados]
+        # Apenas os k selecionados são ordenados (desempate pela posição na base)
+        return candidatos[np.lexsort((candidatos, -valores))]
+
+    # Ordena por similaridade decrescente; a ordenação estável mantém a ordem da base nos empates
+    return candidatos[np.argsort(-valores, kind='stable')]
+
+# Número máximo de distâncias (consultas x casos) mantidas em memória por bloco na recuperação em lote
+ELEMENTOS_POR_BLOCO = 1 << 22
+
+# Número de configurações de pesos cujos núcleos (termos da base já escalados pelos pesos) ficam
+# em cache; o total de bytes guardados pelos núcleos em cache fica limitado a MEMORIA_NUCLEOS
+TAMANHO_CACHE_NUCLEOS = 4
+
+# Limites do cache de resultados: número de consultas e total de casos recuperados guardados
+TAMANHO_CACHE_RESULTADOS = 64
+LINHAS_CACHE_RESULTADOS = 1 << 21
+
+# Casas decimais dos valores de entrada na chave do cache de resultados
+CASAS_QUANTIZACAO = 9
+
+class ResultadoBusca:
+    """
+    Resultado de uma consulta, com um elemento por caso recuperado (em ordem de similaridade decrescente).
+    
+    Todos os campos vêm da mesma passagem vetorizada que ordena os casos, de modo que
+    quem exibe o resultado não precisa recalcular distâncias.
+    """
+    def __init__(self, indices, ids, diagnosticos, distancias, similaridades, contribuicoes=None, atributos=None):
+        self.indices = indices  # Posições dos casos na base
+        self.ids = ids  # IDs dos casos
+        self.diagnosticos = diagnosticos  # Diagnósticos dos casos
+        self.distancias = distancias  # Distâncias ao caso de entrada, conforme a métrica
+        self.similaridades = similaridades  # Similaridades (1 / (1 + distância) na métrica euclidiana)
+        # Matriz (casos explicados x atributos) com a contribuição de cada atributo para a
+        # distância (na euclidiana, w_i * (entrada_i - caso_i)², somando a distância²), ou None
+        self.contribuicoes = contribuicoes
+        self.atributos = atributos  # Nomes das colunas de contribuicoes
+
+    def __len__(self):
+        return len(self.indices)
+
+    def explicacao(self, i):
+        """
+        Lista a contribuição de cada atributo para a distância do i-ésimo caso do resultado.
+        
+        :param i: Posição do caso no resultado (0 para o mais similar).
+        :return: Lista de tuplas (atributo, contribuição, fração da soma das contribuições),
+                 da maior para a menor contribuição.
+        """
+        if self.contribuicoes is None or i >= len(self.contribuicoes):
+            raise IndexError(f"O caso na posição {i} não foi explicado (ver o parâmetro explicar de recuperar).")
+        contribuicoes = self.contribuicoes[i]
+        total = contribuicoes.sum()
+        ordem = np.argsort(-contribuicoes, kind='stable')
+        return [
+            (self.atributos[j], float(contribuicoes[j]), float(contribuicoes[j] / total) if total > 0 else 0.0)
+            for j in ordem
+        ]
+
+class CacheDeResultados:
+    """
+    Cache LRU de resultados de recuperar, compartilhado pelas visões de uma base.
+    
+    As entradas valem para uma única versão dos dados: a primeira consulta depois de uma
+    inserção ou remoção esvazia o cache. Os contadores acertos e falhas registram o uso.
+    """
+    def __init__(self, max_entradas=TAMANHO_CACHE_RESULTADOS, max_linhas=LINHAS_CACHE_RESULTADOS):
+        """
+        :param max_entradas: Número máximo de resultados guardados.
+        :param max_linhas: Soma máxima do número de casos dos resultados guardados.
+        """
+        self.max_entradas = max_entradas
+        self.max_linhas = max_linhas
+        self.entradas = OrderedDict()
+        self.linhas = 0
+        self.versao = None
+        self.acertos = 0
+        self.falhas = 0
+        self.trava = threading.Lock()  # Consultas podem vir de threads diferentes (ex.: a interface)
+
+    def obter(self, chave, versao):
+        """
+        Busca um resultado no cache.
+        
+        :param chave: Chave da consulta (ver BaseDeCasos.chave_consulta).
+        :param versao: Versão atual dos dados da base.
+        :return: ResultadoBusca ou None.
+        """
+        with self.trava:
+            if versao != self.versao:
+                self.esvaziar()
+                self.versao = versao
+            resultado = self.entradas.get(chave)
+            if resultado is None:
+                self.falhas += 1
+                return None
+            self.entradas.move_to_end(chave)
+            self.acertos += 1
+            return resultado
+
+    def guardar(self, chave, versao, resultado):
+        """
+        Guarda um resultado, descartando os menos usados recentemente se os limites forem excedidos.
+        
+        :param chave: Chave da consulta.
+        :param versao: Versão dos dados com que o resultado foi calculado.
+        :param resultado: ResultadoBusca.
+        """
+        with self.trava:
+            if versao != self.versao or len(resultado) > self.max_linhas or chave in self.entradas:
+                return
+            self.entradas[chave] = resultado
+            self.linhas += len(resultado)
+            while len(self.entradas) > self.max_entradas or self.linhas > self.max_linhas:
+                _, descartado = self.entradas.popitem(last=False)
+                self.linhas -= len(descartado)
+
+    def esvaziar(self):
+        """Descarta todos os resultados (os contadores são mantidos)."""
+        self.entradas.clear()
+        self.linhas = 0
+
+    def estatisticas(self):
+        """
+        Resumo do uso do cache.
+        
+        :return: Dicionário com acertos, falhas, taxa_acerto, entradas e linhas.
+        """
+        consultas = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            'entradas': len(self.entradas),
+            'linhas': self.linhas,
+        }
+
+class ResultadoLote:
+    def __init__(self, indices, ids, similaridades, diagnosticos_vizinhos, diagnosticos):
+        self.indices = indices  # Matriz (consultas x k) com as posições dos vizinhos na base
+        self.ids = ids  # Matriz (consultas x k) com os IDs dos vizinhos
+        self.similaridades = similaridades  # Matriz (consultas x k) com as similaridades
+        self.diagnosticos_vizinhos = diagnosticos_vizinhos  # Matriz (consultas x k) com os diagnósticos dos vizinhos
+        self.diagnosticos = diagnosticos  # Vetor com o diagnóstico votado para cada consulta
+
+    def __len__(self):
+        return len(self.diagnosticos)
+
+def votar_diagnostico(diagnosticos_vizinhos, similaridades, voto='maioria'):
+    """
+    Escolhe o diagnóstico de uma consulta a partir dos diagnósticos de seus vizinhos.
+    
+    :param diagnosticos_vizinhos: Vetor com os diagnósticos dos k vizinhos.
+    :param similaridades: Vetor com as similaridades dos k vizinhos.
+    :param voto: 'maioria' (um voto por vizinho, empate decidido pela soma das similaridades)
+                 ou 'ponderado' (cada vizinho vota com sua similaridade).
+    :return: Diagnóstico escolhido.
+    """
+    if voto not in ('maioria', 'ponderado'):
+        raise ValueError(f"Tipo de voto desconhecido: {voto}")
+    placar = {}
+    for diagnostico, sim in zip(diagnosticos_vizinhos, similaridades):
+        votos, soma = placar.get(diagnostico, (0, 0.0))
+        placar[diagnostico] = (votos + 1, soma + sim)
+    if voto == 'maioria':
+        return max(placar, key=lambda d: placar[d])
+    return max(placar, key=lambda d: placar[d][1])
+
+def ampliar(array, n, capacidade):
+    """
+    Copia as n primeiras linhas de um array para um novo array com a capacidade indicada.
+    
+    :param array: Array original (pode ser um memmap somente leitura).
+    :param n: Número de linhas válidas.
+    :param capacidade: Número de linhas do novo array.
+    :return: Novo array em memória.
+    """
+    # Diagnósticos lidos de disco têm largura fixa; em memória passam a aceitar qualquer texto
+    dtype = object if array.dtype.kind == 'U' else array.dtype
+    novo = np.empty((capacidade,) + array.shape[1:], dtype=dtype)
+    novo[:n] = array[:n]
+    return novo
+
+class DadosDaBase:
+    """
+    Arrays da base (matriz original, IDs e diagnósticos) com capacidade excedente,
+    compartilhados pelas visões normalizada e original.
+    
+    As inserções escrevem apenas em linhas ainda não usadas e dobram a capacidade quando
+    ela se esgota (custo amortizado O(1) por caso); as remoções criam novos arrays. Assim,
+    as linhas já existentes nunca são alteradas e os Casos já entregues continuam válidos.
+    """
+    def __init__(self, matriz, ids, diagnosticos):
+        self.matriz = matriz
+        self.ids = ids
+        self.diagnosticos = diagnosticos
+        self.n = len(ids)
+        self.versao = 0  # Incrementada a cada inserção ou remoção
+
+    def anexar(self, valores, caso_id, diagnosis):
+        """
+        Acrescenta um caso ao final dos arrays.
+        
+        :param valores: Vetor de atributos na ordem das colunas da matriz.
+        :param caso_id: ID do caso.
+        :param diagnosis: Diagnóstico do caso.
+        """
+        if self.n == len(self.ids):
+            capacidade = max(16, 2 * self.n)
+            self.matriz = ampliar(self.matriz, self.n, capacidade)
+            self.ids = ampliar(self.ids, self.n, capacidade)
+            self.diagnosticos = ampliar(self.diagnosticos, self.n, capacidade)
+        self.matriz[self.n] = valores
+        self.ids[self.n] = caso_id
+        self.diagnosticos[self.n] = diagnosis
+        self.n += 1
+        self.versao += 1
+
+    def remover(self, posicao):
+        """
+        Remove o caso na posição indicada, criando novos arrays sem ele.
+        
+        :param posicao: Posição do caso.
+        """
+        self.matriz = np.delete(self.matriz[:self.n], posicao, axis=0)
+        self.ids = np.delete(self.ids[:self.n], posicao)
+        self.diagnosticos = np.delete(self.diagnosticos[:self.n], posicao)
+        self.n -= 1
+        self.versao += 1
 
 class BaseDeCasos:
-    def __init__(self, dataframe, atributos_relevantes, normalizar=False):
+    def __init__(self, dataframe, atributos_relevantes, normalizar=False, indice=None, opcoes_indice=None,
+                 metrica='euclidiana', opcoes_metrica=None):
         """
         Inicializa a base de casos a partir de um DataFrame e uma lista de atributos relevantes.
         
         :param dataframe: DataFrame contendo os dados.
         :param atributos_relevantes: Lista de nomes de atributos a serem utilizados.
         :param normalizar: Booleano indicando se a base deve ser normalizada.
+        :param indice: Nome de um índice de src.indices usado nas consultas top-k: 'kdtree'
+                       (exato) ou 'ivf' (aproximado), ou None para sempre usar a varredura linear.
+        :param opcoes_indice: Dicionário de parâmetros repassados ao índice.
+        :param metrica: Nome de uma métrica de src.metricas ('euclidiana', 'manhattan',
+                        'cosseno', 'mahalanobis' ou 'local_global').
+        :param opcoes_metrica: Dicionário de parâmetros repassados à métrica.
         """
+        self.atributos_relevantes = list(atributos_relevantes)
+        self.posicoes = {attr: j for j, attr in enumerate(self.atributos_relevantes)}
+
+        # Ingestão colunar: os atributos são lidos de uma vez dos arrays do DataFrame, sem percorrer linhas
+        with medir('construcao_base'):
+            self.dados = DadosDaBase(
+                np.ascontiguousarray(dataframe[self.atributos_relevantes].to_numpy(dtype=np.float64)),
+                dataframe['ID'].to_numpy(),
+                dataframe['Diagnosis'].to_numpy(),
+            )
+
+        # Visões (normalizada e original) que compartilham os mesmos arrays e o cache de resultados
+        self.visoes = {}
+        self.cache_resultados = CacheDeResultados()
+        # Serializa as consultas e as trocas de métrica entre threads (ex.: a busca em segundo plano
+        # da interface); compartilhada pelas visões, que compartilham os mesmos dados
+        self.trava = threading.RLock()
+        self.aplicar_normalizacao(normalizar)
+        self.criar_indice(indice, opcoes_indice)
+        self.definir_metrica(metrica, opcoes_metrica)
+
+    @property
+    def matriz_original(self):
+        """Matriz (casos x atributos) sem normalização."""
+        return self.dados.matriz[:self.dados.n]
+
+    @property
+    def ids(self):
+        """Vetor com o ID de cada caso."""
+        return self.dados.ids[:self.dados.n]
+
+    @property
+    def diagnosticos(self):
+        """Vetor com o diagnóstico de cada caso."""
+        return self.dados.diagnosticos[:self.dados.n]
+
+    @property
+    def matriz(self):
+        """Matriz (casos x atributos) usada na recuperação: normalizada ou original, conforme a visão."""
+        if self.normalizador is None:
+            return self.matriz_original
+        return self.matriz_normalizada[:self.dados.n]
+
+    def aplicar_normalizacao(self, normalizar):
+        """
+        Define a matriz usada na recuperação a partir da matriz original e registra esta base como visão.
+        
+        :param normalizar: Booleano indicando se a matriz deve ser normalizada (Min-Max Scaling).
+        """
+        # Normalizador ajustado uma única vez; deve ser usado também para normalizar os casos de entrada
+        self.normalizador = None
+        self.matriz_normalizada = None
         if normalizar:
-            dataframe = dataframe.copy()  # Cria uma cópia para evitar modificar o original
-            # Normalizar a base de dados usando Min-Max Scaling
-            for attr in atributos_relevantes:
-                min_val = dataframe[attr].min()
-                max_val = dataframe[attr].max()
-                if max_val - min_val != 0:
-                    dataframe[attr] = (dataframe[attr] - min_val) / (max_val - min_val)
-                else:
-                    dataframe[attr] = 0.0  # Evita divisão por zero
+            with medir('normalizacao_base'):
+                self.reescalar(
+                    np.nanmin(self.matriz_original, axis=0),
+                    np.nanmax(self.matriz_original, axis=0),
+                )
+        self.casos = CasosDaBase(self)
+        self.visoes[bool(normalizar)] = self
+
+    def reescalar(self, minimos, maximos):
+        """
+        Ajusta um novo normalizador e recalcula toda a matriz normalizada (com a mesma capacidade da original).
+        
+        :param minimos: Vetor com o mínimo de cada atributo.
+        :param maximos: Vetor com o máximo de cada atributo.
+        """
+        self.normalizador = NormalizadorMinMax.a_partir_de_estatisticas(self.atributos_relevantes, minimos, maximos)
+        self.matriz_normalizada = np.empty(self.dados.matriz.shape)
+        self.matriz_normalizada[:self.dados.n] = self.normalizador.transformar_matriz(self.matriz_original)
+
+    def com_normalizacao(self, normalizar):
+        """
+        Retorna a visão desta base com ou sem normalização, sem reconstruí-la a partir do DataFrame.
+        
+        As duas visões compartilham a matriz original, os IDs e os diagnósticos; a visão
+        normalizada acrescenta apenas a própria matriz normalizada. Cada visão é criada uma
+        única vez e reaproveitada nas chamadas seguintes.
+        
+        :param normalizar: Booleano indicando a visão desejada.
+        :return: BaseDeCasos.
+        """
+        normalizar = bool(normalizar)
+        with self.trava:
+            if normalizar not in self.visoes:
+                visao = copy.copy(self)  # Cópia rasa: compartilha arrays, o dicionário de visões, o cache e a trava
+                visao.aplicar_normalizacao(normalizar)
+                visao.criar_indice(self.nome_indice, self.opcoes_indice)
+                visao.definir_metrica(self.nome_metrica, self.opcoes_metrica)
+            return self.visoes[normalizar]
+
+    def adicionar_caso(self, caso):
+        """
+        Retém um novo caso na base (etapa "reter" do ciclo RBC), sem reconstruí-la.
+        
+        O caso é acrescentado a todas as visões. Na visão normalizada, apenas a nova linha é
+        normalizada, a menos que algum valor fique fora do intervalo [mínimo, máximo] da
+        coluna: só então as estatísticas são atualizadas e a matriz é reescalada. Os índices
+        são atualizados de forma incremental quando possível.
+        
+        :param caso: Objeto Caso com todos os atributos relevantes, na escala original.
+        """
+        try:
+            valores = np.array([caso.atributos[attr] for attr in self.atributos_relevantes], dtype=np.float64)
+        except KeyError as erro:
+            raise ValueError(f"O caso {caso.id} não possui o atributo {erro.args[0]}.") from None
+        # Aguarda as consultas em andamento: os arrays, a normalização e os índices mudam juntos
+        with self.trava:
+            if np.any(self.ids == caso.id):
+                raise ValueError(f"Já existe um caso com ID {caso.id} na base.")
+            self.dados.anexar(valores, caso.id, caso.diagnosis)
+            for visao in self.visoes.values():
+                visao.registrar_insercao(valores)
+
+    def remover_caso(self, caso_id):
+        """
+        Remove um caso da base pelo ID, em todas as visões.
+        
+        As estatísticas de normalização só são recalculadas se o caso removido detinha o
+        mínimo ou o máximo de alguma coluna.
+        
+        :param caso_id: ID do caso a remover.
+        """
+        with self.trava:
+            posicoes = np.flatnonzero(self.ids == caso_id)
+            if len(posicoes) == 0:
+                raise KeyError(f"Não existe caso com ID {caso_id} na base.")
+            posicao = int(posicoes[0])
+            valores = self.matriz_original[posicao].copy()
+            self.dados.remover(posicao)
+            for visao in self.visoes.values():
+                visao.registrar_remocao(posicao, valores)
+
+    def registrar_insercao(self, valores):
+        """
+        Atualiza a matriz normalizada e o índice desta visão após uma inserção em self.dados.
+        
+        :param valores: Vetor de atributos do caso inserido (escala original).
+        """
+        posicao = self.dados.n - 1
+        reescalada = False
+        if self.normalizador is not None:
+            minimos = np.fmin(self.normalizador.minimos, valores)
+            maximos = np.fmax(self.normalizador.maximos, valores)
+            if np.array_equal(minimos, self.normalizador.minimos) and np.array_equal(maximos, self.normalizador.maximos):
+                if len(self.matriz_normalizada) < len(self.dados.matriz):
+                    self.matriz_normalizada = ampliar(self.matriz_normalizada, posicao, len(self.dados.matriz))
+                self.matriz_normalizada[posicao] = self.normalizador.transformar_matriz(valores)
+            else:
+                self.reescalar(minimos, maximos)
+                reescalada = True
+        if self.indice is not None:
+            if reescalada:
+                self.indice.redefinir(self.matriz)
+            else:
+                self.indice.adicionar(self.matriz, posicao)
+
+    def registrar_remocao(self, posicao, valores):
+        """
+        Atualiza a matriz normalizada e o índice desta visão após uma remoção em self.dados.
+        
+        :param posicao: Posição que o caso removido ocupava.
+        :param valores: Vetor de atributos do caso removido (escala original).
+        """
+        reescalada = False
+        if self.normalizador is not None:
+            minimos, maximos = self.normalizador.minimos, self.normalizador.maximos
+            if np.any(valores == minimos) or np.any(valores == maximos):
+                minimos = np.nanmin(self.matriz_original, axis=0)
+                maximos = np.nanmax(self.matriz_original, axis=0)
+            if np.array_equal(minimos, self.normalizador.minimos) and np.array_equal(maximos, self.normalizador.maximos):
+                self.matriz_normalizada = np.delete(self.matriz_normalizada[:self.dados.n + 1], posicao, axis=0)
+            else:
+                self.reescalar(minimos, maximos)
+                reescalada = True
+        if self.indice is not None:
+            if reescalada:
+                self.indice.redefinir(self.matriz)
+            else:
+                self.indice.remover(self.matriz, posicao)
+
+    def criar_indice(self, indice=None, opcoes_indice=None):
+        """
+        Cria (ou remove, com indice=None) o índice usado nas consultas top-k.
+        
+        O índice é construído uma vez com pesos unitários e reconstruído sob demanda quando os pesos mudam.
+        
+        :param indice: Nome de um índice de src.indices ('kdtree' ou 'ivf') ou None.
+        :param opcoes_indice: Dicionário de parâmetros repassados ao índice.
+        """
+        self.nome_indice = indice
+        self.opcoes_indice = opcoes_indice
+        self.indice = None
+        if indice is not None:
+            self.indice = criar_indice(indice, self.matriz, **(opcoes_indice or {}))
+
+    def definir_metrica(self, metrica='euclidiana', opcoes_metrica=None):
+        """
+        Define a métrica de similaridade usada na recuperação.
+        
+        Estatísticas da métrica (ex.: a covariância da Mahalanobis) são ajustadas na
+        primeira consulta e reaproveitadas até que a base seja alterada.
+        
+        :param metrica: Nome de uma métrica de src.metricas.
+        :param opcoes_metrica: Dicionário de parâmetros repassados à métrica.
+        """
+        nova = criar_metrica(metrica, atributos=self.atributos_relevantes, **(opcoes_metrica or {}))
+        # Aguarda as consultas em andamento, que terminam com a métrica com que começaram
+        with self.trava:
+            self.metrica = nova
+            self.nome_metrica = metrica
+            self.opcoes_metrica = opcoes_metrica
+            # Núcleos da métrica por configuração de pesos (LRU), válidos para a versão versao_nucleos dos dados
+            self.nucleos = OrderedDict()
+            self.versao_nucleos = None
+
+    def metrica_preparada(self):
+        """Retorna a métrica com as estatísticas ajustadas à versão atual da base."""
+        with self.trava:
+            self.metrica.preparar(self.matriz, self.dados.versao)
+            return self.metrica
+
+    def nucleo(self, vetor_pesos):
+        """
+        Retorna o núcleo em lote da métrica para estes pesos, reaproveitando o de consultas anteriores.
+        
+        O núcleo guarda os termos que dependem só da base e dos pesos (na métrica de
+        Mahalanobis, os casos transformados; na do cosseno, a matriz escalada pelos pesos e
+        as normas de cada caso), de modo que, enquanto os pesos não mudam, cada nova consulta
+        só calcula os termos que dependem dela. Os núcleos das
+        últimas TAMANHO_CACHE_NUCLEOS configurações de pesos são mantidos, até MEMORIA_NUCLEOS
+        bytes no total (em bases mapeadas em memória, os núcleos não copiam a base e quase não
+        ocupam memória); alterações na base descartam todos.
+        
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :return: Função que recebe uma matriz (consultas x atributos) e retorna a matriz
+                 (consultas x casos) de distâncias.
+        """
+        with self.trava:
+            metrica = self.metrica_preparada()
+            if self.versao_nucleos != self.dados.versao:
+                self.nucleos.clear()
+                self.versao_nucleos = self.dados.versao
+            chave = np.asarray(vetor_pesos, dtype=np.float64).tobytes()
+            if chave in self.nucleos:
+                self.nucleos.move_to_end(chave)
+                return self.nucleos[chave]
+            nucleo = metrica.nucleo(self.matriz, vetor_pesos)
+            self.nucleos[chave] = nucleo
+            # Descarta os menos usados recentemente até caber nos limites (o novo sai por último)
+            while self.nucleos and (
+                len(self.nucleos) > TAMANHO_CACHE_NUCLEOS
+                or sum(getattr(guardado, 'memoria', 0) for guardado in self.nucleos.values()) > MEMORIA_NUCLEOS
+            ):
+                self.nucleos.popitem(last=False)
+            return nucleo
+
+    def salvar(self, diretorio, dtype=np.float64):
+        """
+        Salva a base em um diretório, em formato binário que pode ser mapeado em memória por carregar.
+        
+        São gravados matriz.npy (casos x atributos), ids.npy, diagnosticos.npy e metadados.json
+        (atributos e estatísticas de normalização). Em bases normalizadas, a matriz original
+        também é gravada (matriz_original.npy), para que com_normalizacao continue disponível.
+        
+        :param diretorio: Diretório de destino (criado se não existir).
+        :param dtype: Tipo dos valores da matriz (np.float32 reduz o arquivo pela metade).
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        np.save(os.path.join(diretorio, 'matriz.npy'), np.ascontiguousarray(self.matriz, dtype=dtype))
+        if self.normalizador is not None:
+            np.save(os.path.join(diretorio, 'matriz_original.npy'), np.ascontiguousarray(self.matriz_original, dtype=dtype))
+        np.save(os.path.join(diretorio, 'ids.npy'), np.asarray(self.ids))
+        np.save(os.path.join(diretorio, 'diagnosticos.npy'), np.asarray(self.diagnosticos).astype(str))
+        metadados = {
+            'versao': 1,
+            'atributos': self.atributos_relevantes,
+            'casos': len(self.ids),
+            'normalizacao': None,
+        }
+        if self.normalizador is not None:
+            metadados['normalizacao'] = {
+                'minimos': self.normalizador.minimos.tolist(),
+                'maximos': self.normalizador.maximos.tolist(),
+            }
+        with open(os.path.join(diretorio, 'metadados.json'), 'w', encoding='utf-8') as arquivo:
+            json.dump(metadados, arquivo, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def carregar(cls, diretorio, mapear=True, indice=None, opcoes_indice=None, metrica='euclidiana', opcoes_metrica=None):
+        """
+        Abre uma base salva por salvar.
+        
+        Com mapear=True os arquivos são mapeados em memória: a abertura não lê os dados, as
+        páginas são compartilhadas entre processos pelo cache do sistema operacional e a
+        recuperação opera diretamente sobre o buffer mapeado. Os objetos Caso são criados
+        apenas para os casos efetivamente retornados.
         
-        self.casos = []
-        for index, row in dataframe.iterrows():
-            atributos = {attr: row[attr] for attr in atributos_relevantes}
-            caso = Caso(row['ID'], row['Diagnosis'], atributos)
-            self.casos.append(caso)
+        :param diretorio: Diretório gerado por salvar.
+        :param mapear: Se False, os arrays são lidos inteiros para a memória.
+        :param indice: Nome de um índice de src.indices ou None.
+        :param opcoes_indice: Dicionário de parâmetros repassados ao índice.
+        :param metrica: Nome de uma métrica de src.metricas.
+        :param opcoes_metrica: Dicionário de parâmetros repassados à métrica.
+        :return: BaseDeCasos.
+        """
+        with open(os.path.join(diretorio, 'metadados.json'), encoding='utf-8') as arquivo:
+            metadados = json.load(arquivo)
+        modo = 'r' if mapear else None
+
+        base = cls.__new__(cls)
+        base.atributos_relevantes = metadados['atributos']
+        base.posicoes = {attr: j for j, attr in enumerate(base.atributos_relevantes)}
+        matriz = np.load(os.path.join(diretorio, 'matriz.npy'), mmap_mode=modo)
+        ids = np.load(os.path.join(diretorio, 'ids.npy'), mmap_mode=modo)
+        diagnosticos = np.load(os.path.join(diretorio, 'diagnosticos.npy'), mmap_mode=modo)
+        base.normalizador = None
+        base.matriz_normalizada = None
+        if metadados['normalizacao'] is None:
+            base.dados = DadosDaBase(matriz, ids, diagnosticos)
+        else:
+            base.normalizador = NormalizadorMinMax.a_partir_de_estatisticas(
+                base.atributos_relevantes,
+                metadados['normalizacao']['minimos'],
+                metadados['normalizacao']['maximos'],
+            )
+            base.matriz_normalizada = matriz
+            caminho_original = os.path.join(diretorio, 'matriz_original.npy')
+            if os.path.exists(caminho_original):
+                original = np.load(caminho_original, mmap_mode=modo)
+            else:
+                # Bases salvas sem a matriz original: reconstruída desfazendo a normalização
+                original = base.normalizador.reverter_matriz(matriz)
+            base.dados = DadosDaBase(original, ids, diagnosticos)
+        base.casos = CasosDaBase(base)
+        base.visoes = {base.normalizador is not None: base}
+        base.cache_resultados = CacheDeResultados()
+        base.trava = threading.RLock()
+        base.criar_indice(indice, opcoes_indice)
+        base.definir_metrica(metrica, opcoes_metrica)
+        return base
     
-    def recuperar_casos_similares(self, caso_entrada, pesos):
+    def vetorizar_entrada(self, caso_entrada, pesos):
+        """
+        Converte o caso de entrada e os pesos em vetores alinhados com as colunas da matriz.
+        
+        Atributos ausentes no caso de entrada recebem peso zero, reproduzindo o
+        comportamento de calcular_similaridade, que percorre apenas os atributos da entrada.
+        
+        :param caso_entrada: Objeto Caso representando o caso de entrada.
+        :param pesos: Dicionário de pesos para cada atributo.
+        :return: Tupla (vetor de valores, vetor de pesos).
+        """
+        valores = np.zeros(len(self.atributos_relevantes))
+        vetor_pesos = np.zeros(len(self.atributos_relevantes))
+        for j, attr in enumerate(self.atributos_relevantes):
+            if attr in caso_entrada.atributos:
+                valores[j] = caso_entrada.atributos[attr]
+                vetor_pesos[j] = pesos.get(attr, 1)
+        return valores, vetor_pesos
+
+    def vetorizar_consultas(self, consultas, pesos):
+        """
+        Converte um lote de consultas em uma matriz alinhada com as colunas da base.
+        
+        :param consultas: DataFrame com colunas de atributos ou matriz 2-D na ordem de atributos_relevantes.
+        :param pesos: Dicionário de pesos para cada atributo.
+        :return: Tupla (matriz de consultas, vetor de pesos).
+        """
+        if isinstance(consultas, pd.DataFrame):
+            # Colunas ausentes no DataFrame recebem peso zero, como em vetorizar_entrada
+            presentes = [attr in consultas.columns for attr in self.atributos_relevantes]
+            matriz = np.zeros((len(consultas), len(self.atributos_relevantes)))
+            colunas = [attr for attr in self.atributos_relevantes if attr in consultas.columns]
+            matriz[:, presentes] = consultas[colunas].to_numpy(dtype=np.float64)
+        else:
+            matriz = np.asarray(consultas, dtype=np.float64)
+            if matriz.ndim != 2 or matriz.shape[1] != len(self.atributos_relevantes):
+                raise ValueError(
+                    f"Esperada uma matriz com {len(self.atributos_relevantes)} colunas, recebido formato {matriz.shape}."
+                )
+            presentes = [True] * len(self.atributos_relevantes)
+        vetor_pesos = np.array([
+            pesos.get(attr, 1) if presente else 0.0
+            for attr, presente in zip(self.atributos_relevantes, presentes)
+        ], dtype=np.float64)
+        return matriz, vetor_pesos
+
+    def calcular_distancias(self, valores, vetor_pesos):
+        """
+        Calcula, em uma única passada vetorizada, a distância (conforme a métrica da base)
+        entre um vetor de entrada e todos os casos da base.
+        
+        :param valores: Vetor com os valores do caso de entrada.
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :return: Vetor com a distância para cada caso da base.
+        """
+        metrica = self.metrica_preparada()
+        if metrica.matricial:
+            # Núcleo em cache para os pesos: os termos da base são calculados uma única vez
+            return self.nucleo(vetor_pesos)(valores[None, :])[0]
+        return metrica.distancias(self.matriz, valores, vetor_pesos)
+
+    def recuperar_casos_similares(self, caso_entrada, pesos, k=None, limiar=None):
         """
         Recupera uma lista de casos similares ordenados por similaridade decrescente.
         
+        Sem k nem limiar, todos os casos são ordenados (comportamento original). Com k,
+        apenas os k mais similares são selecionados por seleção parcial, em O(n + k log k).
+        
         :param caso_entrada: Objeto Caso representando o caso de entrada.
         :param pesos: Dicionário de pesos para cada atributo.
+        :param k: Número máximo de casos a retornar (None para todos).
+        :param limiar: Similaridade mínima para que um caso seja retornado (None para não filtrar).
         :return: Lista de tuplas (caso, similaridade).
         """
-        similaridades = []
-        for caso in self.casos:
-            similaridade = self.calcular_similaridade(caso_entrada, caso, pesos)
-            similaridades.append((caso, similaridade))
-        # Ordena por similaridade decrescente
-        similaridades.sort(key=lambda x: x[1], reverse=True)
-        return similaridades
-    
+        resultado = self.recuperar(caso_entrada, pesos, k, limiar)
+        return [(self.casos[i], float(sim)) for i, sim in zip(resultado.indices, resultado.similaridades)]
+
+    def recuperar(self, caso_entrada, pesos, k=None, limiar=None, explicar=False):
+        """
+        Recupera os casos similares como um ResultadoBusca (arrays de IDs, diagnósticos,
+        distâncias e similaridades), sem criar um objeto Caso por resultado.
+        
+        Os parâmetros e a ordem dos casos são os mesmos de recuperar_casos_similares. Com
+        explicar, o resultado traz também a contribuição de cada atributo para a distância
+        dos casos mais similares (apenas em métricas aditivas, como a euclidiana), calculada
+        somente para as linhas explicadas.
+        
+        :param caso_entrada: Objeto Caso representando o caso de entrada.
+        :param pesos: Dicionário de pesos para cada atributo.
+        :param k: Número máximo de casos a retornar (None para todos).
+        :param limiar: Similaridade mínima para que um caso seja retornado (None para não filtrar).
+        :param explicar: True para explicar todos os casos retornados, um inteiro n para
+                         explicar apenas os n primeiros, ou False.
+        :return: Objeto ResultadoBusca (pode vir do cache de resultados; não deve ser alterado).
+        """
+        valores, vetor_pesos = self.vetorizar_entrada(caso_entrada, pesos)
+        # A chave e o resultado são obtidos com a mesma métrica, mesmo que outra thread a troque
+        with self.trava:
+            if self.cache_resultados is None:
+                return self.recuperar_sem_cache(valores, vetor_pesos, k, limiar, explicar)
+
+            chave = self.chave_consulta(valores, vetor_pesos, k, limiar, explicar)
+            versao = self.dados.versao
+            resultado = self.cache_resultados.obter(chave, versao)
+            if resultado is None:
+                contar('cache_falhas')
+                resultado = self.recuperar_sem_cache(valores, vetor_pesos, k, limiar, explicar)
+                self.cache_resultados.guardar(chave, versao, resultado)
+            else:
+                contar('cache_acertos')
+            return resultado
+
+    def chave_consulta(self, valores, vetor_pesos, k, limiar, explicar):
+        """
+        Chave de uma consulta no cache de resultados.
+        
+        Inclui tudo o que altera o resultado além da versão dos dados: entrada (arredondada
+        a CASAS_QUANTIZACAO casas), pesos, parâmetros da consulta, normalização, métrica e o
+        índice em uso no momento (o próprio objeto e seus parâmetros atuais, de modo que
+        trocar ou desligar base.indice, ou alterar base.indice.n_sondas, não reaproveita
+        resultados antigos).
+        
+        :return: Tupla.
+        """
+        # Somar 0.0 converte -0.0 em 0.0, para que os dois gerem a mesma chave
+        entrada = (np.round(valores, CASAS_QUANTIZACAO) + 0.0).tobytes()
+        return (
+            # repr distingue explicar=True de explicar=1 (iguais como chave de dicionário)
+            entrada, np.asarray(vetor_pesos, dtype=np.float64).tobytes(), k, limiar, repr(explicar),
+            self.normalizador is not None, self.nome_metrica, repr(self.opcoes_metrica),
+            None if self.indice is None else (id(self.indice), self.indice.parametros()),
+        )
+
+    def recuperar_sem_cache(self, valores, vetor_pesos, k=None, limiar=None, explicar=False):
+        """
+        Executa a recuperação de recuperar a partir dos vetores de entrada e de pesos, sem consultar o cache.
+        
+        :param valores: Vetor com os valores do caso de entrada.
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :return: Objeto ResultadoBusca.
+        """
+        metrica = self.metrica_preparada()
+
+        if self.usar_indice(vetor_pesos) and (k is not None or (limiar is not None and limiar > 0)):
+            with medir('indice'):
+                if k is not None:
+                    indices, distancias = self.indice.consultar(valores[None, :], vetor_pesos, k)
+                    ordem, distancias = indices[0], distancias[0]
+                else:
+                    # sim >= limiar equivale a distância <= 1/limiar - 1
+                    candidatos = self.indice.consultar_raio(valores, vetor_pesos, 1 / limiar - 1)
+                    diferencas = self.matriz[candidatos] - valores
+                    distancias_candidatos = np.sqrt((diferencas * diferencas) @ vetor_pesos)
+                    ordem_candidatos = np.lexsort((candidatos, -1 / (1 + distancias_candidatos)))
+                    ordem, distancias = candidatos[ordem_candidatos], distancias_candidatos[ordem_candidatos]
+            similaridades = 1 / (1 + distancias)
+            if limiar is not None:
+                filtro = similaridades >= limiar
+                ordem, distancias, similaridades = ordem[filtro], distancias[filtro], similaridades[filtro]
+        else:
+            with medir('distancias'):
+                todas_distancias = self.calcular_distancias(valores, vetor_pesos)
+                todas_similaridades = metrica.similaridades(todas_distancias)
+            with medir('ordenacao'):
+                ordem = selecionar_mais_similares(todas_similaridades, k, limiar)
+                distancias, similaridades = todas_distancias[ordem], todas_similaridades[ordem]
+            contar('casos_examinados', len(self.matriz))  # Nos índices, cada um conta os candidatos que examina
+
+        resultado = ResultadoBusca(ordem, self.ids[ordem], self.diagnosticos[ordem], distancias, similaridades)
+        if explicar is not False and metrica.aditiva:
+            with medir('explicacao'):
+                explicados = ordem if explicar is True else ordem[:explicar]
+                resultado.contribuicoes = metrica.contribuicoes(metrica.termos(self.matriz[explicados], valores), vetor_pesos)
+            resultado.atributos = self.atributos_relevantes
+        return resultado
+
+    def usar_indice(self, vetor_pesos):
+        """
+        Indica se a consulta com esses pesos pode ser atendida pelo índice espacial.
+        
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :return: Booleano.
+        """
+        return self.indice is not None and self.metrica.indexavel and self.indice.suporta(vetor_pesos)
+
+    def recuperar_lote(self, consultas, pesos, k=5, voto='maioria', tamanho_bloco=None):
+        """
+        Recupera os k casos mais similares para cada consulta de um lote e vota o diagnóstico.
+        
+        As distâncias são calculadas em blocos de consultas pelo núcleo em lote da métrica,
+        com as mesmas somas por caso de recuperar (os vizinhos e os empates são os mesmos);
+        a memória usada fica limitada a ELEMENTOS_POR_BLOCO distâncias.
+        
+        :param consultas: DataFrame ou matriz 2-D com os casos de entrada.
+        :param pesos: Dicionário de pesos para cada atributo.
+        :param k: Número de vizinhos por consulta.
+        :param voto: 'maioria' ou 'ponderado' (ver votar_diagnostico).
+        :param tamanho_bloco: Número de consultas por bloco (None para calcular a partir de ELEMENTOS_POR_BLOCO).
+        :return: Objeto ResultadoLote.
+        """
+        if k < 1:
+            raise ValueError(f"O número de vizinhos deve ser pelo menos 1, recebido {k}.")
+        matriz_consultas, vetor_pesos = self.vetorizar_consultas(consultas, pesos)
+        n_consultas, n_casos = len(matriz_consultas), len(self.matriz)
+        k = min(k, n_casos)
+        if tamanho_bloco is None:
+            tamanho_bloco = max(1, ELEMENTOS_POR_BLOCO // max(n_casos, 1))
+
+        contar('consultas_lote', n_consultas)
+        with self.trava:
+            if self.usar_indice(vetor_pesos):
+                with medir('lote_indice'):
+                    indices, distancias = self.indice.consultar(matriz_consultas, vetor_pesos, k)
+                return self.montar_resultado_lote(indices, 1 / (1 + distancias), voto, self.ids, self.diagnosticos)
+
+            # Métrica, núcleo, IDs e diagnósticos obtidos juntos: nada disso muda depois de
+            # obtido (inserções e remoções criam novas linhas ou novos arrays), e o cálculo
+            # abaixo pode seguir fora da trava
+            metrica = self.metrica_preparada()
+            nucleo = self.nucleo(vetor_pesos)
+            ids, diagnosticos_base = self.ids, self.diagnosticos
+
+        contar('casos_examinados', n_consultas * n_casos)
+        indices = np.empty((n_consultas, k), dtype=np.intp)
+        similaridades = np.empty((n_consultas, k))
+        for inicio in range(0, n_consultas, tamanho_bloco):
+            with medir('lote_distancias'):
+                sims_bloco = metrica.similaridades(nucleo(matriz_consultas[inicio:inicio + tamanho_bloco]))
+            with medir('lote_ordenacao'):
+                for i, sims in enumerate(sims_bloco, inicio):
+                    indices[i] = selecionar_mais_similares(sims, k)
+                    similaridades[i] = sims[indices[i]]
+        return self.montar_resultado_lote(indices, similaridades, voto, ids, diagnosticos_base)
+
+    def montar_resultado_lote(self, indices, similaridades, voto, ids, diagnosticos_base):
+        """
+        Monta o ResultadoLote a partir das posições e similaridades dos vizinhos de cada consulta.
+        
+        :param indices: Matriz (consultas x k) com as posições dos vizinhos na base.
+        :param similaridades: Matriz (consultas x k) com as similaridades.
+        :param voto: 'maioria' ou 'ponderado' (ver votar_diagnostico).
+        :param ids: Vetor de IDs da base no momento da consulta.
+        :param diagnosticos_base: Vetor de diagnósticos da base no momento da consulta.
+        :return: Objeto ResultadoLote.
+        """
+        diagnosticos_vizinhos = diagnosticos_base[indices]
+        diagnosticos = np.array([
+            votar_diagnostico(diags, sims, voto)
+            for diags, sims in zip(diagnosticos_vizinhos, similaridades)
+        ], dtype=object)
+        return ResultadoLote(indices, ids[indices], similaridades, diagnosticos_vizinhos, diagnosticos)
+
     def calcular_similaridade(self, caso1, caso2, pesos):
         """
-        Calcula a similaridade entre dois casos utilizando distância euclidiana ponderada.
+        Calcula a similaridade entre dois casos utilizando a métrica da base.
         
         :param caso1: Objeto Caso representando o primeiro caso.
         :param caso2: Objeto Caso representando o segundo caso.
         :param pesos: Dicionário de pesos para cada atributo.
-        :return: Valor de similaridade entre 0 e 1.
-        """
-        soma = 0
-        for atributo in caso1.atributos:
-            w = pesos.get(atributo, 1)
-            soma += w * (caso1.atributos[atributo] - caso2.atributos[atributo]) ** 2
-        distancia = math.sqrt(soma)
-        similaridade = 1 / (1 + distancia)
-        return similaridade
+        :return: Valor de similaridade (entre 0 e 1 na métrica euclidiana).
+        """
+        return float(self.metrica.similaridades(self.calcular_distancia(caso1, caso2, pesos)))
     
     def calcular_distancia(self, caso1, caso2, pesos):
         """
-        Calcula a distância euclidiana ponderada entre dois casos.
+        Calcula a distância entre dois casos utilizando a métrica da base.
+        
+        Como em recuperar_casos_similares, apenas os atributos presentes em caso1 são considerados.
         
         :param caso1: Objeto Caso representando o primeiro caso.
         :param caso2: Objeto Caso representando o segundo caso.
         :param pesos: Dicionário de pesos para cada atributo.
         :return: Valor da distância.
         """
-        soma = 0
-        for atributo in caso1.atributos:
-            w = pesos.get(atributo, 1)
-            soma += w * (caso1.atributos[atributo] - caso2.atributos[atributo]) ** 2
-        distancia = math.sqrt(soma)
-        return distancia
+        valores, vetor_pesos = self.vetorizar_entrada(caso1, pesos)
+        outro = np.array([[
+            caso2.atributos[attr] if attr in caso1.atributos else 0.0
+            for attr in self.atributos_relevantes
+        ]])
+        return float(self.metrica_preparada().distancias(outro, valores, vetor_pesos)[0])
@@ -0,0 +1,666 @@
+# src/indices.py
+
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from src.instrumentacao import contar
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy é opcional; sem ele a recuperação usa apenas a varredura linear
+    cKDTree = None
+
+class IndiceKDTree:
+    """
+    Índice espacial exato (KD-tree) sobre as coordenadas escaladas pelos pesos.
+    
+    A distância euclidiana ponderada sqrt(Σ w_i (q_i - x_i)²) é igual à distância
+    euclidiana comum entre os pontos com coordenadas multiplicadas por sqrt(w_i), de modo
+    que a árvore é construída sobre a matriz escalada e reconstruída apenas quando o
+    vetor de pesos muda.
+    
+    Casos inseridos depois da construção ficam em uma cauda examinada por varredura
+    linear e combinada ao resultado da árvore; a árvore só é reconstruída quando essa cauda
+    passa de 5% da base.
+    """
+    nome = 'kdtree'
+    exato = True
+
+    def __init__(self, matriz, vetor_pesos=None, tamanho_folha=16):
+        """
+        :param matriz: Matriz (casos x atributos) da base de casos.
+        :param vetor_pesos: Vetor de pesos inicial (None para pesos unitários).
+        :param tamanho_folha: Número máximo de casos por folha da árvore.
+        """
+        if cKDTree is None:
+            raise ImportError("O índice 'kdtree' requer o pacote scipy (pip install scipy).")
+        self.matriz = matriz
+        self.tamanho_folha = tamanho_folha
+        self.pesos = None
+        self.arvore = None
+        self.n_arvore = 0  # Número de casos (as primeiras linhas da matriz) contidos na árvore
+        if vetor_pesos is None:
+            vetor_pesos = np.ones(matriz.shape[1])
+        self.preparar(vetor_pesos)
+
+    def suporta(self, vetor_pesos):
+        """Indica se o índice pode atender consultas com esses pesos (a escala exige pesos não negativos)."""
+        return bool(np.all(vetor_pesos >= 0))
+
+    def parametros(self):
+        """Parâmetros atuais que alteram o resultado das consultas (usados na chave do cache de resultados)."""
+        return (self.nome,)
+
+    def preparar(self, vetor_pesos):
+        """
+        Reconstrói a árvore se os pesos forem diferentes dos usados na última construção
+        ou se a cauda de casos inseridos depois dela ficou grande demais.
+        
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        """
+        pendentes = len(self.matriz) - self.n_arvore
+        if (self.pesos is not None and np.array_equal(self.pesos, vetor_pesos)
+                and pendentes <= max(64, len(self.matriz) // 20)):
+            return
+        self.escala = np.sqrt(vetor_pesos)
+        self.arvore = cKDTree(self.matriz * self.escala, leafsize=self.tamanho_folha)
+        self.n_arvore = len(self.matriz)
+        self.pesos = np.array(vetor_pesos, dtype=np.float64)
+
+    def invalidar(self):
+        """Descarta a árvore para que seja reconstruída na próxima consulta (ex.: a matriz mudou)."""
+        self.pesos = None
+        self.arvore = None
+        self.n_arvore = 0
+
+    def redefinir(self, matriz):
+        """
+        Substitui a matriz (ex.: após a base ser reescalada) e descarta a árvore.
+        
+        :param matriz: Nova matriz (casos x atributos).
+        """
+        self.matriz = matriz
+        self.invalidar()
+
+    def adicionar(self, matriz, posicao):
+        """
+        Registra um caso acrescentado ao final da matriz; ele entra na cauda varrida linearmente.
+        
+        :param matriz: Matriz já com o novo caso.
+        :param posicao: Posição do novo caso (sempre a última linha).
+        """
+        self.matriz = matriz
+
+    def remover(self, matriz, posicao):
+        """
+        Registra a remoção de um caso. As posições seguintes mudam, então a árvore é descartada.
+        
+        :param matriz: Matriz já sem o caso.
+        :param posicao: Posição que o caso ocupava.
+        """
+        self.redefinir(matriz)
+
+    def consultar(self, consultas, vetor_pesos, k):
+        """
+        Busca os k vizinhos mais próximos de cada consulta.
+        
+        :param consultas: Matriz (consultas x atributos).
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :param k: Número de vizinhos.
+        :return: Tupla (índices, distâncias), ambas matrizes (consultas x k) em ordem crescente de distância.
+        """
+        self.preparar(vetor_pesos)
+        k = min(k, len(self.matriz))
+        pontos = consultas * self.escala
+        vizinhos = self.vizinhos_da_arvore(pontos, min(k, self.n_arvore))
+        # Casos inseridos depois da construção da árvore: varredura linear da cauda
+        cauda = self.matriz[self.n_arvore:] * self.escala
+        posicoes_cauda = np.arange(self.n_arvore, len(self.matriz))
+
+        resultado_indices = np.empty((len(consultas), k), dtype=np.intp)
+        resultado_distancias = np.empty((len(consultas), k))
+        for linha, ponto in enumerate(pontos):
+            # As distâncias dos candidatos da árvore e da cauda são recalculadas pela mesma
+            # fórmula, para que casos repetidos tenham exatamente a mesma distância; os empates
+            # são desempatados pela posição na base, como na varredura linear
+            candidatos = np.concatenate([vizinhos[linha], posicoes_cauda])
+            contar('casos_examinados', len(candidatos))
+            diferencas = np.concatenate([self.matriz[vizinhos[linha]] * self.escala, cauda]) - ponto
+            distancias = np.sqrt(np.einsum('ij,ij->i', diferencas, diferencas))
+            ordem = np.lexsort((candidatos, distancias))[:k]
+            resultado_indices[linha] = candidatos[ordem]
+            resultado_distancias[linha] = distancias[ordem]
+        return resultado_indices, resultado_distancias
+
+    def vizinhos_da_arvore(self, pontos, k):
+        """
+        Busca na árvore os k vizinhos de cada ponto e todos os casos empatados com o k-ésimo.
+        
+        A árvore escolhe arbitrariamente entre casos à mesma distância do k-ésimo; a busca é
+        ampliada (dobrando o número de vizinhos) nas consultas em que o último vizinho
+        devolvido ainda empata com o k-ésimo, até que a distância aumente estritamente.
+        
+        :param pontos: Matriz (consultas x atributos) já escalada pelos pesos.
+        :param k: Número de vizinhos (no máximo o número de casos da árvore).
+        :return: Lista com um vetor de posições por consulta (k ou mais, se houver empates).
+        """
+        vizinhos = [np.empty(0, dtype=np.intp)] * len(pontos)
+        if k == 0:
+            return vizinhos
+        pendentes = np.arange(len(pontos))
+        m = min(k + 1, self.n_arvore)
+        while len(pendentes):
+            distancias, indices = self.arvore.query(pontos[pendentes], k=m)
+            distancias = distancias.reshape(len(pendentes), m)
+            indices = indices.reshape(len(pendentes), m)
+            ampliar = (distancias[:, -1] == distancias[:, k - 1]) & (m < self.n_arvore)
+            for linha in np.flatnonzero(~ampliar):
+                vizinhos[pendentes[linha]] = indices[linha][distancias[linha] <= distancias[linha, k - 1]]
+            pendentes = pendentes[ampliar]
+            m = min(2 * m, self.n_arvore)
+        return vizinhos
+
+    def consultar_raio(self, valores, vetor_pesos, raio):
+        """
+        Busca todos os casos a uma distância menor ou igual a raio de uma consulta.
+        
+        :param valores: Vetor com os valores do caso de entrada.
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :param raio: Distância máxima.
+        :return: Vetor de índices (sem ordem definida).
+        """
+        self.preparar(vetor_pesos)
+        ponto = valores * self.escala
+        indices = np.asarray(self.arvore.query_ball_point(ponto, raio), dtype=np.intp)
+        diferencas = self.matriz[self.n_arvore:] * self.escala - ponto
+        cauda = np.flatnonzero(np.einsum('ij,ij->i', diferencas, diferencas) <= raio * raio) + self.n_arvore
+        contar('casos_examinados', len(indices) + len(diferencas))
+        return np.concatenate([indices, cauda])
+
+class IndiceIVF:
+    """
+    Índice aproximado por listas invertidas (IVF) sobre as coordenadas escaladas pelos pesos.
+    
+    Os casos são agrupados por k-means em n_listas grupos; uma consulta calcula a distância
+    apenas para os casos dos n_sondas grupos de centróide mais próximo. Aumentar n_sondas
+    melhora a revocação (recall) em troca de mais casos examinados; com n_sondas = n_listas
+    o resultado é exato.
+    
+    Casos inseridos depois do agrupamento entram na lista do centróide mais próximo, sem
+    refazer o k-means.
+    """
+    nome = 'ivf'
+    exato = False
+
+    def __init__(self, matriz, vetor_pesos=None, n_listas=None, n_sondas=4, iteracoes=10, semente=0):
+        """
+        :param matriz: Matriz (casos x atributos) da base de casos.
+        :param vetor_pesos: Vetor de pesos inicial (None para pesos unitários).
+        :param n_listas: Número de grupos do k-means (None para a raiz quadrada do número de casos).
+        :param n_sondas: Número de grupos examinados por consulta (controle revocação x velocidade).
+        :param iteracoes: Número de iterações do k-means.
+        :param semente: Semente usada na inicialização do k-means.
+        """
+        self.matriz = matriz
+        self.n_listas = n_listas
+        self.n_sondas = n_sondas
+        self.iteracoes = iteracoes
+        self.semente = semente
+        self.pesos = None
+        if vetor_pesos is None:
+            vetor_pesos = np.ones(matriz.shape[1])
+        self.preparar(vetor_pesos)
+
+    def suporta(self, vetor_pesos):
+        """Indica se o índice pode atender consultas com esses pesos (a escala exige pesos não negativos)."""
+        return bool(np.all(vetor_pesos >= 0))
+
+    def parametros(self):
+        """Parâmetros atuais que alteram o resultado das consultas (n_sondas pode ser alterado a qualquer momento)."""
+        return (self.nome, self.n_listas, self.n_sondas, self.iteracoes, self.semente)
+
+    def preparar(self, vetor_pesos):
+        """
+        Reagrupa os casos se os pesos forem diferentes dos usados no último agrupamento.
+        
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        """
+        if self.pesos is not None and np.array_equal(self.pesos, vetor_pesos):
+            return
+        self.escala = np.sqrt(vetor_pesos)
+        pontos = self.matriz * self.escala
+        n_listas = self.n_listas or max(1, int(np.sqrt(len(pontos))))
+        n_listas = max(1, min(n_listas, len(pontos)))
+
+        # k-means (Lloyd) sobre uma amostra, suficiente para posicionar os centróides
+        rng = np.random.default_rng(self.semente)
+        amostra = pontos[rng.choice(len(pontos), size=min(len(pontos), 256 * n_listas), replace=False)]
+        self.centroides = amostra[rng.choice(len(amostra), size=n_listas, replace=False)].copy()
+        for _ in range(self.iteracoes):
+            rotulos = atribuir_grupos(amostra, self.centroides)
+            somas = np.zeros_like(self.centroides)
+            np.add.at(somas, rotulos, amostra)
+            contagens = np.bincount(rotulos, minlength=n_listas)
+            ocupados = contagens > 0  # Grupos vazios mantêm o centróide anterior
+            self.centroides[ocupados] = somas[ocupados] / contagens[ocupados, None]
+
+        # Listas invertidas: posições dos casos de cada grupo
+        rotulos = atribuir_grupos(pontos, self.centroides)
+        ordem = np.argsort(rotulos, kind='stable')
+        self.listas = np.split(ordem, np.cumsum(np.bincount(rotulos, minlength=n_listas))[:-1])
+        self.pesos = np.array(vetor_pesos, dtype=np.float64)
+
+    def invalidar(self):
+        """Descarta o agrupamento para que seja refeito na próxima consulta (ex.: a matriz mudou)."""
+        self.pesos = None
+
+    def redefinir(self, matriz):
+        """
+        Substitui a matriz (ex.: após a base ser reescalada) e descarta o agrupamento.
+        
+        :param matriz: Nova matriz (casos x atributos).
+        """
+        self.matriz = matriz
+        self.invalidar()
+
+    def adicionar(self, matriz, posicao):
+        """
+        Insere um caso acrescentado à matriz na lista do centróide mais próximo.
+        
+        :param matriz: Matriz já com o novo caso.
+        :param posicao: Posição do novo caso.
+        """
+        self.matriz = matriz
+        if self.pesos is None:
+            return
+        grupo = atribuir_grupos(matriz[posicao:posicao + 1] * self.escala, self.centroides)[0]
+        self.listas[grupo] = np.append(self.listas[grupo], posicao)
+
+    def remover(self, matriz, posicao):
+        """
+        Retira um caso das listas e desloca as posições seguintes.
+        
+        :param matriz: Matriz já sem o caso.
+        :param posicao: Posição que o caso ocupava.
+        """
+        self.matriz = matriz
+        if self.pesos is None:
+            return
+        for g, lista in enumerate(self.listas):
+            lista = lista[lista != posicao]
+            self.listas[g] = lista - (lista > posicao)
+
+    def candidatos(self, ponto, minimo):
+        """
+        Reúne os casos dos grupos mais próximos de um ponto já escalado.
+        
+        :param ponto: Vetor da consulta escalado pelos pesos.
+        :param minimo: Número mínimo de candidatos; grupos adicionais são examinados se necessário.
+        :return: Vetor de índices dos candidatos.
+        """
+        diferencas = self.centroides - ponto
+        grupos = np.argsort(np.einsum('ij,ij->i', diferencas, diferencas))
+        tamanhos = np.array([len(self.listas[g]) for g in grupos])
+        n_grupos = max(self.n_sondas, int(np.searchsorted(np.cumsum(tamanhos), minimo)) + 1)
+        return np.concatenate([self.listas[g] for g in grupos[:n_grupos]])
+
+    def consultar(self, consultas, vetor_pesos, k):
+        """
+        Busca (aproximadamente) os k vizinhos mais próximos de cada consulta.
+        
+        :param consultas: Matriz (consultas x atributos).
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :param k: Número de vizinhos.
+        :return: Tupla (índices, distâncias), ambas matrizes (consultas x k) em ordem crescente de distância.
+        """
+        self.preparar(vetor_pesos)
+        k = min(k, len(self.matriz))
+        indices = np.empty((len(consultas), k), dtype=np.intp)
+        distancias = np.empty((len(consultas), k))
+        for linha, ponto in enumerate(consultas * self.escala):
+            candidatos = self.candidatos(ponto, k)
+            contar('casos_examinados', len(candidatos))
+            diferencas = self.matriz[candidatos] * self.escala - ponto
+            dist = np.sqrt(np.einsum('ij,ij->i', diferencas, diferencas))
+            if k < len(candidatos):
+                # Mantém todos os empatados com o k-ésimo (a seleção parcial escolheria entre eles arbitrariamente)
+                corte = np.partition(dist, k - 1)[k - 1]
+                escolhidos = dist <= corte
+                candidatos, dist = candidatos[escolhidos], dist[escolhidos]
+            # Empates de distância são desempatados pela posição na base, como na varredura linear
+            ordem = np.lexsort((candidatos, dist))[:k]
+            indices[linha], distancias[linha] = candidatos[ordem], dist[ordem]
+        return indices, distancias
+
+    def consultar_raio(self, valores, vetor_pesos, raio):
+        """
+        Busca (aproximadamente) os casos a uma distância menor ou igual a raio de uma consulta.
+        
+        :param valores: Vetor com os valores do caso de entrada.
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :param raio: Distância máxima.
+        :return: Vetor de índices (sem ordem definida).
+        """
+        self.preparar(vetor_pesos)
+        ponto = valores * self.escala
+        candidatos = self.candidatos(ponto, 0)
+        contar('casos_examinados', len(candidatos))
+        diferencas = self.matriz[candidatos] * self.escala - ponto
+        return candidatos[np.einsum('ij,ij->i', diferencas, diferencas) <= raio * raio]
+
+# Número de distâncias calculadas de uma vez por fragmento (limita a memória de cada processo)
+ELEMENTOS_POR_FRAGMENTO = 1 << 22
+
+class IndiceFragmentado:
+    """
+    Varredura linear exata dividida entre processos, para bases maiores do que um núcleo consegue varrer.
+    
+    A matriz é copiada uma única vez para memória compartilhada (já centrada na média dos
+    casos) e dividida em fragmentos de linhas contíguas, um por processo. Cada processo
+    lê o seu fragmento diretamente da memória compartilhada, sem cópia nem serialização,
+    e devolve os k vizinhos mais próximos dentro dele; os resultados dos fragmentos são
+    combinados no processo principal. Cada fragmento é sempre atendido pelo mesmo
+    processo, que guarda as normas ponderadas do seu fragmento entre as consultas.
+    
+    Casos inseridos depois da cópia ficam em uma cauda varrida pelo processo principal; a
+    memória compartilhada só é refeita quando essa cauda passa de 5% da base.
+    """
+    nome = 'fragmentado'
+    exato = True
+
+    def __init__(self, matriz, vetor_pesos=None, processos=None):
+        """
+        :param matriz: Matriz (casos x atributos) da base de casos.
+        :param vetor_pesos: Não usado (a memória compartilhada não depende dos pesos).
+        :param processos: Número de processos/fragmentos (None para um por CPU).
+        """
+        self.matriz = matriz
+        self.processos = max(1, processos or os.cpu_count() or 1)
+        self.recursos = None  # Tupla (memória compartilhada, lista de pools) ou None
+        self.fragmentos = []  # Intervalos (início, fim) de linhas de cada fragmento
+        self.centro = None
+        self.n_compartilhado = 0  # Número de casos (as primeiras linhas da matriz) na memória compartilhada
+        self.finalizador = None
+
+    def suporta(self, vetor_pesos):
+        """Indica se o índice pode atender consultas com esses pesos (como nos demais índices, pesos não negativos)."""
+        return bool(np.all(vetor_pesos >= 0))
+
+    def parametros(self):
+        """Parâmetros atuais que alteram o resultado das consultas (o número de processos não altera)."""
+        return (self.nome,)
+
+    def preparar(self, vetor_pesos=None):
+        """
+        Copia a matriz para a memória compartilhada e inicia os processos, se ainda não foi
+        feito ou se a cauda de casos inseridos depois da cópia ficou grande demais.
+        
+        :param vetor_pesos: Não usado (mantido pela interface comum dos índices).
+        """
+        pendentes = len(self.matriz) - self.n_compartilhado
+        if self.recursos is not None and pendentes <= max(64, len(self.matriz) // 20):
+            return
+        self.invalidar()
+        n, d = self.matriz.shape
+        if n == 0:
+            return
+        dtype = self.matriz.dtype if self.matriz.dtype.kind == 'f' else np.dtype(np.float64)
+        self.centro = np.asarray(self.matriz, dtype=np.float64).mean(axis=0)
+        memoria = shared_memory.SharedMemory(create=True, size=max(1, n * d * dtype.itemsize))
+        compartilhada = np.ndarray((n, d), dtype=dtype, buffer=memoria.buf)
+        # Centrar os casos reduz o erro de arredondamento da expansão usada nos processos
+        for inicio in range(0, n, 65536):
+            compartilhada[inicio:inicio + 65536] = self.matriz[inicio:inicio + 65536] - self.centro
+        del compartilhada
+
+        limites = np.linspace(0, n, min(self.processos, n) + 1).astype(np.intp)
+        self.fragmentos = list(zip(limites[:-1], limites[1:]))
+        pools = [
+            ProcessPoolExecutor(max_workers=1, initializer=iniciar_fragmento,
+                                initargs=(memoria.name, (n, d), dtype.str, inicio, fim))
+            for inicio, fim in self.fragmentos
+        ]
+        self.recursos = (memoria, pools)
+        self.n_compartilhado = n
+        # Os processos e a memória compartilhada são liberados quando o índice deixa de ser usado
+        self.finalizador = weakref.finalize(self, liberar_recursos, memoria, pools)
+
+    def invalidar(self):
+        """Encerra os processos e libera a memória compartilhada (refeitos na próxima consulta)."""
+        if self.finalizador is not None:
+            self.finalizador()
+            self.finalizador = None
+        self.recursos = None
+        self.fragmentos = []
+        self.n_compartilhado = 0
+
+    def encerrar(self):
+        """Libera os processos e a memória compartilhada; equivalente a invalidar."""
+        self.invalidar()
+
+    def redefinir(self, matriz):
+        """
+        Substitui a matriz (ex.: após a base ser reescalada) e descarta a memória compartilhada.
+        
+        :param matriz: Nova matriz (casos x atributos).
+        """
+        self.matriz = matriz
+        self.invalidar()
+
+    def adicionar(self, matriz, posicao):
+        """
+        Registra um caso acrescentado ao final da matriz; ele entra na cauda varrida pelo processo principal.
+        
+        :param matriz: Matriz já com o novo caso.
+        :param posicao: Posição do novo caso.
+        """
+        self.matriz = matriz
+
+    def remover(self, matriz, posicao):
+        """
+        Registra a remoção de um caso; como as posições seguintes mudam, a cópia é refeita.
+        
+        :param matriz: Matriz já sem o caso.
+        :param posicao: Posição que o caso ocupava.
+        """
+        self.redefinir(matriz)
+
+    def consultar(self, consultas, vetor_pesos, k):
+        """
+        Busca os k vizinhos mais próximos de cada consulta.
+        
+        :param consultas: Matriz (consultas x atributos).
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :param k: Número de vizinhos.
+        :return: Tupla (índices, distâncias), ambas matrizes (consultas x k) em ordem crescente de distância.
+        """
+        self.preparar(vetor_pesos)
+        k = min(k, len(self.matriz))
+        vetor_pesos = np.asarray(vetor_pesos, dtype=np.float64)
+        contar('casos_examinados', len(consultas) * len(self.matriz))  # Varredura completa, dividida entre os processos
+        partes = []
+        if self.recursos is not None:
+            centradas = np.asarray(consultas, dtype=np.float64) - self.centro
+            _, pools = self.recursos
+            futuros = [pool.submit(consultar_fragmento, centradas, vetor_pesos, k) for pool in pools]
+            partes = [futuro.result() for futuro in futuros]
+
+        # Casos inseridos depois da cópia: varredura da cauda no processo principal
+        inicio_cauda = self.n_compartilhado
+        if inicio_cauda < len(self.matriz):
+            cauda = np.asarray(self.matriz[inicio_cauda:], dtype=np.float64)
+            locais, distancias = k_mais_proximos(distancias_ponderadas(consultas, cauda, vetor_pesos), k)
+            partes.append((locais + inicio_cauda, distancias))
+
+        indices = np.hstack([indices for indices, _ in partes])
+        # As distâncias dos candidatos de todos os fragmentos são recalculadas pela mesma fórmula
+        # (a expansão de cada fragmento pode diferir no último bit para casos repetidos); os
+        # empates são desempatados pela posição na base, como na varredura linear
+        diferencas = self.matriz[indices] - np.asarray(consultas, dtype=np.float64)[:, None, :]
+        distancias = np.sqrt(np.einsum('qij,qij,j->qi', diferencas, diferencas, vetor_pesos))
+        ordem = np.lexsort((indices, distancias))[:, :k]
+        return np.take_along_axis(indices, ordem, axis=1), np.take_along_axis(distancias, ordem, axis=1)
+
+    def consultar_raio(self, valores, vetor_pesos, raio):
+        """
+        Busca todos os casos a uma distância menor ou igual a raio de uma consulta.
+        
+        :param valores: Vetor com os valores do caso de entrada.
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :param raio: Distância máxima.
+        :return: Vetor de índices (sem ordem definida).
+        """
+        self.preparar(vetor_pesos)
+        vetor_pesos = np.asarray(vetor_pesos, dtype=np.float64)
+        contar('casos_examinados', len(self.matriz))
+        partes = []
+        if self.recursos is not None:
+            centrada = np.asarray(valores, dtype=np.float64)[None, :] - self.centro
+            _, pools = self.recursos
+            futuros = [pool.submit(consultar_raio_fragmento, centrada, vetor_pesos, raio) for pool in pools]
+            partes = [futuro.result() for futuro in futuros]
+        cauda = np.asarray(self.matriz[self.n_compartilhado:], dtype=np.float64)
+        if len(cauda):
+            distancias = distancias_ponderadas(np.asarray(valores, dtype=np.float64)[None, :], cauda, vetor_pesos)[0]
+            partes.append(np.flatnonzero(distancias <= raio) + self.n_compartilhado)
+        return np.concatenate(partes) if partes else np.empty(0, dtype=np.intp)
+
+def distancias_ponderadas(consultas, casos, vetor_pesos, normas_casos=None):
+    """
+    Distâncias euclidianas ponderadas entre cada consulta e cada caso, pela expansão
+    Σ w q² - 2 Σ w q x + Σ w x² (um produto de matrizes); os pares perto de zero, em que a
+    expansão perde precisão, são recalculados pela diferença direta.
+    
+    :param consultas: Matriz (consultas x atributos).
+    :param casos: Matriz (casos x atributos).
+    :param vetor_pesos: Vetor de pesos.
+    :param normas_casos: Σ w x² de cada caso, se já calculado.
+    :return: Matriz (consultas x casos).
+    """
+    if normas_casos is None:
+        normas_casos = (casos * casos) @ vetor_pesos
+    normas_consultas = (consultas * consultas) @ vetor_pesos
+    quadrados = normas_consultas[:, None] - 2 * ((consultas * vetor_pesos) @ casos.T) + normas_casos
+    imprecisos = quadrados < 1e-6 * (normas_consultas[:, None] + normas_casos)
+    if imprecisos.any():
+        i, j = np.nonzero(imprecisos)
+        diferencas = consultas[i] - casos[j]
+        quadrados[i, j] = (diferencas * diferencas) @ vetor_pesos
+    return np.sqrt(np.maximum(quadrados, 0))
+
+def k_mais_proximos(distancias, k):
+    """
+    Seleciona, em cada linha, as k menores distâncias em ordem crescente (empates pela posição).
+    
+    :param distancias: Matriz (consultas x casos).
+    :param k: Número de vizinhos.
+    :return: Tupla (posições nas colunas, distâncias), ambas matrizes (consultas x min(k, casos)).
+    """
+    n = distancias.shape[1]
+    k = min(k, n)
+    if k == 0:
+        return np.empty((len(distancias), 0), dtype=np.intp), np.empty((len(distancias), 0))
+    if k < n:
+        escolhidos = np.argpartition(distancias, k - 1, axis=1)[:, :k]
+        corte = np.take_along_axis(distancias, escolhidos, axis=1).max(axis=1)
+        # Com empates no corte, a seleção parcial escolhe entre eles arbitrariamente: nessas
+        # linhas (em geral, nenhuma) ficam os empatados de menor posição
+        for linha in np.flatnonzero(np.count_nonzero(distancias <= corte[:, None], axis=1) > k):
+            valores = distancias[linha]
+            menores = np.flatnonzero(valores < corte[linha])
+            empatados = np.flatnonzero(valores == corte[linha])[:k - len(menores)]
+            escolhidos[linha] = np.concatenate([menores, empatados])
+    else:
+        escolhidos = np.tile(np.arange(n), (len(distancias), 1))
+    valores = np.take_along_axis(distancias, escolhidos, axis=1)
+    ordem = np.lexsort((escolhidos, valores))
+    return np.take_along_axis(escolhidos, ordem, axis=1), np.take_along_axis(valores, ordem, axis=1)
+
+def liberar_recursos(memoria, pools):
+    """Encerra os processos de um IndiceFragmentado e libera sua memória compartilhada."""
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+    memoria.close()
+    memoria.unlink()
+
+# Estado de cada processo de IndiceFragmentado, preenchido uma única vez por iniciar_fragmento
+_fragmento = {}
+
+def iniciar_fragmento(nome_memoria, forma, dtype, inicio, fim):
+    """Associa o processo ao seu fragmento da matriz em memória compartilhada."""
+    # O processo apenas lê a memória; o índice que a criou é responsável por liberá-la
+    memoria = shared_memory.SharedMemory(name=nome_memoria)
+    matriz = np.ndarray(forma, dtype=np.dtype(dtype), buffer=memoria.buf)
+    _fragmento.update(memoria=memoria, casos=matriz[inicio:fim], inicio=inicio, pesos=None, normas=None)
+
+def normas_do_fragmento(vetor_pesos):
+    """Σ w x² de cada caso do fragmento, recalculado apenas quando os pesos mudam."""
+    if _fragmento['pesos'] is None or not np.array_equal(_fragmento['pesos'], vetor_pesos):
+        casos = _fragmento['casos']
+        _fragmento['normas'] = np.einsum('ij,ij,j->i', casos, casos, vetor_pesos, dtype=np.float64)
+        _fragmento['pesos'] = vetor_pesos
+    return _fragmento['normas']
+
+def consultar_fragmento(consultas, vetor_pesos, k):
+    """
+    Tarefa de um processo: os k vizinhos mais próximos de cada consulta dentro do fragmento.
+    
+    :param consultas: Matriz (consultas x atributos), já centrada como o fragmento.
+    :return: Tupla (índices na base, distâncias), matrizes (consultas x min(k, casos do fragmento)).
+    """
+    casos = _fragmento['casos']
+    normas = normas_do_fragmento(vetor_pesos)
+    tamanho_bloco = max(1, ELEMENTOS_POR_FRAGMENTO // max(len(casos), 1))
+    k = min(k, len(casos))
+    indices = np.empty((len(consultas), k), dtype=np.intp)
+    distancias = np.empty((len(consultas), k))
+    for inicio in range(0, len(consultas), tamanho_bloco):
+        bloco = slice(inicio, inicio + tamanho_bloco)
+        indices[bloco], distancias[bloco] = k_mais_proximos(distancias_ponderadas(consultas[bloco], casos, vetor_pesos, normas), k)
+    return indices + _fragmento['inicio'], distancias
+
+def consultar_raio_fragmento(consulta, vetor_pesos, raio):
+    """Tarefa de um processo: índices na base dos casos do fragmento a distância <= raio da consulta (já centrada)."""
+    distancias = distancias_ponderadas(consulta, _fragmento['casos'], vetor_pesos, normas_do_fragmento(vetor_pesos))[0]
+    return np.flatnonzero(distancias <= raio) + _fragmento['inicio']
+
+
+def atribuir_grupos(pontos, centroides, tamanho_bloco=65536):
+    """
+    Retorna, para cada ponto, o índice do centróide mais próximo (processado em blocos de pontos).
+    
+    :param pontos: Matriz (pontos x dimensões).
+    :param centroides: Matriz (grupos x dimensões).
+    :param tamanho_bloco: Número de pontos por bloco.
+    :return: Vetor de rótulos.
+    """
+    normas_centroides = np.einsum('ij,ij->i', centroides, centroides)
+    rotulos = np.empty(len(pontos), dtype=np.intp)
+    for inicio in range(0, len(pontos), tamanho_bloco):
+        bloco = pontos[inicio:inicio + tamanho_bloco]
+        # |p - c|² = |p|² - 2 p·c + |c|²; |p|² é constante na linha e não altera o argmin
+        rotulos[inicio:inicio + tamanho_bloco] = np.argmin(normas_centroides - 2 * (bloco @ centroides.T), axis=1)
+    return rotulos
+
+# Índices disponíveis para BaseDeCasos, por nome
+INDICES = {
+    IndiceKDTree.nome: IndiceKDTree,
+    IndiceIVF.nome: IndiceIVF,
+    IndiceFragmentado.nome: IndiceFragmentado,
+}
+
+def criar_indice(nome, matriz, vetor_pesos=None, **opcoes):
+    """
+    Cria um índice pelo nome registrado em INDICES.
+    
+    :param nome: Nome do índice (ex.: 'kdtree' ou 'ivf').
+    :param matriz: Matriz (casos x atributos) da base de casos.
+    :param vetor_pesos: Vetor de pesos inicial (None para pesos unitários).
+    :param opcoes: Parâmetros específicos do índice.
+    :return: Instância do índice.
+    """
+    if nome not in INDICES:
+        raise ValueError(f"Índice desconhecido: {nome}. Opções: {', '.join(INDICES)}")
+    return INDICES[nome](matriz, vetor_pesos, **opcoes)
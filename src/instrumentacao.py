@@ -0,0 +1,256 @@
+# src/instrumentacao.py
+
+import argparse
+import bisect
+import cProfile
+import os
+import pstats
+import threading
+import time
+
+# Limites superiores (s) das faixas dos histogramas: 1 µs a ~2 min, dobrando a cada faixa
+LIMITES_HISTOGRAMA = [1e-6 * 2 ** i for i in range(28)]
+
+class Histograma:
+    """
+    Histograma de latências com faixas em progressão geométrica.
+    
+    Usa memória constante, independentemente do número de medidas; os percentis são
+    estimados pelo limite superior da faixa (erro de no máximo 2x, limitado pelo máximo).
+    """
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES_HISTOGRAMA) + 1)  # A última faixa recebe o que passa do último limite
+        self.n = 0
+        self.total = 0.0
+        self.minimo = float('inf')
+        self.maximo = 0.0
+
+    def registrar(self, segundos):
+        """Acrescenta uma medida (s)."""
+        self.contagens[bisect.bisect_left(LIMITES_HISTOGRAMA, segundos)] += 1
+        self.n += 1
+        self.total += segundos
+        self.minimo = min(self.minimo, segundos)
+        self.maximo = max(self.maximo, segundos)
+
+    def percentil(self, p):
+        """
+        Estima o percentil p (0 a 100) das medidas.
+        
+        :return: Segundos (0.0 se não houver medidas).
+        """
+        if self.n == 0:
+            return 0.0
+        alvo = p / 100 * self.n
+        acumulado = 0
+        for faixa, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if contagem and acumulado >= alvo:
+                limite = LIMITES_HISTOGRAMA[faixa] if faixa < len(LIMITES_HISTOGRAMA) else self.maximo
+                return min(max(limite, self.minimo), self.maximo)
+        return self.maximo
+
+    def resumo(self):
+        """Dicionário com n, total, média, mínimo, p50, p95, p99 e máximo (s)."""
+        return {
+            'n': self.n,
+            'total': self.total,
+            'media': self.total / self.n if self.n else 0.0,
+            'minimo': self.minimo if self.n else 0.0,
+            'p50': self.percentil(50),
+            'p95': self.percentil(95),
+            'p99': self.percentil(99),
+            'maximo': self.maximo,
+        }
+
+class Cronometro:
+    """Mede o tempo de um bloco with e o registra no histograma da etapa."""
+    __slots__ = ('nome', 'inicio')
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        registrar(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+class CronometroDesligado:
+    """Substitui o Cronometro quando a instrumentação está desligada (não mede nada)."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+CRONOMETRO_DESLIGADO = CronometroDesligado()
+
+# Estado global da instrumentação (compartilhado com a thread de busca da interface)
+_estado = {'ativa': os.environ.get('RBC_INSTRUMENTACAO', '') not in ('', '0')}
+_trava = threading.Lock()
+_histogramas = {}
+_contadores = {}
+
+def ativar():
+    """Liga a instrumentação (também ligada pela variável de ambiente RBC_INSTRUMENTACAO=1)."""
+    _estado['ativa'] = True
+
+def desativar():
+    """Desliga a instrumentação; as medidas já registradas são mantidas."""
+    _estado['ativa'] = False
+
+def ativa():
+    """Indica se a instrumentação está ligada."""
+    return _estado['ativa']
+
+def medir(nome):
+    """
+    Cronômetro de uma etapa, para uso com with:
+    
+        with medir('distancias'):
+            ...
+    
+    Com a instrumentação desligada, retorna um cronômetro que não faz nada.
+    
+    :param nome: Nome da etapa.
+    :return: Gerenciador de contexto.
+    """
+    return Cronometro(nome) if _estado['ativa'] else CRONOMETRO_DESLIGADO
+
+def registrar(nome, segundos):
+    """
+    Registra uma medida já feita (ex.: o tempo entre o início de uma busca e a exibição).
+    
+    :param nome: Nome da etapa.
+    :param segundos: Duração.
+    """
+    if not _estado['ativa']:
+        return
+    with _trava:
+        histograma = _histogramas.get(nome)
+        if histograma is None:
+            histograma = _histogramas[nome] = Histograma()
+        histograma.registrar(segundos)
+
+def contar(nome, quantidade=1):
+    """
+    Incrementa um contador (ex.: acertos do cache ou casos examinados).
+    
+    :param nome: Nome do contador.
+    :param quantidade: Valor somado.
+    """
+    if not _estado['ativa']:
+        return
+    with _trava:
+        _contadores[nome] = _contadores.get(nome, 0) + quantidade
+
+def zerar():
+    """Descarta todas as medidas e contadores."""
+    with _trava:
+        _histogramas.clear()
+        _contadores.clear()
+
+def estatisticas():
+    """
+    Medidas registradas até o momento.
+    
+    :return: Dicionário {'etapas': {nome: Histograma.resumo()}, 'contadores': {nome: valor}}.
+    """
+    with _trava:
+        return {
+            'etapas': {nome: histograma.resumo() for nome, histograma in _histogramas.items()},
+            'contadores': dict(_contadores),
+        }
+
+def relatorio():
+    """Texto com a latência de cada etapa (em ms, da maior para a menor soma) e os contadores."""
+    dados = estatisticas()
+    if not dados['etapas'] and not dados['contadores']:
+        return "Nenhuma medida registrada" + ("." if ativa() else " (instrumentação desligada).")
+    linhas = [f"{'Etapa':<24} {'n':>7} {'Total':>10} {'Média':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'Máx':>9}"]
+    for nome, r in sorted(dados['etapas'].items(), key=lambda item: -item[1]['total']):
+        linhas.append(
+            f"{nome:<24} {r['n']:>7} {r['total'] * 1000:>10.2f} {r['media'] * 1000:>9.3f} "
+            f"{r['p50'] * 1000:>9.3f} {r['p95'] * 1000:>9.3f} {r['p99'] * 1000:>9.3f} {r['maximo'] * 1000:>9.3f}"
+        )
+    linhas.append("(tempos em ms; percentis estimados pelas faixas do histograma)")
+    if dados['contadores']:
+        linhas.append("")
+        linhas.extend(f"{nome:<24} {valor:>10}" for nome, valor in sorted(dados['contadores'].items()))
+    return "\n".join(linhas)
+
+def perfilar(funcao, *args, caminho=None, **kwargs):
+    """
+    Executa uma função sob o cProfile.
+    
+    O arquivo gravado está no formato do pstats, lido por python -m pstats, snakeviz ou
+    gprof2dot; para amostragem sem alterar o programa, use o py-spy
+    (py-spy record -o perfil.svg -- python -m src.instrumentacao).
+    
+    :param funcao: Função a executar.
+    :param caminho: Arquivo onde gravar o perfil (None para não gravar).
+    :return: Tupla (retorno da função, pstats.Stats).
+    """
+    perfil = cProfile.Profile()
+    retorno = perfil.runcall(funcao, *args, **kwargs)
+    if caminho:
+        perfil.dump_stats(caminho)
+    return retorno, pstats.Stats(perfil)
+
+def consulta_de_exemplo(base, data):
+    """
+    Caso de entrada medido por main: a mediana dos casos malignos (como o botão "Atribuir
+    Mediana M"), normalizada como a base, como fazem a interface, o servidor e a CLI antes
+    de recuperar.
+    
+    :param base: BaseDeCasos consultada.
+    :param data: DataFrame com os dados originais da base.
+    :return: Objeto Caso.
+    """
+    from src.cbr import Caso
+    valores = data[data['Diagnosis'] == 'M'][base.atributos_relevantes].median().to_dict()
+    if base.normalizador is not None:
+        valores = base.normalizador.transformar(valores)
+    return Caso("Entrada", "?", valores)
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede as etapas de uma busca e grava o perfil (cProfile) da consulta.")
+    parser.add_argument('--perfil', default='busca.prof', help="Arquivo do perfil no formato do pstats.")
+    parser.add_argument('--repeticoes', type=int, default=20, help="Número de buscas medidas.")
+    parser.add_argument('-k', type=int, default=None, help="Número de casos recuperados (padrão: todos, como na interface).")
+    parser.add_argument('--dados', default=None, help="Arquivo local (.csv, .parquet, .xlsx) com a base de casos, em vez do cache/UCI.")
+    parser.add_argument('--normalizar', action='store_true')
+    parser.add_argument('--metrica', default='euclidiana')
+    args = parser.parse_args()
+
+    # Importados aqui: src.cbr e src.utils usam este módulo. Executado com python -m, este
+    # arquivo é __main__, e o estado consultado por src.cbr é o do módulo src.instrumentacao
+    from src import instrumentacao
+    from src.cbr import BaseDeCasos
+    from src.utils import load_data
+
+    instrumentacao.ativar()
+    data = load_data(args.dados)
+    atributos = [coluna for coluna in data.columns if coluna not in ('ID', 'Diagnosis')]
+    base = BaseDeCasos(data, atributos, normalizar=args.normalizar, metrica=args.metrica)
+    caso_entrada = consulta_de_exemplo(base, data)
+    pesos = {attr: 1.0 for attr in atributos}
+
+    def buscar():
+        for _ in range(args.repeticoes):
+            base.cache_resultados.esvaziar()  # Cada repetição é uma recuperação completa
+            with instrumentacao.medir('busca'):
+                base.recuperar(caso_entrada, pesos, k=args.k)
+
+    _, estatisticas_perfil = instrumentacao.perfilar(buscar, caminho=args.perfil)
+    print(instrumentacao.relatorio())
+    print(f"\nPerfil gravado em {args.perfil} (python -m pstats {args.perfil}); funções mais demoradas:")
+    estatisticas_perfil.sort_stats('cumulative').print_stats(12)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+# src/metricas.py
+
+import numpy as np
+
+# Número máximo de termos (casos x atributos) calculados de uma vez pelos núcleos
+ELEMENTOS_POR_FAIXA = 1 << 20
+
+# Bytes que um núcleo pode guardar com termos da base; acima disso (e em bases mapeadas em
+# memória), os termos são calculados faixa a faixa a cada consulta
+MEMORIA_NUCLEOS = 1 << 28
+
+def preparar_base(matriz, preparar):
+    """
+    Calcula de uma vez os termos da base que dependem só dela e dos pesos (ex.: a base escalada).
+    
+    Em bases mapeadas em memória (np.memmap), a cópia ocuparia memória própria do processo
+    além das páginas do arquivo, compartilhadas pelo cache do sistema; nelas, e quando a
+    cópia passaria de MEMORIA_NUCLEOS, nada é copiado e cada faixa é preparada ao ser
+    percorrida por calcular_em_faixas.
+    
+    :param matriz: Matriz (casos x atributos).
+    :param preparar: Função aplicada a uma faixa de linhas da matriz (ou à matriz inteira).
+    :return: Tupla (base, preparar) para calcular_em_faixas: a base já preparada e None, ou
+             a própria matriz e a função.
+    """
+    if isinstance(matriz, np.memmap) or matriz.size * matriz.itemsize > MEMORIA_NUCLEOS:
+        return matriz, preparar
+    return preparar(matriz), None
+
+def memoria_guardada(*arrays):
+    """Bytes em memória própria do processo ocupados pelos arrays (memmaps não contam)."""
+    return sum(array.nbytes for array in arrays if not isinstance(array, np.memmap))
+
+def calcular_em_faixas(matriz, consultas, funcao, preparar=None):
+    """
+    Aplica uma função a cada consulta e a cada faixa de linhas da matriz, montando a matriz
+    (consultas x casos).
+    
+    Cada consulta é calculada sozinha, com o mesmo código de uma consulta única: a posição
+    da consulta no bloco não altera o arredondamento.
+    
+    :param matriz: Matriz (casos x atributos).
+    :param consultas: Matriz (consultas x atributos).
+    :param funcao: Função que recebe a faixa (linhas x atributos) e o vetor de uma consulta e
+                   retorna o vetor com o valor de cada linha.
+    :param preparar: Função aplicada a cada faixa antes do cálculo (ver preparar_base).
+    :return: Matriz (consultas x casos).
+    """
+    resultado = np.empty((len(consultas), len(matriz)))
+    passo = max(1, ELEMENTOS_POR_FAIXA // max(matriz.shape[1], 1))
+    for inicio in range(0, len(matriz), passo):
+        faixa = matriz[inicio:inicio + passo]
+        if preparar is not None:
+            faixa = preparar(faixa)
+        for i, valores in enumerate(consultas):
+            resultado[i, inicio:inicio + passo] = funcao(faixa, valores)
+    return resultado
+
+def somar_quadrados(faixa, valores):
+    """Σ (caso_i - consulta_i)² de cada par (ver calcular_em_faixas)."""
+    diferencas = faixa - valores
+    return np.einsum('ij,ij->i', diferencas, diferencas)
+
+class Metrica:
+    """
+    Métrica de similaridade usada por BaseDeCasos.
+    
+    Cada métrica fornece um núcleo vetorizado que calcula, de uma vez, as distâncias entre
+    um bloco de consultas e todos os casos da base. Métricas aditivas (a distância é uma
+    combinação de termos por atributo) fornecem também os termos, de onde saem as
+    contribuições de cada atributo usadas nas explicações.
+    
+    Cada distância é somada par a par (einsum), só a partir da consulta e do caso: em
+    produtos de matrizes (BLAS) o arredondamento depende da posição do caso na base, e
+    casos repetidos teriam distâncias diferentes, o que quebraria o desempate pela posição.
+    
+    Estatísticas da base (covariância, amplitudes) são ajustadas uma única vez por versão
+    dos dados, em preparar.
+    """
+    nome = None
+    titulo = None
+    formula = None
+    aditiva = False  # Se a distância é combinação de termos por atributo (ver termos e combinar)
+    indexavel = False  # Se os índices de src.indices (euclidianos) podem atender a métrica
+    matricial = False  # Se o núcleo pré-calcula termos da base (vale a pena guardá-lo em cache)
+    contribuicao = None  # Descrição das contribuições por atributo (métricas aditivas)
+
+    def __init__(self, atributos=None):
+        """
+        :param atributos: Nomes das colunas da matriz (BaseDeCasos sempre os informa).
+        """
+        self.atributos = atributos
+        self.versao = None
+
+    def preparar(self, matriz, versao):
+        """
+        Ajusta as estatísticas da métrica à matriz, se a versão dos dados mudou desde o último ajuste.
+        
+        :param matriz: Matriz (casos x atributos) da base.
+        :param versao: Versão dos dados da base (ver DadosDaBase.versao).
+        """
+        if versao != self.versao:
+            self.ajustar(matriz)
+            self.versao = versao
+
+    def ajustar(self, matriz):
+        """Ajusta as estatísticas da métrica à matriz da base (nenhuma, por padrão)."""
+
+    def similaridades(self, distancias):
+        """
+        Converte distâncias em similaridades (1 / (1 + distância), por padrão).
+        
+        :param distancias: Array de distâncias.
+        :return: Array de similaridades, maior para casos mais parecidos.
+        """
+        return 1 / (1 + distancias)
+
+    def distancias(self, matriz, valores, vetor_pesos):
+        """
+        Distâncias entre um caso de entrada e todos os casos da matriz.
+        
+        :param matriz: Matriz (casos x atributos).
+        :param valores: Vetor com os valores do caso de entrada.
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :return: Vetor de distâncias.
+        """
+        return self.nucleo(matriz, vetor_pesos)(valores[None, :])[0]
+
+    def nucleo(self, matriz, vetor_pesos):
+        """
+        Prepara o cálculo em lote das distâncias para a matriz e os pesos indicados.
+        
+        Por padrão (métricas aditivas), os termos de cada par consulta-caso são calculados
+        em faixas de casos e combinados; as demais métricas sobrescrevem este método.
+        
+        :param matriz: Matriz (casos x atributos).
+        :param vetor_pesos: Vetor de pesos alinhado com as colunas da matriz.
+        :return: Função que recebe uma matriz (consultas x atributos) e retorna a matriz
+                 (consultas x casos) de distâncias; seu atributo memoria traz os bytes
+                 guardados pelo núcleo (ver memoria_guardada).
+        """
+        def calcular(consultas):
+            return calcular_em_faixas(matriz, consultas, lambda faixa, valores: self.combinar(self.termos(faixa, valores), vetor_pesos))
+        calcular.memoria = 0
+        return calcular
+
+class MetricaEuclidiana(Metrica):
+    nome = 'euclidiana'
+    titulo = "Euclidiana ponderada"
+    formula = "Distância = √Σ peso_i · (entrada_i − caso_i)²\nSimilaridade = 1 / (1 + Distância)"
+    aditiva = True
+    indexavel = True
+    matricial = True
+    contribuicao = "peso_i · (entrada_i − caso_i)²; a soma é a distância²"
+
+    def termos(self, matriz, valores):
+        """
+        Termos por atributo: (entrada_i - caso_i)².
+        
+        :param matriz: Matriz (casos x atributos).
+        :param valores: Vetor com os valores do caso de entrada.
+        :return: Matriz (casos x atributos).
+        """
+        diferencas = matriz - valores
+        return diferencas * diferencas
+
+    def combinar(self, termos, vetor_pesos):
+        """Distâncias a partir dos termos por atributo."""
+        return np.sqrt(np.einsum('ij,j->i', termos, vetor_pesos))
+
+    def contribuicoes(self, termos, vetor_pesos):
+        """Contribuição de cada atributo (a soma de cada linha é o quadrado da distância)."""
+        return termos * vetor_pesos
+
+    def nucleo(self, matriz, vetor_pesos):
+        """
+        Núcleo em lote pela diferença direta entre casos e consultas escalados por √peso,
+        Σ w (q - x)² = Σ (√w q - √w x)², com a base escalada calculada uma única vez (ver
+        preparar_base).
+        
+        Pesos negativos não têm raiz real: nesse caso, os termos são combinados diretamente.
+        """
+        if np.any(vetor_pesos < 0):
+            return super().nucleo(matriz, vetor_pesos)
+        escala = np.sqrt(vetor_pesos)
+        base_escalada, escalar = preparar_base(matriz, lambda faixa: faixa * escala)
+
+        def calcular(consultas):
+            return np.sqrt(calcular_em_faixas(base_escalada, consultas * escala, somar_quadrados, escalar))
+        calcular.memoria = memoria_guardada(base_escalada)
+        return calcular
+
+class MetricaManhattan(Metrica):
+    nome = 'manhattan'
+    titulo = "Manhattan ponderada"
+    formula = "Distância = Σ peso_i · |entrada_i − caso_i|\nSimilaridade = 1 / (1 + Distância)"
+    aditiva = True
+    contribuicao = "peso_i · |entrada_i − caso_i|; a soma é a distância"
+
+    def termos(self, matriz, valores):
+        """Termos por atributo: |entrada_i - caso_i|."""
+        return np.abs(matriz - valores)
+
+    def combinar(self, termos, vetor_pesos):
+        """Distâncias a partir dos termos por atributo."""
+        return np.einsum('ij,j->i', termos, vetor_pesos)
+
+    def contribuicoes(self, termos, vetor_pesos):
+        """Contribuição de cada atributo (a soma de cada linha é a distância)."""
+        return termos * vetor_pesos
+
+class MetricaCosseno(Metrica):
+    nome = 'cosseno'
+    titulo = "Cosseno ponderado"
+    formula = (
+        "Similaridade = Σ peso_i · entrada_i · caso_i / (√Σ peso_i · entrada_i² · √Σ peso_i · caso_i²)\n"
+        "Distância = 1 − Similaridade"
+    )
+    matricial = True
+
+    def similaridades(self, distancias):
+        return 1 - distancias
+
+    def nucleo(self, matriz, vetor_pesos):
+        base_ponderada, ponderar = preparar_base(matriz, lambda faixa: faixa * vetor_pesos)
+        # Normas da base faixa a faixa (os pesos fazem o papel de uma consulta), sem outra cópia da base
+        normas_base = np.sqrt(calcular_em_faixas(matriz, vetor_pesos[None, :], lambda faixa, pesos: np.einsum('ij,ij,j->i', faixa, faixa, pesos))[0])
+
+        def calcular(consultas):
+            normas_consultas = np.sqrt(np.einsum('ij,ij,j->i', consultas, consultas, vetor_pesos))
+            produtos = calcular_em_faixas(base_ponderada, consultas, lambda faixa, valores: np.einsum('ij,j->i', faixa, valores), ponderar)
+            denominadores = normas_consultas[:, None] * normas_base
+            # Vetores nulos não têm direção: similaridade zero
+            cossenos = np.divide(produtos, denominadores, out=np.zeros_like(produtos), where=denominadores > 0)
+            return 1 - np.clip(cossenos, -1, 1)
+        calcular.memoria = memoria_guardada(base_ponderada, normas_base)
+        return calcular
+
+class MetricaMahalanobis(Metrica):
+    """
+    Distância de Mahalanobis com a covariância dos casos da base, ajustada uma vez por versão dos dados.
+    
+    Com S⁻¹ = L Lᵀ (pseudo-inversa, para covariâncias singulares) e D = diag(√peso), a
+    distância é a euclidiana entre os pontos transformados x · D · L, calculados uma vez por
+    configuração de pesos.
+    """
+    nome = 'mahalanobis'
+    titulo = "Mahalanobis"
+    formula = (
+        "Distância = √((entrada − caso)ᵀ · D · S⁻¹ · D · (entrada − caso)), "
+        "com S a covariância dos casos da base e D = diag(√peso_i)\n"
+        "Similaridade = 1 / (1 + Distância)"
+    )
+    matricial = True
+
+    def ajustar(self, matriz):
+        covariancia = np.atleast_2d(np.cov(matriz, rowvar=False)) if len(matriz) > 1 else np.zeros((matriz.shape[1],) * 2)
+        autovalores, autovetores = np.linalg.eigh(covariancia)
+        # Pseudo-inversa: direções de variância (praticamente) nula são descartadas
+        validos = autovalores > max(autovalores.max(initial=0.0), 0.0) * 1e-12
+        self.transformacao = autovetores[:, validos] / np.sqrt(autovalores[validos])
+
+    def nucleo(self, matriz, vetor_pesos):
+        projecao = np.sqrt(vetor_pesos)[:, None] * self.transformacao
+        # Projeção sem BLAS (ver Metrica), com o mesmo arredondamento para casos e consultas repetidos
+        pontos, projetar = preparar_base(matriz, lambda faixa: np.einsum('ij,jk->ik', faixa, projecao))
+
+        def calcular(consultas):
+            return np.sqrt(calcular_em_faixas(pontos, np.einsum('ij,jk->ik', consultas, projecao), somar_quadrados, projetar))
+        calcular.memoria = memoria_guardada(pontos)
+        return calcular
+
+# Funções de similaridade local da métrica local-global. Recebem a diferença absoluta
+# dividida pela amplitude do atributo na base (0 = valores iguais, 1 = extremos opostos).
+FUNCOES_LOCAIS = {
+    'linear': lambda delta: 1 - delta,
+    'exponencial': lambda delta: np.exp(-5 * delta),
+    'gaussiana': lambda delta: np.exp(-(delta * delta) / (2 * 0.2 ** 2)),
+    'degrau': lambda delta: (delta <= 0.1).astype(np.float64),
+}
+
+class MetricaLocalGlobal(Metrica):
+    """
+    Similaridade clássica de RBC: uma similaridade local por atributo, combinada pela média ponderada.
+    
+    A similaridade local de cada atributo é uma função de FUNCOES_LOCAIS aplicada à
+    diferença absoluta dividida pela amplitude (máximo - mínimo) do atributo na base,
+    ajustada uma vez por versão dos dados.
+    """
+    nome = 'local_global'
+    titulo = "Local-global (RBC)"
+    formula = (
+        "Similaridade = Σ peso_i · sim_i(entrada_i, caso_i) / Σ peso_i, em que sim_i é a similaridade "
+        "local do atributo i sobre |entrada_i − caso_i| / amplitude_i (linear: 1 − diferença relativa)\n"
+        "Distância = 1 − Similaridade"
+    )
+    aditiva = True
+    contribuicao = "peso_i · (1 − sim_i) / Σ peso; a soma é 1 − similaridade"
+
+    def __init__(self, atributos=None, funcoes_locais=None, funcao_padrao='linear'):
+        """
+        :param funcoes_locais: Dicionário atributo -> nome da função em FUNCOES_LOCAIS.
+        :param funcao_padrao: Função usada nos atributos ausentes de funcoes_locais.
+        :param atributos: Nomes das colunas da matriz (necessários para usar funcoes_locais).
+        """
+        super().__init__(atributos)
+        funcoes_locais = funcoes_locais or {}
+        for nome in [funcao_padrao, *funcoes_locais.values()]:
+            if nome not in FUNCOES_LOCAIS:
+                raise ValueError(f"Função local desconhecida: {nome}. Opções: {', '.join(FUNCOES_LOCAIS)}")
+        if funcoes_locais and atributos is None:
+            raise ValueError("Informe os atributos da base para usar funcoes_locais.")
+        self.funcao_padrao = funcao_padrao
+        # Colunas agrupadas por função local, para aplicar cada função de uma vez
+        grupos = {}
+        for j, attr in enumerate(atributos or []):
+            grupos.setdefault(funcoes_locais.get(attr, funcao_padrao), []).append(j)
+        self.grupos = {nome: np.array(colunas) for nome, colunas in grupos.items()}
+
+    def ajustar(self, matriz):
+        amplitudes = np.nanmax(matriz, axis=0) - np.nanmin(matriz, axis=0) if len(matriz) else np.zeros(matriz.shape[1])
+        self.inversos = np.divide(1.0, amplitudes, out=np.zeros_like(amplitudes), where=amplitudes > 0)
+        self.constantes = amplitudes <= 0
+
+    def similaridades(self, distancias):
+        return 1 - distancias
+
+    def termos(self, matriz, valores):
+        """Termos por atributo: 1 - similaridade local."""
+        diferencas = np.abs(matriz - valores)
+        # Em atributos constantes na base, qualquer diferença é máxima
+        delta = np.where(self.constantes, diferencas > 0, np.minimum(diferencas * self.inversos, 1.0))
+        if not self.grupos:
+            return 1 - FUNCOES_LOCAIS[self.funcao_padrao](delta)
+        termos = np.empty_like(delta)
+        for nome, colunas in self.grupos.items():
+            termos[:, colunas] = 1 - FUNCOES_LOCAIS[nome](delta[:, colunas])
+        return termos
+
+    def combinar(self, termos, vetor_pesos):
+        """Distâncias (1 - similaridade global) a partir dos termos por atributo."""
+        total = vetor_pesos.sum()
+        return np.einsum('ij,j->i', termos, vetor_pesos / total) if total > 0 else np.zeros(len(termos))
+
+    def contribuicoes(self, termos, vetor_pesos):
+        """Contribuição de cada atributo (a soma de cada linha é a distância)."""
+        total = vetor_pesos.sum()
+        return termos * (vetor_pesos / total) if total > 0 else np.zeros_like(termos)
+
+# Métricas disponíveis para BaseDeCasos, por nome
+METRICAS = {
+    MetricaEuclidiana.nome: MetricaEuclidiana,
+    MetricaManhattan.nome: MetricaManhattan,
+    MetricaCosseno.nome: MetricaCosseno,
+    MetricaMahalanobis.nome: MetricaMahalanobis,
+    MetricaLocalGlobal.nome: MetricaLocalGlobal,
+}
+
+def criar_metrica(nome, **opcoes):
+    """
+    Cria uma métrica pelo nome registrado em METRICAS.
+    
+    :param nome: Nome da métrica (ex.: 'euclidiana' ou 'mahalanobis').
+    :param opcoes: Parâmetros da métrica (atributos e os específicos de cada uma).
+    :return: Instância da métrica.
+    """
+    if nome not in METRICAS:
+        raise ValueError(f"Métrica desconhecida: {nome}. Opções: {', '.join(METRICAS)}")
+    return METRICAS[nome](**opcoes)
@@ -0,0 +1,373 @@
+# src/servidor.py
+
+import argparse
+import asyncio
+import json
+from http import HTTPStatus
+import numpy as np
+from src.cbr import BaseDeCasos, votar_diagnostico
+from src.utils import load_data
+
+# Tamanho máximo do corpo de uma requisição (bytes)
+MAX_CORPO = 16 << 20
+
+# Tempo (s) que o primeiro pedido de um lote espera por outros antes do processamento
+JANELA_PADRAO = 0.002
+
+# Número máximo de consultas reunidas em um lote
+MAX_LOTE_PADRAO = 4096
+
+class ErroDeRequisicao(Exception):
+    """Erro do cliente, respondido com o status indicado."""
+    def __init__(self, mensagem, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(mensagem)
+        self.status = status
+
+class Pedido:
+    def __init__(self, consultas, vetor_pesos, k, voto, futuro):
+        self.consultas = consultas  # Matriz (consultas x atributos) na escala da base
+        self.vetor_pesos = vetor_pesos  # Vetor de pesos alinhado com os atributos
+        self.k = k
+        self.voto = voto
+        self.futuro = futuro  # asyncio.Future que recebe a lista de resultados
+
+class ServicoDeRecuperacao:
+    """
+    Recuperação sobre uma BaseDeCasos carregada uma única vez, com pedidos concorrentes
+    reunidos em micro-lotes.
+    
+    Os pedidos que chegam enquanto um lote é processado (ou dentro da janela de espera)
+    formam o lote seguinte. Os pedidos de um lote com os mesmos pesos viram uma única
+    chamada a recuperar_lote, com o maior k entre eles; como os vizinhos vêm em ordem de
+    similaridade, os de cada pedido são um prefixo dessa resposta. Os lotes são
+    processados um de cada vez, fora do laço de eventos, então a base nunca é usada por
+    duas threads ao mesmo tempo.
+    """
+    def __init__(self, base, janela=JANELA_PADRAO, max_lote=MAX_LOTE_PADRAO):
+        """
+        :param base: BaseDeCasos usada nas consultas.
+        :param janela: Tempo (s) de espera por outros pedidos antes de processar um lote.
+        :param max_lote: Número de consultas que encerra a espera antecipadamente.
+        """
+        self.base = base
+        self.janela = janela
+        self.max_lote = max_lote
+        self.fila = None  # asyncio.Queue criada em iniciar, no laço de eventos do servidor
+        self.tarefa = None
+        self.lotes = 0  # Lotes processados
+        self.pedidos = 0  # Pedidos atendidos
+        self.consultas = 0  # Consultas (casos de entrada) atendidas
+
+    def iniciar(self):
+        """Inicia o processamento dos lotes no laço de eventos atual."""
+        self.fila = asyncio.Queue()
+        self.tarefa = asyncio.get_running_loop().create_task(self.processar_lotes())
+
+    async def encerrar(self):
+        """Interrompe o processamento dos lotes."""
+        if self.tarefa is not None:
+            self.tarefa.cancel()
+            try:
+                await self.tarefa
+            except asyncio.CancelledError:
+                pass
+            self.tarefa = None
+
+    def vetorizar(self, casos, pesos):
+        """
+        Converte os casos e pesos recebidos em JSON em arrays alinhados com os atributos da base.
+        
+        Os valores chegam na escala original; em bases normalizadas, são normalizados aqui.
+        
+        :param casos: Lista de dicionários atributo -> valor (todos os atributos da base).
+        :param pesos: Dicionário atributo -> peso (atributos ausentes têm peso 1).
+        :return: Tupla (matriz de consultas, vetor de pesos).
+        """
+        atributos = self.base.atributos_relevantes
+        if not isinstance(pesos, dict):
+            raise ErroDeRequisicao("'pesos' deve ser um objeto atributo -> peso.")
+        desconhecidos = [attr for attr in pesos if attr not in atributos]
+        if desconhecidos:
+            raise ErroDeRequisicao(f"Atributos desconhecidos em 'pesos': {', '.join(desconhecidos)}")
+        try:
+            vetor_pesos = np.array([float(pesos.get(attr, 1)) for attr in atributos])
+        except (TypeError, ValueError):
+            raise ErroDeRequisicao("Valores não numéricos em 'pesos'.")
+        consultas = np.empty((len(casos), len(atributos)))
+        for i, caso in enumerate(casos):
+            if not isinstance(caso, dict):
+                raise ErroDeRequisicao(f"O caso {i} deve ser um objeto atributo -> valor.")
+            ausentes = [attr for attr in atributos if attr not in caso]
+            if ausentes:
+                raise ErroDeRequisicao(f"Atributos ausentes no caso {i}: {', '.join(ausentes)}")
+            try:
+                consultas[i] = [float(caso[attr]) for attr in atributos]
+            except (TypeError, ValueError):
+                raise ErroDeRequisicao(f"Valores não numéricos no caso {i}.")
+        if not np.isfinite(consultas).all() or not np.isfinite(vetor_pesos).all() or (vetor_pesos < 0).any():
+            raise ErroDeRequisicao("Valores e pesos devem ser finitos, e os pesos não negativos.")
+        if self.base.normalizador is not None:
+            consultas = self.base.normalizador.transformar_matriz(consultas)
+        return consultas, vetor_pesos
+
+    async def recuperar(self, casos, pesos, k=5, voto='maioria'):
+        """
+        Recupera os k casos mais similares de cada caso de entrada e vota o diagnóstico.
+        
+        :param casos: Lista de dicionários atributo -> valor, na escala original dos dados.
+        :param pesos: Dicionário atributo -> peso.
+        :param k: Número de vizinhos por caso.
+        :param voto: 'maioria' ou 'ponderado' (ver votar_diagnostico).
+        :return: Lista com um dicionário {'diagnostico', 'vizinhos'} por caso.
+        """
+        if isinstance(k, bool) or not isinstance(k, int) or k <= 0:
+            raise ErroDeRequisicao("'k' deve ser um inteiro positivo.")
+        if voto not in ('maioria', 'ponderado'):
+            raise ErroDeRequisicao("'voto' deve ser 'maioria' ou 'ponderado'.")
+        consultas, vetor_pesos = self.vetorizar(casos, pesos)
+        if not len(consultas):
+            return []
+        futuro = asyncio.get_running_loop().create_future()
+        await self.fila.put(Pedido(consultas, vetor_pesos, min(k, len(self.base.matriz)), voto, futuro))
+        return await futuro
+
+    async def processar_lotes(self):
+        """Reúne os pedidos da fila em lotes e os processa em uma thread, um lote por vez."""
+        laco = asyncio.get_running_loop()
+        while True:
+            lote = [await self.fila.get()]
+            n_consultas = len(lote[0].consultas)
+            prazo = laco.time() + self.janela
+            while n_consultas < self.max_lote:
+                try:
+                    if self.fila.empty():
+                        espera = prazo - laco.time()
+                        if espera <= 0:
+                            break
+                        pedido = await asyncio.wait_for(self.fila.get(), espera)
+                    else:
+                        pedido = self.fila.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+                lote.append(pedido)
+                n_consultas += len(pedido.consultas)
+
+            try:
+                respostas = await laco.run_in_executor(None, self.executar_lote, lote)
+            except Exception as e:
+                for pedido in lote:
+                    if not pedido.futuro.done():
+                        pedido.futuro.set_exception(e)
+                continue
+            for pedido, resposta in zip(lote, respostas):
+                # O cliente pode ter desistido (conexão encerrada) enquanto o lote era processado
+                if not pedido.futuro.done():
+                    pedido.futuro.set_result(resposta)
+            self.lotes += 1
+            self.pedidos += len(lote)
+            self.consultas += n_consultas
+
+    def executar_lote(self, lote):
+        """
+        Processa um lote de pedidos com uma chamada a recuperar_lote por vetor de pesos.
+        
+        :param lote: Lista de objetos Pedido.
+        :return: Lista com a resposta de cada pedido (ver recuperar).
+        """
+        grupos = {}
+        for posicao, pedido in enumerate(lote):
+            grupos.setdefault(pedido.vetor_pesos.tobytes(), []).append(posicao)
+
+        respostas = [None] * len(lote)
+        base = self.base
+        for posicoes in grupos.values():
+            pedidos = [lote[p] for p in posicoes]
+            vetor_pesos = pedidos[0].vetor_pesos
+            pesos = dict(zip(base.atributos_relevantes, vetor_pesos))
+            k = max(pedido.k for pedido in pedidos)
+            resultado = base.recuperar_lote(np.vstack([pedido.consultas for pedido in pedidos]), pesos, k=k)
+            inicio = 0
+            for posicao, pedido in zip(posicoes, pedidos):
+                fim = inicio + len(pedido.consultas)
+                respostas[posicao] = [
+                    self.montar_resposta(resultado, i, pedido.k, pedido.voto) for i in range(inicio, fim)
+                ]
+                inicio = fim
+        return respostas
+
+    def montar_resposta(self, resultado, i, k, voto):
+        """Resposta JSON de uma consulta a partir dos k primeiros vizinhos da linha i do ResultadoLote."""
+        ids = resultado.ids[i, :k]
+        diagnosticos = resultado.diagnosticos_vizinhos[i, :k]
+        similaridades = resultado.similaridades[i, :k]
+        return {
+            'diagnostico': str(votar_diagnostico(diagnosticos, similaridades, voto)),
+            'vizinhos': [
+                {'id': caso_id.item() if isinstance(caso_id, np.generic) else caso_id,
+                 'diagnostico': str(diagnostico), 'similaridade': float(sim)}
+                for caso_id, diagnostico, sim in zip(ids, diagnosticos, similaridades)
+            ],
+        }
+
+    def estado(self):
+        """Informações da base e contadores do serviço."""
+        return {
+            'casos': len(self.base.matriz),
+            'atributos': list(self.base.atributos_relevantes),
+            'metrica': self.base.nome_metrica,
+            'normalizar': self.base.normalizador is not None,
+            'lotes': self.lotes,
+            'pedidos': self.pedidos,
+            'consultas': self.consultas,
+        }
+
+class ServidorHTTP:
+    """
+    Servidor HTTP/1.1 mínimo (asyncio, sem dependências) com a API JSON do serviço.
+    
+    Rotas:
+      GET  /estado     -> informações da base e contadores (ServicoDeRecuperacao.estado)
+      POST /recuperar  -> {"caso": {...}} ou {"casos": [{...}, ...]}, com "pesos", "k" e "voto"
+                          opcionais; responde {"resultados": [...]} (ver ServicoDeRecuperacao.recuperar)
+    """
+    def __init__(self, servico, host='127.0.0.1', porta=8000):
+        self.servico = servico
+        self.host = host
+        self.porta = porta
+        self.servidor = None
+
+    async def iniciar(self):
+        """Abre o socket e inicia o serviço; com porta 0, a porta escolhida fica em self.porta."""
+        self.servico.iniciar()
+        self.servidor = await asyncio.start_server(self.atender, self.host, self.porta)
+        self.porta = self.servidor.sockets[0].getsockname()[1]
+
+    async def encerrar(self):
+        """Fecha o socket e interrompe o serviço."""
+        if self.servidor is not None:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+            self.servidor = None
+        await self.servico.encerrar()
+
+    async def atender(self, leitor, escritor):
+        """Atende as requisições de uma conexão (mantida aberta entre requisições, como no HTTP/1.1)."""
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, caminho, versao = linha.decode('latin-1').split()
+                except ValueError:
+                    await self.responder(escritor, HTTPStatus.BAD_REQUEST, {'erro': "Linha de requisição inválida."}, False)
+                    break
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+
+                try:
+                    tamanho = int(cabecalhos.get('content-length', 0))
+                except ValueError:
+                    tamanho = -1
+                if tamanho < 0 or tamanho > MAX_CORPO:
+                    await self.responder(escritor, HTTPStatus.REQUEST_ENTITY_TOO_LARGE if tamanho > 0 else HTTPStatus.BAD_REQUEST,
+                                         {'erro': "Content-Length inválido ou grande demais."}, False)
+                    break
+                corpo = await leitor.readexactly(tamanho) if tamanho else b''
+
+                try:
+                    status, resposta = HTTPStatus.OK, await self.rotear(metodo, caminho.split('?')[0], corpo)
+                except ErroDeRequisicao as e:
+                    status, resposta = e.status, {'erro': str(e)}
+                except Exception as e:
+                    status, resposta = HTTPStatus.INTERNAL_SERVER_ERROR, {'erro': f"{type(e).__name__}: {e}"}
+                await self.responder(escritor, status, resposta, manter)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def rotear(self, metodo, caminho, corpo):
+        """
+        Executa a rota da requisição.
+        
+        :return: Objeto JSON da resposta.
+        """
+        if caminho == '/estado':
+            if metodo != 'GET':
+                raise ErroDeRequisicao("Use GET em /estado.", HTTPStatus.METHOD_NOT_ALLOWED)
+            return self.servico.estado()
+        if caminho == '/recuperar':
+            if metodo != 'POST':
+                raise ErroDeRequisicao("Use POST em /recuperar.", HTTPStatus.METHOD_NOT_ALLOWED)
+            try:
+                dados = json.loads(corpo)
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                raise ErroDeRequisicao("O corpo deve ser um JSON válido.")
+            if not isinstance(dados, dict) or ('caso' in dados) == ('casos' in dados):
+                raise ErroDeRequisicao("Informe 'caso' (um objeto) ou 'casos' (uma lista de objetos).")
+            casos = [dados['caso']] if 'caso' in dados else dados['casos']
+            if not isinstance(casos, list):
+                raise ErroDeRequisicao("'casos' deve ser uma lista.")
+            resultados = await self.servico.recuperar(casos, dados.get('pesos', {}), dados.get('k', 5), dados.get('voto', 'maioria'))
+            return {'resultados': resultados}
+        raise ErroDeRequisicao(f"Rota desconhecida: {caminho}", HTTPStatus.NOT_FOUND)
+
+    async def responder(self, escritor, status, resposta, manter):
+        """Envia uma resposta JSON."""
+        corpo = json.dumps(resposta, ensure_ascii=False).encode('utf-8')
+        cabecalhos = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n"
+        )
+        escritor.write(cabecalhos.encode('latin-1') + corpo)
+        await escritor.drain()
+
+async def servir(base, host, porta, janela=JANELA_PADRAO, max_lote=MAX_LOTE_PADRAO):
+    """Executa o servidor até ser interrompido."""
+    servidor = ServidorHTTP(ServicoDeRecuperacao(base, janela, max_lote), host, porta)
+    await servidor.iniciar()
+    print(f"Servindo {len(base.matriz)} casos em http://{servidor.host}:{servidor.porta}")
+    try:
+        await servidor.servidor.serve_forever()
+    finally:
+        await servidor.encerrar()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP/JSON de recuperação de casos similares.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8000)
+    parser.add_argument('--base', default=None, help="Diretório de uma base salva por BaseDeCasos.salvar (padrão: dados da UCI).")
+    parser.add_argument('--normalizar', action='store_true', help="Usa a base normalizada (Min-Max); as consultas continuam na escala original.")
+    parser.add_argument('--metrica', default='euclidiana')
+    parser.add_argument('--indice', default=None, help="Índice espacial (ex.: kdtree).")
+    parser.add_argument('--janela-ms', type=float, default=JANELA_PADRAO * 1000, help="Espera por outros pedidos antes de processar um lote.")
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE_PADRAO, help="Número máximo de consultas por lote.")
+    args = parser.parse_args()
+
+    if args.base:
+        base = BaseDeCasos.carregar(args.base, indice=args.indice, metrica=args.metrica)
+    else:
+        data = load_data()
+        atributos = [coluna for coluna in data.columns if coluna not in ('ID', 'Diagnosis')]
+        base = BaseDeCasos(data, atributos, indice=args.indice, metrica=args.metrica)
+    base = base.com_normalizacao(args.normalizar)
+    # Ajustar as estatísticas da métrica antes do primeiro pedido
+    base.metrica_preparada()
+    try:
+        asyncio.run(servir(base, args.host, args.porta, args.janela_ms / 1000, args.max_lote))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,193 @@
 # src/utils.py
 
+import weakref
+import numpy as np
 import pandas as pd
-from ucimlrepo import fetch_ucirepo
+from src.cache_dados import carregar_dataset
+from src.instrumentacao import medir
 
-def load_data():
+def load_data(caminho=None, atualizar=False):
     """
     Carrega o conjunto de dados Breast Cancer Wisconsin (Diagnostic) da UCI Machine Learning Repository.
     
+    Os dados são lidos primeiro do cache local (ver src/cache_dados.py) e só são buscados
+    na rede quando o cache não existe ou quando atualizar é True.
+    
+    :param caminho: Arquivo local (.csv, .parquet, .xlsx) a usar no lugar do cache e da rede.
+    :param atualizar: Se True, baixa novamente os dados e atualiza o cache.
     :return: DataFrame contendo os dados com colunas renomeadas e um ID sequencial.
     """
-    # Buscar o dataset Breast Cancer Wisconsin (Diagnostic) usando o ID da UCI
-    breast_cancer_wisconsin_diagnostic = fetch_ucirepo(id=17)
-    
-    # Extrair as features e os targets
-    X = breast_cancer_wisconsin_diagnostic.data.features
-    y = breast_cancer_wisconsin_diagnostic.data.targets
-    
-    # Combinar features e targets em um único DataFrame
-    data = X.copy()
-    data['Diagnosis'] = y['Diagnosis']
-    data['ID'] = range(1, len(data) + 1)  # Criar um ID sequencial
-    
-    # Reorganizar as colunas para ter ID e Diagnosis primeiro
-    cols = ['ID', 'Diagnosis'] + [col for col in data.columns if col not in ['ID', 'Diagnosis']]
-    data = data[cols]
-    
-    # Renomear as colunas para corresponder aos nomes esperados
-    base_features = [
-        'radius', 'texture', 'perimeter', 'area', 'smoothness',
-        'compactness', 'concavity', 'concave_points', 'symmetry', 'fractal_dimension'
-    ]
-    suffixes = {1: 'mean', 2: 'se', 3: 'worst'}
-    new_columns = {}
+    with medir('carregar_dados'):
+        metadados, data = carregar_dataset(caminho, atualizar)
+    return data
+
+class NormalizadorMinMax:
+    """
+    Normalizador Min-Max ajustado uma única vez: as estatísticas de cada coluna são
+    calculadas na construção e reutilizadas em todas as transformações.
+    """
+    def __init__(self, dataframe, atributos=None):
+        """
+        :param dataframe: DataFrame contendo os dados da base.
+        :param atributos: Lista de atributos a ajustar (None para todas as colunas numéricas).
+        """
+        if atributos is None:
+            atributos = list(dataframe.select_dtypes(include='number').columns)
+        self.atributos = list(atributos)
+        self.ajustar_estatisticas(*self.calcular_estatisticas(dataframe[self.atributos]))
+
+    @classmethod
+    def a_partir_de_estatisticas(cls, atributos, *estatisticas):
+        """
+        Cria um normalizador a partir de estatísticas já calculadas (ex.: lidas de uma base salva em disco).
+        
+        :param atributos: Lista de atributos, na ordem das estatísticas.
+        :param estatisticas: Vetores na ordem de ajustar_estatisticas (mínimos e máximos, ou médias e desvios).
+        :return: Normalizador ajustado.
+        """
+        normalizador = cls.__new__(cls)
+        normalizador.atributos = list(atributos)
+        normalizador.ajustar_estatisticas(*(np.asarray(e, dtype=np.float64) for e in estatisticas))
+        return normalizador
+
+    def calcular_estatisticas(self, valores):
+        """
+        Calcula as estatísticas de cada coluna em uma única passada por estatística.
+        
+        :param valores: DataFrame apenas com as colunas a ajustar.
+        :return: Tupla (mínimos, máximos).
+        """
+        return valores.min().to_numpy(dtype=np.float64), valores.max().to_numpy(dtype=np.float64)
+
+    def ajustar_estatisticas(self, minimos, maximos):
+        """
+        Define as estatísticas e prepara o deslocamento e a escala usados nas transformações.
+        
+        :param minimos: Vetor com o mínimo de cada atributo.
+        :param maximos: Vetor com o máximo de cada atributo.
+        """
+        self.minimos = minimos
+        self.maximos = maximos
+        amplitudes = maximos - minimos
+        self.deslocamento = minimos
+        # Colunas constantes são levadas a 0.0, evitando divisão por zero
+        self.escala = np.divide(1.0, amplitudes, out=np.zeros_like(amplitudes), where=amplitudes != 0)
+        self.posicoes = {attr: j for j, attr in enumerate(self.atributos)}
+
+    def transformar(self, entrada):
+        """
+        Normaliza um dicionário de atributos.
+        
+        :param entrada: Dicionário de atributos e seus respectivos valores de entrada.
+        :return: Dicionário de atributos normalizados.
+        """
+        normalized = {}
+        for attr, val in entrada.items():
+            j = self.posicoes[attr]
+            normalized[attr] = float((val - self.deslocamento[j]) * self.escala[j])
+        return normalized
+
+    def transformar_matriz(self, matriz):
+        """
+        Normaliza, de forma vetorizada, uma matriz com colunas na ordem de self.atributos.
+        
+        :param matriz: Matriz (casos x atributos).
+        :return: Nova matriz normalizada.
+        """
+        return (np.asarray(matriz, dtype=np.float64) - self.deslocamento) * self.escala
+
+    def reverter_matriz(self, matriz):
+        """
+        Desfaz a normalização de uma matriz (colunas constantes voltam ao seu único valor).
+        
+        :param matriz: Matriz normalizada (casos x atributos).
+        :return: Nova matriz na escala original.
+        """
+        return np.asarray(matriz, dtype=np.float64) * (self.maximos - self.minimos) + self.minimos
+
+    def transformar_dataframe(self, dataframe):
+        """
+        Retorna uma cópia do DataFrame com os atributos ajustados normalizados.
+        
+        :param dataframe: DataFrame com (pelo menos) as colunas de self.atributos.
+        :return: Novo DataFrame.
+        """
+        dataframe = dataframe.copy()
+        dataframe[self.atributos] = self.transformar_matriz(dataframe[self.atributos].to_numpy(dtype=np.float64))
+        return dataframe
+
+class NormalizadorZScore(NormalizadorMinMax):
+    """
+    Normalizador Z-Score ajustado uma única vez (média e desvio padrão amostral de cada coluna).
+    """
+    def calcular_estatisticas(self, valores):
+        """
+        Calcula as estatísticas de cada coluna em uma única passada por estatística.
+        
+        :param valores: DataFrame apenas com as colunas a ajustar.
+        :return: Tupla (médias, desvios padrão).
+        """
+        return valores.mean().to_numpy(dtype=np.float64), valores.std().to_numpy(dtype=np.float64)
+
+    def ajustar_estatisticas(self, medias, desvios):
+        """
+        Define as estatísticas e prepara o deslocamento e a escala usados nas transformações.
+        
+        :param medias: Vetor com a média de cada atributo.
+        :param desvios: Vetor com o desvio padrão de cada atributo.
+        """
+        self.medias = medias
+        self.desvios = desvios
+        self.deslocamento = medias
+        # Colunas com desvio padrão zero são levadas a 0.0, evitando divisão por zero
+        self.escala = np.divide(1.0, desvios, out=np.zeros_like(desvios), where=desvios != 0)
+        self.posicoes = {attr: j for j, attr in enumerate(self.atributos)}
+
+    def reverter_matriz(self, matriz):
+        """
+        Desfaz a normalização de uma matriz (colunas com desvio zero voltam à média).
+        
+        :param matriz: Matriz normalizada (casos x atributos).
+        :return: Nova matriz na escala original.
+        """
+        return np.asarray(matriz, dtype=np.float64) * self.desvios + self.medias
+
+# Normalizadores já ajustados, por (id do DataFrame, classe do normalizador): tuplas
+# (forma e colunas do DataFrame no ajuste, normalizador)
+_normalizadores = {}
+
+def obter_normalizador(dataframe, classe=NormalizadorMinMax):
+    """
+    Retorna um normalizador ajustado ao DataFrame, calculando as estatísticas apenas na primeira chamada.
     
-    for feature in base_features:
-        for i in [1, 2, 3]:
-            old_name = f'{feature}{i}'
-            new_name = f'{feature.capitalize()}_{suffixes[i]}'
-            new_columns[old_name] = new_name
+    Linhas ou colunas acrescentadas ao próprio objeto mudam sua forma e as estatísticas são
+    recalculadas; valores alterados no próprio objeto (df.loc[...] = ...) não são detectados,
+    pois isso exigiria percorrer os dados a cada chamada: quem altera o DataFrame chama
+    limpar_normalizadores. O cache é descartado automaticamente quando o DataFrame é coletado.
     
-    data = data.rename(columns=new_columns)
+    :param dataframe: DataFrame contendo os dados da base.
+    :param classe: NormalizadorMinMax ou NormalizadorZScore.
+    :return: Normalizador ajustado.
+    """
+    chave = (id(dataframe), classe)
+    estrutura = (dataframe.shape, tuple(dataframe.columns))
+    em_cache = _normalizadores.get(chave)
+    if em_cache is None or em_cache[0] != estrutura:
+        if em_cache is None:
+            weakref.finalize(dataframe, _normalizadores.pop, chave, None)
+        with medir('ajuste_normalizador'):
+            _normalizadores[chave] = (estrutura, classe(dataframe))
+    return _normalizadores[chave][1]
+
+def limpar_normalizadores(dataframe=None):
+    """
+    Descarta os normalizadores em cache de um DataFrame (ou de todos, se dataframe for None).
     
-    return data
+    :param dataframe: DataFrame cujos normalizadores devem ser descartados.
+    """
+    for chave in list(_normalizadores):
+        if dataframe is None or chave[0] == id(dataframe):
+            del _normalizadores[chave]
 
 def normalize_data(dataframe, entrada):
     """
@@ -51,16 +197,8 @@ def normalize_data(dataframe, entrada):
     :param entrada: Dicionário de atributos e seus respectivos valores de entrada.
     :return: Dicionário de atributos normalizados.
     """
-    normalized = {}
-    for attr, val in entrada.items():
-        min_val = dataframe[attr].min()
-        max_val = dataframe[attr].max()
-        if max_val - min_val != 0:
-            normalized_val = (val - min_val) / (max_val - min_val)
-        else:
-            normalized_val = 0.0  # Evita divisão por zero se todos os valores forem iguais
-        normalized[attr] = normalized_val
-    return normalized
+    with medir('normalizacao_entrada'):
+        return obter_normalizador(dataframe, NormalizadorMinMax).transformar(entrada)
 
 def zscore_normalize(dataframe, entrada):
     """
@@ -70,13 +208,5 @@ def zscore_normalize(dataframe, entrada):
     :param entrada: Dicionário de atributos e seus respectivos valores de entrada.
     :return: Dicionário de atributos normalizados.
     """
-    normalized = {}
-    for attr, val in entrada.items():
-        mean_val = dataframe[attr].mean()
-        std_val = dataframe[attr].std()
-        if std_val != 0:
-            normalized_val = (val - mean_val) / std_val
-        else:
-            normalized_val = 0.0  # Evita divisão por zero se o desvio padrão for zero
-        normalized[attr] = normalized_val
-    return normalized
+    with medir('normalizacao_entrada'):
+        return obter_normalizador(dataframe, NormalizadorZScore).transformar(entrada)
@@ -1,40 +1,11 @@
 # src/visualize_dataset.py
 
 import pandas as pd
-from ucimlrepo import fetch_ucirepo
+from src.cache_dados import carregar_dataset
 
 def load_and_prepare_data():
-    # Carregar o dataset Breast Cancer Wisconsin (Diagnostic) usando seu ID no UCI
-    dataset = fetch_ucirepo(id=17)
-    
-    # Extrair as features e os targets
-    X = dataset.data.features
-    y = dataset.data.targets
-    
-    # Combinar features e targets em um único DataFrame
-    data = X.copy()
-    data['Diagnosis'] = y['Diagnosis']
-    data['ID'] = range(1, len(data) + 1)  # Criar um ID sequencial
-    
-    # Reorganizar as colunas para ter ID e Diagnosis primeiro
-    cols = ['ID', 'Diagnosis'] + [col for col in data.columns if col not in ['ID', 'Diagnosis']]
-    data = data[cols]
-    
-    # Renomear as colunas para corresponder aos nomes esperados
-    base_features = [
-        'radius', 'texture', 'perimeter', 'area', 'smoothness',
-        'compactness', 'concavity', 'concave_points', 'symmetry', 'fractal_dimension'
-    ]
-    suffixes = {1: 'mean', 2: 'se', 3: 'worst'}
-    new_columns = {}
-    
-    for feature in base_features:
-        for i in [1, 2, 3]:
-            old_name = f'{feature}{i}'
-            new_name = f'{feature.capitalize()}_{suffixes[i]}'
-            new_columns[old_name] = new_name
-    
-    data = data.rename(columns=new_columns)
+    # Carregar o dataset Breast Cancer Wisconsin (Diagnostic) do cache local (ou da UCI, na primeira execução)
+    dataset, data = carregar_dataset()
     
     return dataset, data
 
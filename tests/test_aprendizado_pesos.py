@@ -0,0 +1,66 @@
+# tests/test_aprendizado_pesos.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.aprendizado_pesos import TermosPareados, aprender_pesos, avaliar_somas, carregar_pesos, salvar_pesos
+from src.avaliacao import avaliar_loo
+from src.cbr import BaseDeCasos
+from benchmarks.sintetico import ATRIBUTOS, gerar_base
+
+def base_com_repetidos(metrica, normalizar=False):
+    """Base pequena com casos repetidos (empates de distância) e diagnósticos trocados em alguns."""
+    data = gerar_base(150, semente=2)
+    repetidos = data.iloc[::10].copy()
+    repetidos['ID'] = np.arange(1000, 1000 + len(repetidos))
+    repetidos.loc[repetidos.index[::2], 'Diagnosis'] = repetidos['Diagnosis'].map({'M': 'B', 'B': 'M'})
+    return BaseDeCasos(pd.concat([data, repetidos], ignore_index=True), ATRIBUTOS, normalizar=normalizar, metrica=metrica)
+
+@pytest.mark.parametrize('metrica', ['euclidiana', 'manhattan', 'local_global'])
+@pytest.mark.parametrize('k', [1, 4, 5])
+@pytest.mark.parametrize('normalizar', [False, True])
+def test_objetivo_igual_a_acuracia_leave_one_out(metrica, k, normalizar):
+    base = base_com_repetidos(metrica, normalizar)
+    termos = TermosPareados(base)
+    rng = np.random.default_rng(k)
+    for _ in range(3):
+        vetor_pesos = rng.choice([0.0, 0.5, 1.0, 2.0], len(ATRIBUTOS))
+        acertos, _ = avaliar_somas(termos.somar(vetor_pesos), termos, vetor_pesos, k)
+        resultado = avaliar_loo(base, dict(zip(ATRIBUTOS, vetor_pesos)), k=k, processos=1)
+        assert acertos == int(np.sum(resultado.reais == resultado.previstos))
+
+def test_pesos_aprendidos_nao_pioram_a_acuracia_reportada():
+    base = base_com_repetidos('euclidiana')
+    uniformes = {attr: 1.0 for attr in ATRIBUTOS}
+    resultado = aprender_pesos(base, uniformes, k=4, max_rodadas=2)
+    antes = avaliar_loo(base, uniformes, k=4, processos=1)
+    depois = avaliar_loo(base, resultado.pesos, k=4, processos=1)
+    assert resultado.acuracia == depois.acuracia
+    assert depois.acuracia >= antes.acuracia
+
+def test_atributo_de_ruido_dominante_perde_peso():
+    data = gerar_base(150, semente=4)
+    # Ruído em escala muito maior que a dos demais atributos domina a distância euclidiana
+    data[ATRIBUTOS[0]] = np.random.default_rng(9).normal(0.0, 1000.0, len(data))
+    base = BaseDeCasos(data, ATRIBUTOS)
+    uniformes = {attr: 1.0 for attr in ATRIBUTOS}
+    resultado = aprender_pesos(base, uniformes, k=5, max_rodadas=1)
+    assert resultado.pesos[ATRIBUTOS[0]] < 1.0
+    assert resultado.acuracia > avaliar_loo(base, uniformes, k=5, processos=1).acuracia
+
+def test_metrica_nao_aditiva_rejeitada():
+    with pytest.raises(ValueError, match='aditiva'):
+        TermosPareados(BaseDeCasos(gerar_base(20), ATRIBUTOS, metrica='cosseno'))
+
+def test_arquivo_de_pesos_salvo_e_carregado(tmp_path):
+    pesos = {attr: float(i) / 4 for i, attr in enumerate(ATRIBUTOS)}
+    salvar_pesos(tmp_path / 'pesos.json', pesos, True, 'manhattan', k=5, acuracia=0.9)
+    conteudo = carregar_pesos(tmp_path / 'pesos.json')
+    assert conteudo == {'pesos': pesos, 'normalizar': True, 'metrica': 'manhattan', 'k': 5, 'acuracia': 0.9}
+
+    # Arquivos só com os pesos usam a base original e a métrica euclidiana
+    (tmp_path / 'simples.json').write_text('{"pesos": {"radius1": 2}}', encoding='utf-8')
+    assert carregar_pesos(tmp_path / 'simples.json') == {'pesos': {'radius1': 2.0}, 'normalizar': False, 'metrica': 'euclidiana'}
+    (tmp_path / 'invalido.json').write_text('[1, 2]', encoding='utf-8')
+    with pytest.raises(ValueError, match='inválido'):
+        carregar_pesos(tmp_path / 'invalido.json')
@@ -0,0 +1,52 @@
+# tests/test_avaliacao.py
+
+import numpy as np
+import pytest
+from src.avaliacao import avaliar, avaliar_loo
+from src.cbr import BaseDeCasos
+from benchmarks.sintetico import ATRIBUTOS, gerar_base
+
+PESOS = {attr: 1.0 for attr in ATRIBUTOS}
+
+def previstos_por_treino(data, grupos, metrica, k, voto, normalizar=False):
+    """Referência: para cada grupo, uma base só com os casos de treino (métrica e normalização ajustadas a eles)."""
+    previstos = np.empty(len(data), dtype=object)
+    for grupo in np.unique(grupos):
+        teste = grupos == grupo
+        treino = BaseDeCasos(data[~teste].reset_index(drop=True), ATRIBUTOS, normalizar=normalizar, metrica=metrica)
+        consultas = data[teste][ATRIBUTOS].to_numpy()
+        if normalizar:
+            consultas = treino.normalizador.transformar_matriz(consultas)
+        previstos[teste] = treino.recuperar_lote(consultas, PESOS, k=k, voto=voto).diagnosticos
+    return previstos
+
+@pytest.mark.parametrize('metrica', ['mahalanobis', 'local_global', 'euclidiana'])
+@pytest.mark.parametrize('processos', [1, 2])
+def test_kfold_ajusta_metrica_so_nos_grupos_de_treino(metrica, processos):
+    data = gerar_base(90, semente=3)
+    base = BaseDeCasos(data, ATRIBUTOS, metrica=metrica)
+    grupos = np.arange(len(data)) % 3
+    resultado = avaliar(base, PESOS, grupos, k=1, processos=processos)
+    assert list(resultado.previstos) == list(previstos_por_treino(data, grupos, metrica, 1, 'maioria'))
+
+def test_loo_com_metrica_ajustada_em_lotes_de_grupos():
+    data = gerar_base(60, semente=5)
+    base = BaseDeCasos(data, ATRIBUTOS, metrica='mahalanobis')
+    # Mais grupos que 4 x processos: cada tarefa reúne vários casos, cada um com seu ajuste
+    resultado = avaliar_loo(base, PESOS, k=3, voto='ponderado', processos=2)
+    esperado = previstos_por_treino(data, np.arange(len(data)), 'mahalanobis', 3, 'ponderado')
+    assert list(resultado.previstos) == list(esperado)
+
+# A local-global e a Mahalanobis não mudam com a escala dos atributos; estas mudam
+@pytest.mark.parametrize('metrica', ['euclidiana', 'cosseno'])
+def test_normalizacao_ajustada_so_nos_grupos_de_treino(metrica):
+    data = gerar_base(90, semente=7)
+    base = BaseDeCasos(data, ATRIBUTOS, normalizar=True, metrica=metrica)
+    grupos = np.arange(len(data)) % 3
+    resultado = avaliar(base, PESOS, grupos, k=3, processos=2)
+    assert list(resultado.previstos) == list(previstos_por_treino(data, grupos, metrica, 3, 'maioria', normalizar=True))
+
+    # Leave-one-out: os casos extremos em algum atributo são classificados com a normalização refeita
+    resultado = avaliar_loo(base, PESOS, k=3, processos=1)
+    esperado = previstos_por_treino(data, np.arange(len(data)), metrica, 3, 'maioria', normalizar=True)
+    assert list(resultado.previstos) == list(esperado)
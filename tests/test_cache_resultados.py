@@ -0,0 +1,40 @@
+# tests/test_cache_resultados.py
+
+import numpy as np
+from src.cbr import BaseDeCasos, Caso
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+PESOS = {attr: 1.0 for attr in ATRIBUTOS}
+
+def caso_de_consulta(semente=1):
+    linha = gerar_consultas(1, semente=semente)[ATRIBUTOS].to_numpy()[0]
+    return Caso('Entrada', '?', dict(zip(ATRIBUTOS, linha)))
+
+def test_alterar_n_sondas_nao_reaproveita_resultado_antigo():
+    base = BaseDeCasos(gerar_base(3000), ATRIBUTOS, indice='ivf', opcoes_indice={'n_listas': 50, 'n_sondas': 1})
+    caso = caso_de_consulta()
+    base.recuperar(caso, PESOS, k=10)
+    base.indice.n_sondas = 50  # Todas as listas: resultado exato
+    exato = base.recuperar(caso, PESOS, k=10)
+    assert base.cache_resultados.acertos == 0
+    indice = base.indice
+    base.indice = None
+    linear = base.recuperar(caso, PESOS, k=10)
+    assert base.cache_resultados.acertos == 0
+    np.testing.assert_array_equal(exato.indices, linear.indices)
+
+    # Com o mesmo índice e os mesmos parâmetros, a consulta repetida vem do cache
+    base.indice = indice
+    assert base.recuperar(caso, PESOS, k=10) is exato
+    assert base.cache_resultados.acertos == 1
+
+def test_desligar_indice_entre_consultas_identicas():
+    base = BaseDeCasos(gerar_base(2000), ATRIBUTOS, indice='ivf', opcoes_indice={'n_listas': 40, 'n_sondas': 1})
+    caso = caso_de_consulta(semente=2)
+    aproximado = base.recuperar(caso, PESOS, k=20)
+    base.indice = None
+    linear = base.recuperar(caso, PESOS, k=20)
+    assert linear is not aproximado
+    assert base.cache_resultados.acertos == 0
+    # A lista completa é sempre linear; o top-k linear é o seu prefixo
+    np.testing.assert_array_equal(linear.indices, base.recuperar(caso, PESOS).indices[:20])
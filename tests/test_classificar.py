@@ -0,0 +1,28 @@
+# tests/test_classificar.py
+
+import sys
+import pytest
+from cli import classificar
+from cli.classificar import classificar_arquivo
+from src.cbr import BaseDeCasos
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+@pytest.fixture
+def entrada(tmp_path):
+    caminho = tmp_path / 'entrada.csv'
+    gerar_consultas(5).to_csv(caminho, index=False)
+    return caminho
+
+def test_base_vazia_rejeitada_antes_de_gravar_a_saida(tmp_path, entrada):
+    base = BaseDeCasos(gerar_base(0), ATRIBUTOS)
+    with pytest.raises(ValueError, match='vazia'):
+        classificar_arquivo(base, str(entrada), str(tmp_path / 'saida.csv'), {}, progresso=None)
+    assert not (tmp_path / 'saida.csv').exists()
+
+def test_main_sai_com_mensagem_para_base_vazia(tmp_path, entrada, monkeypatch, capsys):
+    gerar_base(0).to_csv(tmp_path / 'base.csv', index=False)
+    monkeypatch.setattr(sys, 'argv', ['classificar', str(entrada), '--dados', str(tmp_path / 'base.csv'), '--silencioso'])
+    with pytest.raises(SystemExit) as saida:
+        classificar.main()
+    assert saida.value.code != 0
+    assert 'vazia' in capsys.readouterr().err
@@ -0,0 +1,136 @@
+# tests/test_concorrencia.py
+
+import sys
+import threading
+import time
+import numpy as np
+import pytest
+from src.cbr import BaseDeCasos, Caso
+from gui.interface import TarefaDeBusca
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+PESOS = {attr: 1.0 for attr in ATRIBUTOS}
+
+def casos_de_consulta(n):
+    return [Caso('Entrada', '?', dict(zip(ATRIBUTOS, linha))) for linha in gerar_consultas(n)[ATRIBUTOS].to_numpy()]
+
+def referencia(data, metrica, caso, k):
+    return BaseDeCasos(data, ATRIBUTOS, metrica=metrica).recuperar(caso, PESOS, k=k)
+
+def test_troca_de_metrica_durante_consultas_nao_mistura_resultados():
+    data = gerar_base(3000)
+    base = BaseDeCasos(data, ATRIBUTOS)
+    casos = casos_de_consulta(40)
+    parar = threading.Event()
+    erros = []
+
+    def consultar():
+        try:
+            while not parar.is_set():
+                for caso in casos:
+                    base.recuperar(caso, PESOS, k=10)
+                    base.recuperar_lote(np.array([list(caso.atributos.values())]), PESOS, k=10)
+        except Exception as erro:
+            erros.append(erro)
+
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Trocas de thread frequentes, para expor qualquer janela sem trava
+    try:
+        threads = [threading.Thread(target=consultar) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for i in range(500):
+            base.definir_metrica(('euclidiana', 'manhattan', 'cosseno')[i % 3])
+            time.sleep(0.001)
+        parar.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(intervalo)
+    assert not erros
+
+    # Cada resultado guardado no cache corresponde à métrica registrada na sua chave
+    referencias = {}
+    for chave, resultado in list(base.cache_resultados.entradas.items()):
+        metrica, entrada = chave[6], np.frombuffer(chave[0])
+        caso = next(c for c in casos if np.allclose(list(c.atributos.values()), entrada))
+        if (metrica, id(caso)) not in referencias:
+            referencias[metrica, id(caso)] = referencia(data, metrica, caso, 10)
+        np.testing.assert_allclose(resultado.similaridades, referencias[metrica, id(caso)].similaridades)
+
+def test_busca_cancelada_nao_interfere_na_seguinte():
+    data = gerar_base(5000)
+    base = BaseDeCasos(data, ATRIBUTOS)
+    caso = casos_de_consulta(1)[0]
+    anterior = TarefaDeBusca(base, caso, PESOS, metrica='euclidiana')
+    anterior.iniciar()
+    anterior.cancelar()
+    seguinte = TarefaDeBusca(base, caso, PESOS, k=10, metrica='manhattan')
+    seguinte.iniciar()
+    anterior.thread.join()
+    seguinte.thread.join()
+
+    mensagens = []
+    while not seguinte.fila.empty():
+        mensagens.append(seguinte.fila.get())
+    resultado = dict(mensagens)['explicacao']
+    esperado = referencia(data, 'manhattan', caso, 10)
+    np.testing.assert_array_equal(resultado.indices, esperado.indices)
+    np.testing.assert_allclose(resultado.similaridades, esperado.similaridades)
+    assert base.nome_metrica == 'manhattan'
+
+@pytest.mark.parametrize('indice', [None, 'kdtree'])
+def test_insercoes_e_remocoes_durante_consultas(indice):
+    data = gerar_base(3000)
+    base = BaseDeCasos(data, ATRIBUTOS, indice=indice)
+    base.cache_resultados = None
+    matriz = data[ATRIBUTOS].to_numpy()
+    # Valores e diagnóstico de cada ID, incluindo os inseridos (cópias de outros casos)
+    valores = dict(zip(data['ID'], matriz))
+    diagnosticos = dict(zip(data['ID'], data['Diagnosis']))
+    novos = {}
+    for i in range(200):
+        caso_id = 1_000_000 + i
+        novos[caso_id] = Caso(caso_id, 'M' if i % 2 else 'B', dict(zip(ATRIBUTOS, matriz[(7 * i) % 3000])))
+        valores[caso_id] = matriz[(7 * i) % 3000]
+        diagnosticos[caso_id] = novos[caso_id].diagnosis
+    casos = casos_de_consulta(20)
+    parar = threading.Event()
+    erros = []
+
+    def conferir(caso, ids, diags, sims):
+        entrada = np.array(list(caso.atributos.values()))
+        for caso_id, diagnostico, similaridade in zip(ids, diags, sims):
+            assert diagnostico == diagnosticos[caso_id]
+            esperada = 1 / (1 + np.sqrt(np.sum((valores[caso_id] - entrada) ** 2)))
+            assert np.isclose(similaridade, esperada)
+
+    def consultar():
+        try:
+            while not parar.is_set():
+                for caso in casos:
+                    resultado = base.recuperar(caso, PESOS, k=10)
+                    conferir(caso, resultado.ids, resultado.diagnosticos, resultado.similaridades)
+                    lote = base.recuperar_lote(np.array([list(caso.atributos.values())]), PESOS, k=10)
+                    conferir(caso, lote.ids[0], lote.diagnosticos_vizinhos[0], lote.similaridades[0])
+        except Exception as erro:
+            erros.append(erro)
+
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=consultar) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for rodada in range(3):
+            for caso in novos.values():
+                base.adicionar_caso(caso)
+            for caso_id in novos:
+                base.remover_caso(caso_id)
+        parar.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(intervalo)
+    assert not erros, erros[0]
+    assert len(base.ids) == 3000
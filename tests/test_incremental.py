@@ -0,0 +1,51 @@
+# tests/test_incremental.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.cbr import BaseDeCasos, Caso
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+PESOS = dict(zip(ATRIBUTOS, np.random.default_rng(4).uniform(0.1, 2.0, len(ATRIBUTOS))))
+
+def novos_casos(n):
+    """Casos novos com IDs próprios; alguns com valores fora do intervalo da base, que forçam o reescalonamento."""
+    novos = gerar_base(n, semente=11)
+    novos['ID'] = np.arange(10_000, 10_000 + n)
+    novos.loc[novos.index[::7], ATRIBUTOS[0]] *= 3.0
+    novos.loc[novos.index[3::11], ATRIBUTOS[1]] = -1.0
+    return novos
+
+@pytest.mark.parametrize('indice', [None, 'kdtree', 'fragmentado'])
+@pytest.mark.parametrize('normalizar', [False, True])
+def test_insercoes_e_remocoes_iguais_a_reconstruir_a_base(indice, normalizar):
+    data = gerar_base(300, semente=10)
+    novos = novos_casos(60)
+    base = BaseDeCasos(data, ATRIBUTOS, normalizar=normalizar, indice=indice)
+
+    for _, linha in novos.iterrows():
+        base.adicionar_caso(Caso(linha['ID'], linha['Diagnosis'], linha[ATRIBUTOS].to_dict()))
+    # Remove casos que detêm mínimos e máximos (recalculam a normalização) e casos comuns
+    atual = pd.concat([data, novos], ignore_index=True)
+    extremos = set(atual[ATRIBUTOS].idxmin()) | set(atual[ATRIBUTOS].idxmax())
+    removidos = list(atual.loc[sorted(extremos), 'ID']) + list(data['ID'].iloc[5:200:9]) + list(novos['ID'].iloc[::5])
+    for caso_id in dict.fromkeys(removidos):
+        base.remover_caso(caso_id)
+
+    reconstruida = BaseDeCasos(atual[~atual['ID'].isin(removidos)].reset_index(drop=True), ATRIBUTOS,
+                               normalizar=normalizar, indice=indice)
+    for visao, esperada in ((base, reconstruida), (base.com_normalizacao(not normalizar), reconstruida.com_normalizacao(not normalizar))):
+        assert list(visao.ids) == list(esperada.ids)
+        assert list(visao.diagnosticos) == list(esperada.diagnosticos)
+        np.testing.assert_allclose(visao.matriz, esperada.matriz, rtol=1e-12, atol=1e-12)
+        if esperada.normalizador is not None:
+            np.testing.assert_array_equal(visao.normalizador.minimos, esperada.normalizador.minimos)
+            np.testing.assert_array_equal(visao.normalizador.maximos, esperada.normalizador.maximos)
+
+    consultas = gerar_consultas(15)[ATRIBUTOS].to_numpy()
+    if normalizar:
+        consultas = reconstruida.normalizador.transformar_matriz(consultas)
+    obtido = base.recuperar_lote(consultas, PESOS, k=6)
+    esperado = reconstruida.recuperar_lote(consultas, PESOS, k=6)
+    np.testing.assert_array_equal(obtido.ids, esperado.ids)
+    np.testing.assert_allclose(obtido.similaridades, esperado.similaridades, rtol=1e-12)
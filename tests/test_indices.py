@@ -0,0 +1,51 @@
+# tests/test_indices.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.cbr import BaseDeCasos, Caso
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+PESOS = {attr: 1.0 for attr in ATRIBUTOS}
+
+def base_com_repetidos(indice, opcoes_indice=None):
+    """Base com linhas repetidas na construção e casos repetidos inseridos depois (cauda dos índices)."""
+    data = gerar_base(2000)
+    repetidos = data.iloc[np.repeat(np.arange(0, 2000, 50), 3)].copy()
+    repetidos['ID'] = np.arange(10_001, 10_001 + len(repetidos))
+    base = BaseDeCasos(pd.concat([data, repetidos], ignore_index=True), ATRIBUTOS,
+                       indice=indice, opcoes_indice=opcoes_indice)
+    for i, linha in enumerate(data.iloc[::40].itertuples(index=False)):
+        base.adicionar_caso(Caso(20_001 + i, linha.Diagnosis, {attr: getattr(linha, attr) for attr in ATRIBUTOS}))
+    return base
+
+def consultas_empatadas():
+    """Casos repetidos da base (empates no k-ésimo vizinho) e consultas sem empates."""
+    data = gerar_base(2000)
+    linhas = np.vstack([data[ATRIBUTOS].to_numpy()[::50], gerar_consultas(20)[ATRIBUTOS].to_numpy()])
+    return [Caso('Entrada', '?', dict(zip(ATRIBUTOS, linha))) for linha in linhas]
+
+@pytest.mark.parametrize('indice, opcoes_indice', [
+    ('kdtree', None),
+    ('ivf', {'n_listas': 20, 'n_sondas': 20}),  # Todas as listas: resultado exato
+    ('fragmentado', {'processos': 2}),
+])
+def test_top_k_com_empates_igual_a_varredura_linear(indice, opcoes_indice):
+    base = base_com_repetidos(indice, opcoes_indice)
+    base.cache_resultados = None
+    consultas = consultas_empatadas()
+    indexado = base.indice
+    try:
+        for k in (1, 2, 3, 4, 5, 10):
+            base.indice = indexado
+            obtidos = [base.recuperar(caso, PESOS, k=k).indices for caso in consultas]
+            lote = base.recuperar_lote(np.array([list(c.atributos.values()) for c in consultas]), PESOS, k=k).indices
+            base.indice = None
+            for caso, obtido, do_lote in zip(consultas, obtidos, lote):
+                # O top-k é o prefixo da ordenação completa da varredura linear
+                esperado = base.recuperar(caso, PESOS).indices[:k]
+                np.testing.assert_array_equal(obtido, esperado)
+                np.testing.assert_array_equal(do_lote, esperado)
+    finally:
+        if indice == 'fragmentado':
+            indexado.encerrar()
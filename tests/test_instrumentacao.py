@@ -0,0 +1,51 @@
+# tests/test_instrumentacao.py
+
+import pytest
+from src import instrumentacao
+from src.cbr import BaseDeCasos, Caso
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+PESOS = {attr: 1.0 for attr in ATRIBUTOS}
+
+@pytest.fixture
+def medidas():
+    instrumentacao.zerar()
+    instrumentacao.ativar()
+    yield instrumentacao
+    instrumentacao.desativar()
+    instrumentacao.zerar()
+
+def examinados(base, consultas, k=10):
+    instrumentacao.zerar()
+    for caso in consultas:
+        base.recuperar(caso, PESOS, k=k)
+    return instrumentacao.estatisticas()['contadores']['casos_examinados']
+
+def test_casos_examinados_por_caminho(medidas):
+    n = 5000
+    data = gerar_base(n)
+    consultas = [Caso('Entrada', '?', dict(zip(ATRIBUTOS, linha))) for linha in gerar_consultas(10)[ATRIBUTOS].to_numpy()]
+
+    linear = BaseDeCasos(data, ATRIBUTOS)
+    assert examinados(linear, consultas) == len(consultas) * n
+
+    # Os índices examinam apenas os seus candidatos
+    kdtree = BaseDeCasos(data, ATRIBUTOS, indice='kdtree')
+    assert len(consultas) * 10 <= examinados(kdtree, consultas) < len(consultas) * n // 10
+    ivf = BaseDeCasos(data, ATRIBUTOS, indice='ivf', opcoes_indice={'n_listas': 50, 'n_sondas': 2})
+    assert len(consultas) * 10 <= examinados(ivf, consultas) < len(consultas) * n // 5
+
+def test_desligada_nao_registra_nada():
+    instrumentacao.desativar()
+    instrumentacao.zerar()
+    base = BaseDeCasos(gerar_base(500), ATRIBUTOS)
+    base.recuperar(Caso('Entrada', '?', dict(zip(ATRIBUTOS, gerar_consultas(1)[ATRIBUTOS].to_numpy()[0]))), PESOS, k=5)
+    assert instrumentacao.estatisticas() == {'etapas': {}, 'contadores': {}}
+
+def test_consulta_de_exemplo_na_escala_da_base():
+    data = gerar_base(500)
+    original = instrumentacao.consulta_de_exemplo(BaseDeCasos(data, ATRIBUTOS), data)
+    base = BaseDeCasos(data, ATRIBUTOS, normalizar=True)
+    normalizada = instrumentacao.consulta_de_exemplo(base, data)
+    assert normalizada.atributos == base.normalizador.transformar(original.atributos)
+    assert all(0.0 <= valor <= 1.0 for valor in normalizada.atributos.values())
@@ -0,0 +1,82 @@
+# tests/test_metricas.py
+
+import math
+import numpy as np
+import pytest
+import src.cbr
+from src.cbr import BaseDeCasos
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+METRICAS_MATRICIAIS = ['euclidiana', 'cosseno', 'mahalanobis']
+
+def distancia_ingenua(metrica, consulta, caso, pesos, matriz):
+    """Distância de um par pela fórmula da métrica, atributo a atributo."""
+    if metrica == 'euclidiana':
+        return math.sqrt(sum(w * (q - x) ** 2 for w, q, x in zip(pesos, consulta, caso)))
+    if metrica == 'manhattan':
+        return sum(w * abs(q - x) for w, q, x in zip(pesos, consulta, caso))
+    if metrica == 'cosseno':
+        produto = sum(w * q * x for w, q, x in zip(pesos, consulta, caso))
+        normas = math.sqrt(sum(w * q * q for w, q in zip(pesos, consulta))) * math.sqrt(sum(w * x * x for w, x in zip(pesos, caso)))
+        return 1 - produto / normas
+    if metrica == 'mahalanobis':
+        diferenca = np.sqrt(pesos) * (consulta - caso)
+        return math.sqrt(diferenca @ np.linalg.pinv(np.cov(matriz, rowvar=False)) @ diferenca)
+    amplitudes = matriz.max(axis=0) - matriz.min(axis=0)
+    locais = [1 - min(abs(q - x) / a, 1.0) for q, x, a in zip(consulta, caso, amplitudes)]
+    return 1 - sum(w * s for w, s in zip(pesos, locais)) / sum(pesos)
+
+@pytest.mark.parametrize('metrica', ['euclidiana', 'manhattan', 'cosseno', 'mahalanobis', 'local_global'])
+def test_nucleos_iguais_as_formulas_par_a_par(metrica):
+    base = BaseDeCasos(gerar_base(120, semente=12), ATRIBUTOS, normalizar=True, metrica=metrica)
+    consultas = base.normalizador.transformar_matriz(gerar_consultas(4)[ATRIBUTOS].to_numpy())
+    vetor_pesos = np.random.default_rng(5).uniform(0.0, 3.0, len(ATRIBUTOS))
+    vetor_pesos[:3] = 0.0  # Atributos ignorados
+    nucleo = base.nucleo(vetor_pesos)
+    distancias = nucleo(consultas)
+    esperadas = [[distancia_ingenua(metrica, q, x, vetor_pesos, base.matriz) for x in base.matriz] for q in consultas]
+    np.testing.assert_allclose(distancias, esperadas, rtol=1e-9, atol=1e-12)
+    # Mesmos pesos: o núcleo é reaproveitado; a consulta isolada dá as mesmas distâncias
+    assert base.nucleo(vetor_pesos.copy()) is nucleo
+    np.testing.assert_array_equal(base.calcular_distancias(consultas[0], vetor_pesos), distancias[0])
+
+def test_euclidiana_com_peso_negativo_usa_os_termos():
+    base = BaseDeCasos(gerar_base(50, semente=13), ATRIBUTOS)
+    consultas = gerar_consultas(3)[ATRIBUTOS].to_numpy()
+    vetor_pesos = np.ones(len(ATRIBUTOS))
+    vetor_pesos[0] = -0.01
+    esperadas = [[math.sqrt(sum(w * (q - x) ** 2 for w, q, x in zip(vetor_pesos, c, caso)))
+                  for caso in base.matriz] for c in consultas]
+    distancias = base.nucleo(vetor_pesos)(consultas)
+    np.testing.assert_allclose(distancias, esperadas, rtol=1e-9)
+
+@pytest.mark.parametrize('metrica', METRICAS_MATRICIAIS)
+def test_base_mapeada_nao_copia_a_matriz_nos_nucleos(tmp_path, metrica):
+    BaseDeCasos(gerar_base(2000), ATRIBUTOS).salvar(tmp_path / 'base')
+    mapeada = BaseDeCasos.carregar(tmp_path / 'base', metrica=metrica)
+    em_memoria = BaseDeCasos.carregar(tmp_path / 'base', mapear=False, metrica=metrica)
+    consultas = gerar_consultas(5)[ATRIBUTOS].to_numpy()
+    vetor_pesos = np.random.default_rng(0).uniform(0.1, 3.0, len(ATRIBUTOS))
+
+    nucleo = mapeada.nucleo(vetor_pesos)
+    # Só as normas por caso (cosseno) ficam em memória própria, nunca uma cópia da matriz
+    assert nucleo.memoria <= 8 * len(mapeada.matriz)
+    assert em_memoria.nucleo(vetor_pesos).memoria > 8 * len(mapeada.matriz)
+    # Preparar as faixas durante o cálculo não muda as distâncias
+    np.testing.assert_array_equal(nucleo(consultas), em_memoria.nucleo(vetor_pesos)(consultas))
+
+def test_cache_de_nucleos_limitado_em_bytes(monkeypatch):
+    base = BaseDeCasos(gerar_base(2000), ATRIBUTOS)
+    tamanho = base.nucleo(np.ones(len(ATRIBUTOS))).memoria
+    monkeypatch.setattr(src.cbr, 'MEMORIA_NUCLEOS', 2 * tamanho)
+    for fator in (2.0, 3.0, 4.0):
+        base.nucleo(np.full(len(ATRIBUTOS), fator))
+        assert sum(nucleo.memoria for nucleo in base.nucleos.values()) <= 2 * tamanho
+    # Os mais recentes permanecem
+    assert list(base.nucleos) == [np.full(len(ATRIBUTOS), fator).tobytes() for fator in (3.0, 4.0)]
+
+    # Um núcleo maior que o limite inteiro é usado, mas não guardado
+    monkeypatch.setattr(src.cbr, 'MEMORIA_NUCLEOS', tamanho // 2)
+    nucleo = base.nucleo(np.full(len(ATRIBUTOS), 5.0))
+    assert nucleo(gerar_consultas(1)[ATRIBUTOS].to_numpy()).shape == (1, 2000)
+    assert not base.nucleos
@@ -0,0 +1,56 @@
+# tests/test_persistencia.py
+
+import numpy as np
+import pytest
+from src.cbr import BaseDeCasos, Caso
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+PESOS = dict(zip(ATRIBUTOS, np.random.default_rng(3).uniform(0.1, 2.0, len(ATRIBUTOS))))
+
+@pytest.mark.parametrize('normalizar', [False, True])
+@pytest.mark.parametrize('mapear', [True, False])
+def test_base_salva_e_carregada_recupera_os_mesmos_casos(tmp_path, normalizar, mapear):
+    data = gerar_base(400, semente=6)
+    original = BaseDeCasos(data, ATRIBUTOS, normalizar=normalizar)
+    original.salvar(tmp_path / 'base')
+    carregada = BaseDeCasos.carregar(tmp_path / 'base', mapear=mapear)
+
+    assert isinstance(carregada.matriz, np.memmap) == mapear
+    assert list(carregada.ids) == list(original.ids)
+    assert list(carregada.diagnosticos) == list(original.diagnosticos)
+    np.testing.assert_array_equal(carregada.matriz, original.matriz)
+    np.testing.assert_array_equal(carregada.matriz_original, original.matriz_original)
+
+    consultas = gerar_consultas(20)[ATRIBUTOS].to_numpy()
+    if normalizar:
+        consultas = original.normalizador.transformar_matriz(consultas)
+    esperado = original.recuperar_lote(consultas, PESOS, k=7)
+    obtido = carregada.recuperar_lote(consultas, PESOS, k=7)
+    np.testing.assert_array_equal(obtido.indices, esperado.indices)
+    np.testing.assert_array_equal(obtido.similaridades, esperado.similaridades)
+    assert list(obtido.diagnosticos) == list(esperado.diagnosticos)
+
+    # A outra visão continua disponível sem o DataFrame
+    np.testing.assert_array_equal(carregada.com_normalizacao(not normalizar).matriz, original.com_normalizacao(not normalizar).matriz)
+
+def test_base_mapeada_aceita_novos_casos_sem_alterar_o_arquivo(tmp_path):
+    data = gerar_base(100, semente=8)
+    BaseDeCasos(data, ATRIBUTOS).salvar(tmp_path / 'base')
+    carregada = BaseDeCasos.carregar(tmp_path / 'base')
+    novo = gerar_consultas(1)[ATRIBUTOS].iloc[0].to_dict()
+    carregada.adicionar_caso(Caso(5000, 'M', novo))
+
+    assert len(carregada.matriz) == 101
+    assert carregada.recuperar(Caso('Entrada', '?', novo), PESOS, k=1).ids[0] == 5000
+    assert len(np.load(tmp_path / 'base' / 'matriz.npy')) == 100
+
+def test_float32_reduz_o_arquivo_e_mantem_os_vizinhos(tmp_path):
+    base = BaseDeCasos(gerar_base(400, semente=9), ATRIBUTOS, normalizar=True)
+    base.salvar(tmp_path / 'f64')
+    base.salvar(tmp_path / 'f32', dtype=np.float32)
+    assert (tmp_path / 'f32' / 'matriz.npy').stat().st_size < (tmp_path / 'f64' / 'matriz.npy').stat().st_size
+    carregada = BaseDeCasos.carregar(tmp_path / 'f32')
+    assert carregada.matriz.dtype == np.float32
+    np.testing.assert_allclose(carregada.matriz, base.matriz, atol=1e-6)
+    consultas = base.normalizador.transformar_matriz(gerar_consultas(10)[ATRIBUTOS].to_numpy())
+    assert list(carregada.recuperar_lote(consultas, PESOS, k=1).diagnosticos) == list(base.recuperar_lote(consultas, PESOS, k=1).diagnosticos)
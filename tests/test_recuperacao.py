@@ -0,0 +1,81 @@
+# tests/test_recuperacao.py
+
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from src.cbr import BaseDeCasos, Caso
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+def base_com_repetidos(n_casos=3000, passo=60):
+    """Base sintética com uma cópia, no final, de um a cada passo casos."""
+    data = gerar_base(n_casos)
+    repetidos = data.iloc[::passo].copy()
+    repetidos['ID'] = np.arange(100_000, 100_000 + len(repetidos))
+    return pd.concat([data, repetidos], ignore_index=True)
+
+def ordem_do_laco_original(data, valores, pesos):
+    """Ordenação da implementação original: um laço por caso e sort estável decrescente."""
+    similaridades = []
+    for posicao, linha in enumerate(data[ATRIBUTOS].to_numpy()):
+        soma = 0
+        for attr, a, b in zip(ATRIBUTOS, valores, linha):
+            soma += pesos.get(attr, 1) * (a - b) ** 2
+        similaridades.append((posicao, 1 / (1 + math.sqrt(soma))))
+    similaridades.sort(key=lambda x: x[1], reverse=True)
+    return [posicao for posicao, _ in similaridades]
+
+def test_ordenacao_completa_igual_ao_laco_original():
+    data = gerar_base(500, semente=4)
+    base = BaseDeCasos(data, ATRIBUTOS)
+    pesos = dict(zip(ATRIBUTOS, np.random.default_rng(2).uniform(0.0, 2.0, len(ATRIBUTOS))))
+    for valores in gerar_consultas(5)[ATRIBUTOS].to_numpy():
+        caso = Caso('Entrada', '?', dict(zip(ATRIBUTOS, valores)))
+        esperado = ordem_do_laco_original(data, valores, pesos)
+        recuperados = base.recuperar_casos_similares(caso, pesos)
+        assert [c.id for c, _ in recuperados] == list(data['ID'].to_numpy()[esperado])
+        # Similaridades conferidas caso a caso pela fórmula 1 / (1 + distância)
+        for c, similaridade in recuperados[:20]:
+            soma = sum(pesos[attr] * (caso.atributos[attr] - c.atributos[attr]) ** 2 for attr in ATRIBUTOS)
+            assert similaridade == pytest.approx(1 / (1 + math.sqrt(soma)), rel=1e-12)
+        # O limiar mantém exatamente o prefixo da ordenação acima dele
+        limiar = recuperados[30][1]
+        filtrados = base.recuperar_casos_similares(caso, pesos, limiar=limiar)
+        assert [(c.id, s) for c, s in filtrados] == [(c.id, s) for c, s in recuperados if s >= limiar]
+
+def test_top_k_igual_ao_laco_original_com_casos_repetidos():
+    data = base_com_repetidos()
+    base = BaseDeCasos(data, ATRIBUTOS)
+    base.cache_resultados = None
+    rng = np.random.default_rng(0)
+    # Consultas perto dos casos repetidos: as duas cópias empatam entre os vizinhos mais próximos
+    matriz = data[ATRIBUTOS].to_numpy()
+    linhas = 0.97 * matriz[:3000:60] + 0.03 * gerar_consultas(50)[ATRIBUTOS].to_numpy()
+    for valores in linhas:
+        pesos = dict(zip(ATRIBUTOS, rng.uniform(0.1, 3.0, len(ATRIBUTOS))))
+        esperado = ordem_do_laco_original(data, valores, pesos)[:10]
+        caso = Caso('Entrada', '?', dict(zip(ATRIBUTOS, valores)))
+        assert list(base.recuperar(caso, pesos, k=10).indices) == esperado
+        assert list(base.recuperar_lote(valores[None, :], pesos, k=10).indices[0]) == esperado
+
+@pytest.mark.parametrize('metrica', ['euclidiana', 'manhattan', 'cosseno', 'mahalanobis', 'local_global'])
+def test_casos_repetidos_tem_distancias_identicas(metrica):
+    data = base_com_repetidos()
+    originais, copias = np.arange(0, 3000, 60), np.arange(3000, len(data))
+    base = BaseDeCasos(data, ATRIBUTOS, metrica=metrica)
+    rng = np.random.default_rng(1)
+    consultas = gerar_consultas(40)[ATRIBUTOS].to_numpy()
+    for valores in consultas:
+        vetor_pesos = rng.uniform(0.1, 3.0, len(ATRIBUTOS))
+        distancias = base.calcular_distancias(valores, vetor_pesos)
+        np.testing.assert_array_equal(distancias[originais], distancias[copias])
+        # No lote, a posição da consulta no bloco também não altera as distâncias
+        lote = base.nucleo(vetor_pesos)(consultas[:8])
+        np.testing.assert_array_equal(lote[:, originais], lote[:, copias])
+        np.testing.assert_array_equal(lote[3], base.calcular_distancias(consultas[3], vetor_pesos))
+
+@pytest.mark.parametrize('k', [0, -1])
+def test_lote_rejeita_k_menor_que_um(k):
+    base = BaseDeCasos(gerar_base(50), ATRIBUTOS)
+    with pytest.raises(ValueError, match='vizinhos'):
+        base.recuperar_lote(gerar_consultas(3)[ATRIBUTOS], {}, k=k)
@@ -0,0 +1,60 @@
+# tests/test_servidor.py
+
+import asyncio
+import json
+import numpy as np
+from src.cbr import BaseDeCasos
+from src.servidor import ServicoDeRecuperacao, ServidorHTTP
+from benchmarks.sintetico import ATRIBUTOS, gerar_base, gerar_consultas
+
+async def enviar(porta, caminho, corpo=None):
+    """Cliente HTTP mínimo: envia uma requisição (POST se houver corpo) e retorna (status, JSON)."""
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    dados = json.dumps(corpo).encode('utf-8') if corpo is not None else b''
+    metodo = 'POST' if corpo is not None else 'GET'
+    escritor.write(
+        f"{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(dados)}\r\n"
+        f"Connection: close\r\n\r\n".encode('latin-1') + dados
+    )
+    await escritor.drain()
+    resposta = await leitor.read()
+    escritor.close()
+    cabecalho, _, corpo_resposta = resposta.partition(b'\r\n\r\n')
+    return int(cabecalho.split()[1]), json.loads(corpo_resposta)
+
+def test_pedidos_concorrentes_em_micro_lotes_iguais_a_recuperar_lote():
+    base = BaseDeCasos(gerar_base(3000), ATRIBUTOS)
+    consultas = gerar_consultas(24)[ATRIBUTOS]
+    rng = np.random.default_rng(0)
+    conjuntos_de_pesos = [{}, {'Area_mean': 3.0, 'Texture_mean': 0.5}, {attr: float(p) for attr, p in zip(ATRIBUTOS, rng.random(30))}]
+    pedidos = []
+    for i in range(24):
+        caso = consultas.iloc[i].to_dict()
+        casos = [caso] if i % 3 else [caso, consultas.iloc[(i + 1) % 24].to_dict()]
+        pedidos.append({'casos': casos, 'pesos': conjuntos_de_pesos[i % 3], 'k': (1, 3, 5, 8)[i % 4],
+                        'voto': 'ponderado' if i % 5 == 0 else 'maioria'})
+
+    async def executar():
+        # Janela longa: os pedidos concorrentes caem no mesmo lote, com pesos e k diferentes
+        servidor = ServidorHTTP(ServicoDeRecuperacao(base, janela=0.2), porta=0)
+        await servidor.iniciar()
+        try:
+            respostas = await asyncio.gather(*(enviar(servidor.porta, '/recuperar', pedido) for pedido in pedidos))
+            _, estado = await enviar(servidor.porta, '/estado')
+        finally:
+            await servidor.encerrar()
+        return respostas, estado
+
+    respostas, estado = asyncio.run(executar())
+    assert estado['pedidos'] == len(pedidos)
+    assert estado['lotes'] < len(pedidos)  # Houve micro-lotes com mais de um pedido
+
+    for pedido, (status, resposta) in zip(pedidos, respostas):
+        assert status == 200
+        pesos = {attr: pedido['pesos'].get(attr, 1.0) for attr in ATRIBUTOS}
+        matriz = np.array([[caso[attr] for attr in ATRIBUTOS] for caso in pedido['casos']])
+        esperado = base.recuperar_lote(matriz, pesos, k=pedido['k'], voto=pedido['voto'])
+        for i, resultado in enumerate(resposta['resultados']):
+            assert [v['id'] for v in resultado['vizinhos']] == esperado.ids[i].tolist()
+            np.testing.assert_allclose([v['similaridade'] for v in resultado['vizinhos']], esperado.similaridades[i])
+            assert resultado['diagnostico'] == esperado.diagnosticos[i]
@@ -0,0 +1,51 @@
+# tests/test_utils.py
+
+import gc
+import numpy as np
+import pandas as pd
+from src import utils
+from src.utils import NormalizadorMinMax, NormalizadorZScore, normalize_data, obter_normalizador, zscore_normalize
+
+def dados():
+    return pd.DataFrame({'ID': [1, 2, 3, 4], 'Diagnosis': ['M', 'B', 'B', 'M'],
+                         'a': [0.0, 2.0, 4.0, 10.0], 'b': [1.0, 1.5, 2.0, 3.0]})
+
+def test_normalizador_reaproveitado_enquanto_os_dados_nao_mudam():
+    data = dados()
+    assert obter_normalizador(data) is obter_normalizador(data)
+    assert obter_normalizador(data, NormalizadorZScore) is obter_normalizador(data, NormalizadorZScore)
+
+def test_alteracao_no_proprio_dataframe_reajusta_as_estatisticas():
+    data = dados()
+    assert normalize_data(data, {'a': 5.0})['a'] == 0.5
+    media = zscore_normalize(data, {'a': 4.0})['a']
+
+    # Valores alterados no próprio objeto: o cache só é refeito quando avisado
+    data.loc[3, 'a'] = 20.0  # Novo máximo
+    assert normalize_data(data, {'a': 5.0})['a'] == 0.5
+    utils.limpar_normalizadores(data)
+    assert normalize_data(data, {'a': 5.0})['a'] == 0.25
+    assert zscore_normalize(data, {'a': 4.0})['a'] != media
+
+    # Linhas e colunas acrescentadas mudam a forma e são detectadas sem aviso
+    data.loc[len(data)] = [5, 'B', -20.0, 1.0]  # Novo mínimo
+    assert normalize_data(data, {'a': 0.0})['a'] == 0.5
+
+    data['c'] = data['b'] * 2
+    assert 'c' in obter_normalizador(data).atributos
+
+def test_cache_descartado_quando_o_dataframe_e_coletado():
+    data = dados()
+    obter_normalizador(data)
+    chave = (id(data), NormalizadorMinMax)
+    assert chave in utils._normalizadores
+    del data
+    gc.collect()
+    assert chave not in utils._normalizadores
+
+def test_limpar_normalizadores_forca_novo_ajuste():
+    data = dados()
+    normalizador = obter_normalizador(data)
+    utils.limpar_normalizadores(data)
+    assert obter_normalizador(data) is not normalizador
+    np.testing.assert_array_equal(obter_normalizador(data).atributos, normalizador.atributos)